@@ -0,0 +1,64 @@
+"""
+Vector-database boot time: embedding from scratch vs. loading the prebuilt artifact.
+
+Each case starts `initialize_vector_db` against a fresh ChromaDB directory:
+
+- "embed": empty volume, no artifact; every chunk is embedded through a fake
+  provider that sleeps ``--latency`` seconds per batch to stand in for the
+  network round trip.
+- "artifact": empty volume, bulk-loaded from the artifact exported by the
+  first case, with no embedding calls.
+- "warm restart": the volume from the first case, already up to date.
+
+    python -m benchmarks.bench_boot --latency 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.database.chroma_db import ChromaDBManager
+from src.services.rag.utils.embedding_provider import FakeEmbeddingProvider
+from src.utils.helper import export_index_artifact, initialize_vector_db
+
+
+async def _boot(
+    label: str, chroma_path: str, artifact_path: str, latency: float
+) -> ChromaDBManager:
+    provider = FakeEmbeddingProvider(latency_seconds=latency)
+    start = time.perf_counter()
+    manager = ChromaDBManager(path=chroma_path)
+    await initialize_vector_db(manager, provider=provider, artifact_path=artifact_path)
+    print(
+        f"{label:<14} {time.perf_counter() - start:8.2f}s "
+        f"({provider.calls} embedding calls)"
+    )
+    return manager
+
+
+async def main(latency: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = os.path.join(directory, "index_artifact.npz")
+        first = await _boot(
+            "embed", os.path.join(directory, "a"), artifact_path, latency
+        )
+        await export_index_artifact(artifact_path, first)
+        print(f"artifact size  {os.path.getsize(artifact_path) / 1024:.0f} KiB")
+        await _boot("artifact", os.path.join(directory, "b"), artifact_path, latency)
+        await _boot(
+            "warm restart", os.path.join(directory, "a"), artifact_path, latency
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=1.0,
+        help="Simulated seconds per embedding request",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,86 @@
+"""
+Checkpoint cost per chat turn for each checkpointer backend.
+
+Runs conversations through a `RAGChat` with instant fake retrieval and model,
+so the measured time is graph plus checkpoint overhead. Compares the in-memory
+saver, the SQLite saver with batched write-behind, and the SQLite saver
+committing synchronously on every write, and reports the cost of reading a
+thread's latest checkpoint.
+
+    python -m benchmarks.bench_checkpointer --threads 20 --turns 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from benchmarks.bench_rag_engine import _NO_CACHE, _FakeRetriever, _summary
+from src.database.checkpointer import SQLiteCheckpointSaver
+from src.services.rag.rag_chat import RAGChat
+
+
+async def _run(
+    label: str, checkpointer: BaseCheckpointSaver, threads: int, turns: int
+) -> None:
+    engine = RAGChat(
+        llm=FakeListChatModel(responses=["সাতাশ"]),
+        retriever=_FakeRetriever(),
+        checkpointer=checkpointer,
+        answer_cache=_NO_CACHE,
+    )
+    turn_times: List[float] = []
+    for turn in range(turns):
+        for thread in range(threads):
+            start = time.perf_counter()
+            await engine.process_user_input(
+                f"প্রশ্ন {turn}", thread_id=f"thread-{thread}"
+            )
+            turn_times.append(time.perf_counter() - start)
+
+    read_times: List[float] = []
+    for thread in range(threads):
+        start = time.perf_counter()
+        config = {"configurable": {"thread_id": f"thread-{thread}"}}
+        await checkpointer.aget_tuple(config)
+        read_times.append(time.perf_counter() - start)
+
+    close = getattr(checkpointer, "close", None)
+    if close is not None:
+        close()
+    _summary(f"{label} turn", turn_times)
+    _summary(f"{label} read", read_times)
+
+
+async def main(threads: int, turns: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        await _run("memory", MemorySaver(), threads, turns)
+        await _run(
+            "sqlite batched",
+            SQLiteCheckpointSaver(os.path.join(directory, "batched.sqlite")),
+            threads,
+            turns,
+        )
+        await _run(
+            "sqlite sync",
+            SQLiteCheckpointSaver(
+                os.path.join(directory, "sync.sqlite"), flush_interval=0
+            ),
+            threads,
+            turns,
+        )
+    print(f"({threads} threads x {turns} turns)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.threads, args.turns))
@@ -0,0 +1,77 @@
+"""
+Cold start: import time of the app and time until it is live and ready.
+
+Each run starts a fresh interpreter that imports `src.main`, then opens the
+app with a test client and polls ``/health`` (liveness) and ``/ready``
+(readiness). Also reports which heavy client libraries the import alone
+pulls in; after the lazy-initialization change none should be.
+
+    python -m benchmarks.bench_cold_start --runs 5
+    python -m benchmarks.bench_cold_start --runs 5 --ready  # needs a Chroma volume
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_HEAVY_MODULES = ("chromadb", "google.genai", "langchain_google_genai")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+result = {{"import": imported - start, "heavy_modules": heavy}}
+from fastapi.testclient import TestClient
+with TestClient(src.main.app) as client:
+    client.get("/health")
+    result["live"] = time.perf_counter() - start
+    if {ready!r}:
+        while client.get("/ready").status_code != 200:
+            if src.main.app.state.startup_error:
+                result["error"] = src.main.app.state.startup_error
+                break
+            time.sleep(0.01)
+        else:
+            result["ready"] = time.perf_counter() - start
+print("RESULT " + json.dumps(result))
+"""
+
+
+def _run(ready: bool) -> dict:
+    code = _PROBE.format(heavy=_HEAVY_MODULES, ready=ready)
+    env = {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "dummy")}
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    )
+    for line in output.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT ") :])
+    raise RuntimeError(output.stderr[-2000:])
+
+
+def main(runs: int, ready: bool) -> None:
+    results = [_run(ready) for _ in range(runs)]
+    for key in ("import", "live", "ready"):
+        samples = [r[key] for r in results if key in r]
+        if samples:
+            print(
+                f"{key:<8} median={statistics.median(samples):6.2f}s "
+                f"min={min(samples):6.2f}s max={max(samples):6.2f}s"
+            )
+    print(f"heavy modules loaded at import: {results[0]['heavy_modules'] or 'none'}")
+    errors = {r["error"] for r in results if "error" in r}
+    if errors:
+        print(f"warm-up failed: {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready", action="store_true", help="Also wait for /ready")
+    args = parser.parse_args()
+    main(args.runs, args.ready)
@@ -0,0 +1,87 @@
+"""
+Query-embedding throughput with and without micro-batching.
+
+``--clients`` concurrent clients each embed ``--queries`` distinct questions
+against a fake provider that charges ``--latency`` seconds per request plus
+``--per-text`` seconds per text, with at most ``--upstream-concurrency``
+requests in flight (the governor's limit). Without batching every question is
+its own request; with batching, questions arriving within ``--window-ms`` of
+each other share one.
+
+No network calls are made:
+    python -m benchmarks.bench_embedding_batcher --clients 64 --queries 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from src.services.rag.utils.embedding_batcher import EmbeddingBatcher
+from src.services.rag.utils.embedding_provider import FakeEmbeddingProvider
+
+
+class _Upstream:
+    """Fake embedding API with per-request latency and a concurrency limit."""
+
+    def __init__(self, latency: float, per_text: float, concurrency: int):
+        self.provider = FakeEmbeddingProvider()
+        self.latency = latency
+        self.per_text = per_text
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        async with self.semaphore:
+            await asyncio.sleep(self.latency + self.per_text * len(texts))
+            return await self.provider.embed(texts, "retrieval_query")
+
+
+async def _run(args: argparse.Namespace, batched: bool) -> None:
+    upstream = _Upstream(args.latency, args.per_text, args.upstream_concurrency)
+    batcher = EmbeddingBatcher(
+        upstream.embed, window_ms=args.window_ms, max_batch_size=args.max_batch_size
+    )
+    latencies: List[float] = []
+
+    async def client(c: int) -> None:
+        for q in range(args.queries):
+            text = f"client {c} question {q}"
+            start = time.perf_counter()
+            if batched:
+                await batcher.embed(text)
+            else:
+                await upstream.embed([text])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{'batched' if batched else 'unbatched':<10} "
+        f"{len(latencies) / elapsed:8.1f} queries/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99)] * 1000:7.1f}ms  "
+        f"upstream requests={upstream.provider.calls}"
+    )
+    if batched:
+        print(json.dumps(batcher.stats.as_dict(), indent=2))
+
+
+async def main(args: argparse.Namespace) -> None:
+    await _run(args, batched=False)
+    await _run(args, batched=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-text", type=float, default=0.0005)
+    parser.add_argument("--upstream-concurrency", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""
+Upstream governor against a local fake model with a quota and a slow tail.
+
+Two scenarios, each run without and with the governor:
+
+- "burst": ``--requests`` concurrent calls against a provider that rejects
+  calls beyond ``--capacity`` in flight with a 429. Without the governor the
+  excess fails outright; with it the adaptive limit settles near the quota
+  and the rejected calls are retried.
+- "tail": sequential calls where ``--slow-rate`` of responses take
+  ``--slow-latency`` seconds. Hedging starts a second attempt once a call
+  outlasts the 95th percentile of recent latencies.
+
+No network calls are made:
+    python -m benchmarks.bench_governor --requests 200 --capacity 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from src.services.rag.utils.fake_llm import FakeChatModel
+from src.services.rag.utils.governor import AdaptiveLimiter, Governor
+
+_MESSAGES = [HumanMessage(content="অনুপমের বয়স কত?")]
+
+
+async def _call(llm: FakeChatModel, governor: Optional[Governor]) -> float:
+    start = time.perf_counter()
+    if governor is None:
+        await llm.ainvoke(_MESSAGES)
+    else:
+        await governor.call(lambda _: llm.ainvoke(_MESSAGES))
+    return time.perf_counter() - start
+
+
+def _report(label: str, latencies: List[float], failures: int, upstream: int) -> None:
+    latencies = sorted(latencies) or [0.0]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:<20} ok={len(latencies):4d} failed={failures:4d} "
+        f"upstream calls={upstream:4d} p50={statistics.median(latencies):6.3f}s "
+        f"p99={p99:6.3f}s"
+    )
+
+
+async def burst(requests: int, capacity: int, latency: float) -> None:
+    for label, governed in (("burst, ungoverned", False), ("burst, governed", True)):
+        llm = FakeChatModel(latency_seconds=latency, capacity=capacity)
+        governor = (
+            Governor(
+                "llm",
+                timeout_seconds=60,
+                retry_attempts=5,
+                retry_delay=latency,
+                limiter=AdaptiveLimiter(capacity * 4, max_limit=capacity * 8),
+            )
+            if governed
+            else None
+        )
+        results = await asyncio.gather(
+            *(_call(llm, governor) for _ in range(requests)), return_exceptions=True
+        )
+        latencies = [r for r in results if isinstance(r, float)]
+        _report(label, latencies, len(results) - len(latencies), llm.calls)
+        if governor is not None:
+            print(f"{'':<20} final limit {governor.limiter.limit:.1f}")
+
+
+async def tail(requests: int, latency: float, slow_rate: float, slow: float) -> None:
+    for label, hedge in (("tail, no hedging", False), ("tail, hedged", True)):
+        llm = FakeChatModel(
+            latency_seconds=latency,
+            slow_rate=slow_rate,
+            slow_latency_seconds=slow,
+            seed=1,
+        )
+        governor = Governor("llm", timeout_seconds=60, hedge=hedge)
+        latencies = [await _call(llm, governor) for _ in range(requests)]
+        _report(label, latencies, 0, llm.calls)
+
+
+async def main(args: argparse.Namespace) -> None:
+    await burst(args.requests, args.capacity, args.latency)
+    await tail(args.requests, args.latency, args.slow_rate, args.slow_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+Caller-side cost of logging per request: direct handlers vs. the queue.
+
+A simulated request logs ``--lines`` records (plus one access line) through
+a rotating file handler and a console handler. "direct" is the previous
+setup, with both handlers attached to the logger, so the caller formats
+the line and writes it. "queued" is the current setup, where the caller only
+enqueues the record and a background thread writes it. Both run with the
+text and the JSON format, with ``--interval-ms`` between requests. Console
+output goes to ``/dev/null`` and the log file to a temporary directory.
+
+No network calls are made:
+    python -m benchmarks.bench_logging --requests 5000 --lines 4
+    python -m benchmarks.bench_logging --interval-ms 0 --queue-size 100  # overload
+"""
+
+import argparse
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from typing import List
+
+from src.utils import logger as app_logger
+
+_TEXT = logging.Formatter(
+    "[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+
+def _handlers(directory: str, formatter: logging.Formatter) -> List[logging.Handler]:
+    console = logging.StreamHandler(open(os.devnull, "w"))
+    file = RotatingFileHandler(
+        os.path.join(directory, "log.txt"), maxBytes=100 * 1024 * 1024, backupCount=5
+    )
+    for handler in (console, file):
+        handler.setFormatter(formatter)
+    return [console, file]
+
+
+def _run(log: logging.Logger, args: argparse.Namespace) -> List[float]:
+    samples = []
+    for i in range(args.requests):
+        token = app_logger.bind_request(f"{i:032x}")
+        start = time.perf_counter()
+        for line in range(args.lines):
+            log.info("Stage %d of request %d finished in %.1fms", line, i, 1.5)
+        log.info(
+            "POST /api/chat 200 in 12.3ms (embed=1.0ms retrieve=2.0ms)",
+            extra={"stages": {"embed": 0.001, "retrieve": 0.002}},
+        )
+        samples.append(time.perf_counter() - start)
+        app_logger.reset_request(token)
+        if args.interval_ms:
+            time.sleep(args.interval_ms / 1000)
+    return samples
+
+
+def _report(label: str, samples: List[float], dropped: int = 0) -> None:
+    micros = sorted(s * 1e6 for s in samples)
+    print(
+        f"{label:<14} mean={statistics.mean(micros):7.1f}us "
+        f"p50={statistics.median(micros):7.1f}us "
+        f"p99={micros[int(len(micros) * 0.99)]:8.1f}us  dropped={dropped}"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    print(
+        f"{args.lines + 1} records per request, {args.requests} requests, "
+        f"{args.interval_ms}ms apart"
+    )
+    for fmt, formatter in (("text", _TEXT), ("json", app_logger.JsonFormatter())):
+        with tempfile.TemporaryDirectory() as directory:
+            log = logging.getLogger(f"bench.direct.{fmt}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            for handler in _handlers(directory, formatter):
+                log.addHandler(handler)
+            _report(f"direct {fmt}", _run(log, args))
+
+        with tempfile.TemporaryDirectory() as directory:
+            handler = app_logger.BoundedQueueHandler(queue.Queue(args.queue_size))
+            writer = app_logger._Writer(handler, *_handlers(directory, formatter))
+            writer.start()
+            log = logging.getLogger(f"bench.queued.{fmt}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            log.addHandler(handler)
+            samples = _run(log, args)
+            writer.stop()
+            _report(f"queued {fmt}", samples, handler.dropped)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    # Pause between requests; 0 logs back to back, faster than any writer.
+    parser.add_argument("--interval-ms", type=float, default=1.0)
+    main(parser.parse_args())
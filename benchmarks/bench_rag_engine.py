@@ -0,0 +1,91 @@
+"""
+Per-request overhead of building a `RAGChat` per call vs. reusing one engine.
+
+The "before" path constructs a new engine (Gemini client, prompt parse, graph
+compile, checkpointer) for every request, the "after" path reuses a single
+engine. Retrieval and the model call are swapped for instant fakes after
+construction so that only setup and graph overhead is measured.
+
+Run inside the app container (needs GEMINI_API_KEY set, no network calls are made):
+    python -m benchmarks.bench_rag_engine --requests 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Sequence
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.services.memory.memory_manager import RetrievalResult
+from src.services.rag.rag_chat import RAGChat
+from src.services.rag.utils.answer_cache import SemanticAnswerCache
+
+
+class _FakeRetriever:
+    """Return a fixed embedding and context without touching ChromaDB."""
+
+    async def embed_query(self, text: str) -> List[float]:
+        return [1.0, 0.0, 0.0]
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    async def search(
+        self, text: str, embedding: Sequence[float], n_results: int = 2
+    ) -> RetrievalResult:
+        return RetrievalResult(ids=["0"], documents=["অনুপমের বয়স সাতাশ বছর।"])
+
+    async def search_many(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 2,
+    ) -> List[RetrievalResult]:
+        return [await self.search(t, e, n_results) for t, e in zip(texts, embeddings)]
+
+
+# A threshold above 1 never matches, so every request reaches the graph.
+_NO_CACHE = SemanticAnswerCache(similarity_threshold=2.0, max_entries=1)
+
+
+def _fake_llm() -> FakeListChatModel:
+    return FakeListChatModel(responses=["সাতাশ"])
+
+
+def _summary(label: str, samples: List[float]) -> None:
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(
+        f"{label:<28} mean={statistics.mean(samples_ms):8.3f}ms "
+        f"p50={statistics.median(samples_ms):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+async def main(requests: int) -> None:
+    before: List[float] = []
+    for i in range(requests):
+        start = time.perf_counter()
+        engine = RAGChat(retriever=_FakeRetriever(), answer_cache=_NO_CACHE)
+        engine.llm = _fake_llm()
+        await engine.process_user_input("অনুপমের বয়স কত?", thread_id=f"t{i}")
+        before.append(time.perf_counter() - start)
+
+    shared = RAGChat(retriever=_FakeRetriever(), answer_cache=_NO_CACHE)
+    shared.llm = _fake_llm()
+    after: List[float] = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await shared.process_user_input("অনুপমের বয়স কত?", thread_id=f"t{i}")
+        after.append(time.perf_counter() - start)
+
+    _summary("per-request engine", before)
+    _summary("shared engine", after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
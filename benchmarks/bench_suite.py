@@ -0,0 +1,547 @@
+"""
+End-to-end load test and micro-benchmarks against local fake providers.
+
+The suite copies ``config/config.yaml`` into a temporary directory with
+``model.provider`` and ``embedding.provider`` set to "fake", every cache,
+index and database path moved into that directory and the rate limit raised
+out of the way, so a run neither calls Gemini nor touches the working caches.
+The fakes are deterministic: embeddings depend only on the text, and the
+injected latency, failures and token rate come from seeded draws. The answer
+and embedding caches are off unless ``--caches`` is given, so every request
+goes through embedding, retrieval and the model.
+
+- "load" boots ``uvicorn src.main:app`` on that config and waits for /ready.
+  It then sends the questions from the "Part Two: Q&A" section of
+  data/processed.txt to ``POST /api/chat`` from ``--concurrency`` clients.
+  It reports throughput, p50/p95/p99 latency and status counts. The
+  per-stage breakdown comes from the ``rag_stage_duration_seconds``
+  histograms, scraped from /metrics before and after the run.
+- "micro" times three things in process: ``initialize_vector_db`` into an
+  empty volume, ``memory_manager.search`` over the ingested corpus, and
+  ``take`` on the memory and SQLite rate-limit stores.
+
+Results are written as JSON together with the commit they were measured on.
+``--compare`` prints the change against an earlier results file.
+
+    python -m benchmarks.bench_suite --concurrency 16 --requests 500
+    python -m benchmarks.bench_suite load --llm-latency 0.5 --tokens-per-second 50
+    python -m benchmarks.bench_suite micro --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import math
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import yaml
+
+CONFIG_FILE = "config/config.yaml"
+QUESTIONS_FILE = "data/processed.txt"
+QA_SECTION = "Part Two: Q&A"
+QUESTION_PREFIX = "প্রশ্ন:"
+RESULTS_DIR = "benchmarks/results"
+
+_STAGE_LINE = re.compile(
+    r'^rag_stage_duration_seconds_(bucket|sum|count)\{stage="([^"]+)"'
+    r'(?:,le="([^"]+)")?\} (\S+)$'
+)
+
+
+def load_questions(path: str = QUESTIONS_FILE) -> List[str]:
+    """Return the questions of the Q&A section of the processed corpus, in order."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    _, found, section = text.partition(QA_SECTION)
+    if not found:
+        raise ValueError(f"No '{QA_SECTION}' section in {path}")
+    return [
+        line[len(QUESTION_PREFIX) :].strip()
+        for line in section.splitlines()
+        if line.startswith(QUESTION_PREFIX)
+    ]
+
+
+def _merge(into: Dict[str, Any], overrides: Dict[str, Any]) -> None:
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(into.get(key), dict):
+            _merge(into[key], value)
+        else:
+            into[key] = value
+
+
+def write_config(directory: str, args: argparse.Namespace) -> str:
+    """Write the benchmark config into *directory* and return its path."""
+    with open(CONFIG_FILE, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    def path(name: str) -> str:
+        return os.path.join(directory, name)
+
+    _merge(
+        config,
+        {
+            "model": {
+                "provider": "fake",
+                "fake": {
+                    "latency_seconds": args.llm_latency,
+                    "error_rate": args.llm_error_rate,
+                    "tokens_per_second": args.tokens_per_second,
+                },
+            },
+            "embedding": {
+                "provider": "fake",
+                "fake": {
+                    "latency_seconds": args.embedding_latency,
+                    "error_rate": args.embedding_error_rate,
+                },
+                "cache": {"enabled": args.caches, "path": path("embeddings.sqlite")},
+            },
+            "answer_cache": {"enabled": args.caches},
+            "rate_limit": {
+                "max_requests": 1_000_000_000,
+                "sqlite_path": path("rate_limit.sqlite"),
+            },
+            "processing": {"cache_dir": path("extract_cache")},
+            # No artifact, so startup embeds the corpus through the fake provider.
+            "ingestion": {"artifact_path": path("index_artifact.npz")},
+            "retrieval": {"index_dir": path("vector_index")},
+            "checkpointer": {"path": path("checkpoints.sqlite")},
+            "metrics": {
+                "enabled": True,
+                "multiprocess_dir": path("metrics"),
+                "flush_interval_seconds": 1,
+            },
+            "logging": {"level": "WARNING", "file": path("log.txt")},
+            "chroma": {"path": path("chroma")},
+            "server": {"workers": args.workers},
+        },
+    )
+    if args.engine:
+        config["retrieval"]["engine"] = args.engine
+    config_path = path("config.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+    return config_path
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"mean": value, "p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "mean": statistics.mean(samples) * 1000,
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+    }
+
+
+def _stage_histograms(text: str) -> Dict[str, Dict[str, Any]]:
+    stages: Dict[str, Dict[str, Any]] = {}
+    for line in text.splitlines():
+        match = _STAGE_LINE.match(line)
+        if match is None:
+            continue
+        kind, stage, bound, value = match.groups()
+        entry = stages.setdefault(stage, {"buckets": {}, "sum": 0.0, "count": 0.0})
+        if kind == "bucket":
+            entry["buckets"][float(bound)] = float(value)
+        else:
+            entry[kind] = float(value)
+    return stages
+
+
+def _bucket_quantile(buckets: Dict[float, float], q: float) -> float:
+    """Estimate a quantile from cumulative bucket counts, like histogram_quantile."""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0.0
+    if not total:
+        return 0.0
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return lower
+            return lower + (bound - lower) * (rank - below) / max(count - below, 1e-12)
+        lower, below = bound, count
+    return lower
+
+
+def stage_breakdown(before: str, after: str) -> Dict[str, Dict[str, float]]:
+    """Per-stage count, mean and bucket-estimated p50/p95 between two scrapes."""
+    start = _stage_histograms(before)
+    breakdown = {}
+    for stage, entry in sorted(_stage_histograms(after).items()):
+        base = start.get(stage, {"buckets": {}, "sum": 0.0, "count": 0.0})
+        count = entry["count"] - base["count"]
+        if count <= 0:
+            continue
+        buckets = {
+            bound: value - base["buckets"].get(bound, 0.0)
+            for bound, value in entry["buckets"].items()
+        }
+        breakdown[stage] = {
+            "count": count,
+            "mean_ms": (entry["sum"] - base["sum"]) / count * 1000,
+            "p50_ms": _bucket_quantile(buckets, 0.50) * 1000,
+            "p95_ms": _bucket_quantile(buckets, 0.95) * 1000,
+        }
+    return breakdown
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(
+    client: httpx.AsyncClient, server: subprocess.Popen, timeout: float
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return
+            if response.json().get("error", {}).get("status") == "failed":
+                raise RuntimeError(f"Server failed to start: {response.text}")
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+
+
+async def _drive(
+    client: httpx.AsyncClient, questions: List[str], total: int, concurrency: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: collections.Counter = collections.Counter()
+    indexes = iter(range(total))
+
+    async def user() -> None:
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/chat", json={"userInput": questions[i % len(questions)]}
+                )
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            statuses[str(response.status_code)] += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": total,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "error_rate": 1 - len(latencies) / total if total else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "latency_ms": _percentiles(latencies),
+    }
+
+
+async def _scrape(client: httpx.AsyncClient, workers: int) -> str:
+    if workers > 1:
+        # Let every worker flush its latest values (each second) first.
+        await asyncio.sleep(2)
+    return (await client.get("/metrics")).text
+
+
+async def run_load(
+    args: argparse.Namespace, config_path: str, directory: str
+) -> Dict[str, Any]:
+    questions = load_questions()
+    port = _free_port()
+    env = {**os.environ, "CONFIG_PATH": config_path}
+    server_log = open(os.path.join(directory, "server.log"), "w")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=server_log,
+        stderr=subprocess.STDOUT,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits
+        ) as client:
+            await _wait_ready(client, server, args.boot_timeout)
+            boot_seconds = time.perf_counter() - start
+            print(
+                f"load: ready in {boot_seconds:.2f}s, {len(questions)} questions, "
+                f"{args.requests} requests from {args.concurrency} clients"
+            )
+            if args.warmup:
+                await _drive(client, questions, args.warmup, args.concurrency)
+            before = await _scrape(client, args.workers)
+            result = await _drive(client, questions, args.requests, args.concurrency)
+            after = await _scrape(client, args.workers)
+    except Exception:
+        server_log.flush()
+        print(open(server_log.name).read()[-4000:], file=sys.stderr)
+        raise
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        server_log.close()
+    result["boot_seconds"] = boot_seconds
+    result["questions"] = len(questions)
+    result["stages"] = stage_breakdown(before, after)
+    return result
+
+
+def _timed(samples: List[float], start: float) -> None:
+    samples.append(time.perf_counter() - start)
+
+
+async def run_micro(args: argparse.Namespace, directory: str) -> Dict[str, Any]:
+    """Ingestion, retrieval and rate-limiter timings against the benchmark config."""
+    from src.api.middleware.rate_limit import (
+        MemoryRateLimitStore,
+        SQLiteRateLimitStore,
+    )
+    from src.database.chroma_db import ChromaDBManager, get_chroma_manager
+    from src.services.memory import memory_manager
+    from src.services.rag.utils.embedding_provider import FakeEmbeddingProvider
+    from src.utils.config import get_settings
+    from src.utils.helper import COLLECTION_NAME, initialize_vector_db
+
+    settings = get_settings()
+    results: Dict[str, Any] = {}
+    provider = FakeEmbeddingProvider()
+
+    ingest: List[float] = []
+    chunks = 0
+    for run in range(args.micro_repeat):
+        manager = ChromaDBManager(path=os.path.join(directory, f"ingest-{run}"))
+        start = time.perf_counter()
+        await initialize_vector_db(manager, provider=provider)
+        _timed(ingest, start)
+        chunks = manager.get_or_create_collection(COLLECTION_NAME).count()
+    results["ingestion"] = {
+        "chunks": chunks,
+        "seconds": statistics.mean(ingest),
+        "chunks_per_second": chunks / statistics.mean(ingest),
+    }
+
+    await initialize_vector_db(get_chroma_manager(), provider=provider)
+    await memory_manager.warm_up()
+    questions = load_questions()
+    embeddings = await provider.embed(questions, "retrieval_query")
+    retrieval: List[float] = []
+    for i in range(args.micro_queries):
+        text, embedding = questions[i % len(questions)], embeddings[i % len(questions)]
+        start = time.perf_counter()
+        await memory_manager.search(
+            text, embedding, n_results=settings.RETRIEVAL_N_RESULTS
+        )
+        _timed(retrieval, start)
+    results["retrieval"] = {
+        "engine": settings.RETRIEVAL_ENGINE,
+        "queries": args.micro_queries,
+        "latency_ms": _percentiles(retrieval),
+    }
+
+    stores = {
+        "memory": MemoryRateLimitStore(max_requests=100, window_seconds=3600),
+        "sqlite": SQLiteRateLimitStore(
+            os.path.join(directory, "micro_rate_limit.sqlite"),
+            max_requests=100,
+            window_seconds=3600,
+        ),
+    }
+    results["rate_limiter"] = {}
+    for name, store in stores.items():
+        samples: List[float] = []
+        for i in range(args.micro_takes):
+            start = time.perf_counter()
+            store.take(f"10.0.{i % 4096 // 256}.{i % 256}", time.time())
+            _timed(samples, start)
+        results["rate_limiter"][name] = {
+            "takes": args.micro_takes,
+            "takes_per_second": len(samples) / sum(samples),
+            "latency_us": {
+                key: value * 1000 for key, value in _percentiles(samples).items()
+            },
+        }
+    return results
+
+
+def _git(*command: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *command], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(value, dict):
+        flat: Dict[str, float] = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print every number present in both results with its relative change."""
+    print(
+        f"\nchange from {baseline.get('commit', '?')[:12]} "
+        f"to {current.get('commit', '?')[:12]}"
+    )
+    old, new = _flatten(baseline["results"]), _flatten(current["results"])
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"  {key:<48} {old[key]:12.3f} -> {new[key]:12.3f} {change:+7.1f}%")
+
+
+def _print_load(result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"load: {result['throughput_rps']:.1f} req/s, "
+        f"p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms "
+        f"p99={latency['p99']:.1f}ms, statuses {result['statuses']}"
+    )
+    for stage, entry in result["stages"].items():
+        print(
+            f"  {stage:<20} n={entry['count']:<6.0f} mean={entry['mean_ms']:8.2f}ms "
+            f"p50~{entry['p50_ms']:8.2f}ms p95~{entry['p95_ms']:8.2f}ms"
+        )
+
+
+def _print_micro(result: Dict[str, Any]) -> None:
+    ingestion, retrieval = result["ingestion"], result["retrieval"]
+    print(
+        f"micro: ingestion {ingestion['chunks']} chunks in "
+        f"{ingestion['seconds']:.2f}s ({ingestion['chunks_per_second']:.0f}/s)"
+    )
+    latency = retrieval["latency_ms"]
+    print(
+        f"  retrieval ({retrieval['engine']}) p50={latency['p50']:.2f}ms "
+        f"p95={latency['p95']:.2f}ms p99={latency['p99']:.2f}ms"
+    )
+    for name, entry in result["rate_limiter"].items():
+        print(
+            f"  rate limiter {name:<7} {entry['takes_per_second']:10.0f} takes/s "
+            f"p99={entry['latency_us']['p99']:.1f}us"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    suites = args.suites or ["load", "micro"]
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = write_config(directory, args)
+        # In-process benchmarks read the same config as the server.
+        os.environ["CONFIG_PATH"] = config_path
+        # Required by the settings, never sent anywhere by the fakes.
+        os.environ.setdefault("GEMINI_API_KEY", "fake")
+        if "load" in suites:
+            results["load"] = await run_load(args, config_path, directory)
+            _print_load(results["load"])
+        if "micro" in suites:
+            results["micro"] = await run_micro(args, directory)
+            _print_micro(results["micro"])
+
+    commit = _git("rev-parse", "HEAD")
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{(commit or 'unknown')[:12]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"results written to {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "suites", nargs="*", metavar="{load,micro}", help="Default: both"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--boot-timeout", type=float, default=120)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    # 0 answers at once; otherwise each word of the reply takes 1/rate seconds
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--embedding-error-rate", type=float, default=0.0)
+    parser.add_argument("--engine", choices=["chroma", "numpy"], default=None)
+    parser.add_argument(
+        "--caches", action="store_true", help="Keep the answer and embedding caches"
+    )
+    parser.add_argument("--micro-repeat", type=int, default=3)
+    parser.add_argument("--micro-queries", type=int, default=500)
+    parser.add_argument("--micro-takes", type=int, default=20000)
+    parser.add_argument("--output", help=f"Results file; default under {RESULTS_DIR}/")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    unknown = set(args.suites) - {"load", "micro"}
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(sorted(unknown))}")
+    asyncio.run(main(args))
@@ -0,0 +1,124 @@
+"""
+Recall and latency of the in-process NumPy vector index against ChromaDB.
+
+A temporary Chroma collection and NumPy indexes (float32 and int8) are built
+over the same synthetic, unit-length clustered embeddings. Queries are
+perturbed copies of stored vectors. Recall@k is the overlap of each engine's
+top-k with Chroma's, and with the exact float32 ranking for the int8 index.
+
+    python -m benchmarks.bench_vector_index --chunks 500 --queries 200
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Callable, List, Sequence
+
+import chromadb
+import numpy as np
+
+from benchmarks.bench_rag_engine import _summary
+from src.services.memory.vector_index import VectorIndex
+
+
+def _recall(
+    found: Sequence[Sequence[str]], expected: Sequence[Sequence[str]]
+) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / max(sum(len(e) for e in expected), 1)
+
+
+def _time(call: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(chunks: int, queries: int, dimensions: int, k: int, batch: int) -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(chunks // 20, 1), dimensions))
+    embeddings = (
+        centers[rng.integers(len(centers), size=chunks)]
+        + 0.5 * rng.normal(size=(chunks, dimensions))
+    ).astype(np.float32)
+    # Unit length like Gemini embeddings, so Chroma's L2 ranking equals cosine
+    # ranking and recall measures only the HNSW approximation.
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    ids = [f"chunk-{i:05d}" for i in range(chunks)]
+    documents = [f"document {i}" for i in range(chunks)]
+    targets = rng.integers(chunks, size=queries)
+    query_vectors = (
+        embeddings[targets] + 0.3 * rng.normal(size=(queries, dimensions))
+    ).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(path=f"{directory}/chroma")
+        collection = client.get_or_create_collection("bench", embedding_function=None)
+        for start in range(0, chunks, 1000):
+            collection.add(
+                ids=ids[start : start + 1000],
+                embeddings=embeddings[start : start + 1000].tolist(),
+                documents=documents[start : start + 1000],
+            )
+        float_index = VectorIndex.build(
+            f"{directory}/index", ids, documents, embeddings, "none"
+        )
+        int8_index = VectorIndex.build(
+            f"{directory}/index", ids, documents, embeddings, "int8"
+        )
+
+        def chroma_top(vectors: np.ndarray) -> List[List[str]]:
+            return collection.query(
+                query_embeddings=vectors.tolist(), n_results=k, include=[]
+            )["ids"]
+
+        def index_top(index: VectorIndex, vectors: np.ndarray) -> List[List[str]]:
+            return [
+                [index.ids[row] for row in rows] for rows, _ in index.search(vectors, k)
+            ]
+
+        chroma = chroma_top(query_vectors)
+        exact = index_top(float_index, query_vectors)
+        quantized = index_top(int8_index, query_vectors)
+        print(f"{chunks} chunks x {dimensions} dims, {queries} queries, k={k}")
+        print(f"recall@{k} float32 vs chroma  {_recall(exact, chroma):.4f}")
+        print(f"recall@{k} int8 vs chroma     {_recall(quantized, chroma):.4f}")
+        print(f"recall@{k} int8 vs float32    {_recall(quantized, exact):.4f}")
+        print(f"matrix bytes float32={float_index.nbytes} int8={int8_index.nbytes}")
+
+        single = query_vectors[:1]
+        _summary("chroma single", _time(lambda: chroma_top(single), queries))
+        _summary(
+            "numpy float32 single",
+            _time(lambda: float_index.search(single, k), queries),
+        )
+        _summary(
+            "numpy int8 single", _time(lambda: int8_index.search(single, k), queries)
+        )
+        batched = query_vectors[:batch]
+        per_query = 1.0 / len(batched)
+        _summary(
+            f"chroma batch/{len(batched)} per query",
+            [t * per_query for t in _time(lambda: chroma_top(batched), 20)],
+        )
+        _summary(
+            f"numpy f32 batch/{len(batched)} per query",
+            [
+                t * per_query
+                for t in _time(lambda: float_index.search(batched, k), 20)
+            ],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+    main(args.chunks, args.queries, args.dimensions, args.k, args.batch)
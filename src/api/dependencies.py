@@ -0,0 +1,22 @@
+from fastapi import HTTPException, Request
+
+from src.services.rag.rag_chat import RAGChat, get_rag_chat
+
+
+def get_chat_engine(request: Request) -> RAGChat:
+    """Return the `RAGChat` engine created during application startup.
+
+    Raises 503 while startup warm-up is still running. Without a lifespan
+    (for example in tests) the shared engine is created on demand.
+    """
+    state = request.app.state
+    engine = getattr(state, "rag_chat", None)
+    if engine is not None:
+        return engine
+    if hasattr(state, "ready"):
+        raise HTTPException(
+            status_code=503,
+            detail="The service is starting up. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    return get_rag_chat()
@@ -0,0 +1,265 @@
+"""
+Admission control as pure ASGI middleware.
+
+At most ``max_in_flight`` requests are processed at once and at most
+``max_queued`` more wait for a slot; anything beyond that is rejected at once
+with 503 and ``Retry-After`` instead of piling up inside the server. Waiting
+requests are admitted by lane priority (interactive before batch), then in
+arrival order. A request that waits past ``queue_timeout_seconds`` is
+rejected, and every admitted request carries a deadline that the chat engine
+checks before calling the model.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.models import ErrorApiResponse
+from src.services.rag.utils import deadline
+from src.utils.logger import get_logger
+from src.utils.metrics import STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted; carries the suggested retry delay."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionStats:
+    """Admission outcomes and queue wait times."""
+
+    admitted: int = 0
+    rejected_full: int = 0
+    rejected_timeout: int = 0
+    dropped_deadline: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.admitted += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        average = self.total_wait_seconds / self.admitted if self.admitted else 0.0
+        return {
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "dropped_deadline": self.dropped_deadline,
+            "avg_wait_ms": round(average * 1000, 2),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
+
+
+class AdmissionController:
+    """Bounded, prioritised queue in front of a fixed number of processing slots."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queued: int = 128,
+        queue_timeout_seconds: float = 10.0,
+        lanes: Optional[Mapping[str, int]] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.lanes = dict(lanes or {"interactive": 0, "batch": 1})
+        self.in_flight = 0
+        self.stats = AdmissionStats()
+        self.queued_by_lane = {lane: 0 for lane in self.lanes}
+        self._queue: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._service_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def retry_after(self) -> float:
+        """Estimate how long until a newly queued request would be served."""
+        backlog = self.in_flight + self.queued
+        return max(1.0, backlog * self._service_seconds / self.max_in_flight)
+
+    async def acquire(self, lane: str, timeout: float) -> float:
+        """Wait up to *timeout* seconds for a slot; return the time spent waiting."""
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            self.stats.record_wait(0.0)
+            return 0.0
+        if self.queued >= self.max_queued:
+            self.stats.rejected_full += 1
+            raise Rejected("queue full", self.retry_after())
+
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        priority = self.lanes.get(lane, max(self.lanes.values()))
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self.queued_by_lane[lane] = self.queued_by_lane.get(lane, 0) + 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as the wait ended.
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            self.queued_by_lane[lane] -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats.rejected_timeout += 1
+                raise Rejected("queue timeout", self.retry_after()) from None
+            raise
+        self.queued_by_lane[lane] -= 1
+        waited = time.monotonic() - start
+        self.stats.record_wait(waited)
+        return waited
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            self._service_seconds += 0.1 * (service_seconds - self._service_seconds)
+        self.in_flight -= 1
+        while self._queue and self.in_flight < self.max_in_flight:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _remove(self, waiter: "asyncio.Future[None]") -> None:
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_by_lane": dict(self.queued_by_lane),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+        }
+
+
+class AdmissionMiddleware:
+    """Admits requests under *paths* through an `AdmissionController`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        paths: Iterable[str] = ("/api/chat",),
+        exempt_paths: Iterable[str] = (),
+        lane_paths: Optional[Mapping[str, str]] = None,
+        request_timeout_seconds: float = 60.0,
+    ):
+        """Initialize the middleware.
+
+        Requests whose path starts with one of *paths* are admitted through
+        *controller*, except *exempt_paths*. The lane is taken from
+        *lane_paths*, else ``interactive``; an ``X-Priority`` header naming a
+        lane of equal or lower priority overrides it. The deadline is
+        *request_timeout_seconds*, or the ``X-Request-Timeout`` header
+        (seconds) when that is shorter.
+        """
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.lane_paths = dict(lane_paths or {})
+        self.request_timeout_seconds = request_timeout_seconds
+
+    def _lane(self, scope: Scope, headers: Dict[bytes, bytes]) -> str:
+        lanes = self.controller.lanes
+        lane = self.lane_paths.get(scope["path"], "interactive")
+        requested = headers.get(b"x-priority", b"").decode("latin-1").lower()
+        if requested in lanes and lanes[requested] >= lanes.get(lane, 0):
+            return requested
+        return lane
+
+    def _timeout(self, headers: Dict[bytes, bytes]) -> float:
+        try:
+            requested = float(headers[b"x-request-timeout"])
+        except (KeyError, ValueError):
+            return self.request_timeout_seconds
+        return min(max(requested, 0.0), self.request_timeout_seconds)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or path in self.exempt_paths
+            or not path.startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        timeout = self._timeout(headers)
+        start = time.monotonic()
+        try:
+            waited = await self.controller.acquire(
+                self._lane(scope, headers),
+                min(self.controller.queue_timeout_seconds, timeout),
+            )
+        except Rejected as e:
+            await self._reject(send, f"Server busy ({e.reason})", e.retry_after)
+            return
+
+        STAGE_SECONDS.observe(waited, "admission_wait")
+        token = deadline.set_deadline(timeout - (time.monotonic() - start))
+        started = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        service_start = time.monotonic()
+        try:
+            await self.app(scope, receive, tracking_send)
+        except deadline.DeadlineExceeded as e:
+            self.controller.stats.dropped_deadline += 1
+            logger.warning(f"Dropped {path}: {e}")
+            if started:
+                raise
+            await self._reject(
+                send, "Request deadline exceeded", self.controller.retry_after()
+            )
+        finally:
+            deadline.reset(token)
+            self.controller.release(time.monotonic() - service_start)
+
+    @staticmethod
+    async def _reject(send: Send, message: str, retry_after: float) -> None:
+        retry = math.ceil(retry_after)
+        body = ErrorApiResponse(
+            status_code=503,
+            message=f"{message}. Please try again later.",
+            error={"retryAfterSeconds": retry},
+        ).model_dump_json(by_alias=True).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
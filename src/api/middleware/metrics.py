@@ -0,0 +1,38 @@
+"""
+Request metrics as pure ASGI middleware.
+
+Counts the HTTP requests in flight and observes each request's total time as
+the ``request`` stage of `STAGE_SECONDS`, next to the per-stage timings
+recorded further in. For a streamed reply the time runs until the last chunk
+has been sent.
+"""
+
+import time
+from typing import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.utils.metrics import STAGE_SECONDS, Gauge
+
+IN_FLIGHT = Gauge("rag_http_requests_in_flight", "HTTP requests being served.")
+
+
+class MetricsMiddleware:
+    """Tracks requests in flight and their duration, except for *exempt_paths*."""
+
+    def __init__(self, app: ASGIApp, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, "request")
+            IN_FLIGHT.dec()
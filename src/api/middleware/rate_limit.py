@@ -1,34 +1,230 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
+"""
+Token-bucket rate limiting as pure ASGI middleware.
 
-from fastapi import HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+Each client owns a bucket of ``max_requests`` tokens refilled continuously at
+``max_requests / window_seconds`` tokens per second, so checking a request is
+O(1) in time and memory. Buckets live in a pluggable store: the in-memory
+store is per process, the SQLite store lets several uvicorn workers share
+limits through one local file.
+"""
 
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Protocol, Tuple
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.api.models import ErrorApiResponse
+from src.utils.metrics import STAGE_SECONDS, Counter
+
+RATE_LIMITED = Counter(
+    "rag_rate_limited_total", "Requests rejected with 429 by the API rate limiter."
+)
+
+
+class RateLimitStore(Protocol):
+    """Atomically takes one token from a client's bucket."""
+
+    async def acquire(self, key: str) -> Tuple[bool, float, float]:
+        """Return ``(allowed, tokens_left, retry_after_seconds)`` for *key*."""
+        ...
+
+
+def _refill(
+    tokens: float, updated: float, now: float, capacity: float, rate: float
+) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def _take(tokens: float, rate: float) -> Tuple[bool, float, float]:
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryRateLimitStore:
+    """Per-process buckets in an LRU map with idle-client eviction.
+
+    A bucket idle for longer than a full refill is indistinguishable from a new
+    one, so it is dropped; ``max_clients`` additionally bounds memory.
+    """
+
+    def __init__(
+        self, max_requests: int, window_seconds: float, max_clients: int = 100_000
+    ):
+        self.capacity = float(max_requests)
+        self.rate = max_requests / window_seconds
+        self.idle_seconds = window_seconds
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if (
+                now - updated <= self.idle_seconds
+                and len(self._buckets) <= self.max_clients
+            ):
+                break
+            del self._buckets[key]
+
+    def take(self, key: str, now: float) -> Tuple[bool, float, float]:
+        bucket = self._buckets.pop(key, None)
+        tokens = (
+            self.capacity
+            if bucket is None
+            else _refill(bucket[0], bucket[1], now, self.capacity, self.rate)
+        )
+        allowed, tokens, retry_after = _take(tokens, self.rate)
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        return allowed, tokens, retry_after
+
+    async def acquire(self, key: str) -> Tuple[bool, float, float]:
+        return self.take(key, time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteRateLimitStore:
+    """Buckets in a SQLite file (WAL mode) shared by all workers on a host."""
+
+    def __init__(
+        self,
+        path: str,
+        max_requests: int,
+        window_seconds: float,
+        eviction_interval: float = 60.0,
+    ):
+        self.capacity = float(max_requests)
+        self.rate = max_requests / window_seconds
+        self.idle_seconds = window_seconds
+        self.eviction_interval = eviction_interval
+        self._last_eviction = 0.0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=5, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take(self, key: str, now: float) -> Tuple[bool, float, float]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = (
+                    self.capacity
+                    if row is None
+                    else _refill(row[0], row[1], now, self.capacity, self.rate)
+                )
+                allowed, tokens, retry_after = _take(tokens, self.rate)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                if now - self._last_eviction > self.eviction_interval:
+                    self._conn.execute(
+                        "DELETE FROM buckets WHERE updated < ?",
+                        (now - self.idle_seconds,),
+                    )
+                    self._last_eviction = now
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return allowed, tokens, retry_after
+
+    async def acquire(self, key: str) -> Tuple[bool, float, float]:
+        # Wall-clock time, since monotonic clocks are not comparable across processes.
+        return await asyncio.to_thread(self.take, key, time.time())
+
+
+class RateLimitMiddleware:
     """Middleware for rate limiting requests per client IP."""
 
-    def __init__(self, app, max_requests: int = 100, window_seconds: int = 3600):
-        """Initialize the middleware with rate limit settings."""
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_requests: int = 100,
+        window_seconds: int = 3600,
+        store: Optional[RateLimitStore] = None,
+        exempt_paths: Iterable[str] = (),
+    ):
+        """Initialize the middleware with rate limit settings.
+
+        Requests to *exempt_paths*, such as health and readiness probes, are
+        never limited.
+        """
+        self.app = app
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: defaultdict[str, list[datetime]] = defaultdict(list)
-
-    async def dispatch(self, request, call_next):
-        """Apply rate limiting to all requests based on client IP."""
-        client_ip = request.client.host
-        now = datetime.now()
-        window_start = now - timedelta(seconds=self.window_seconds)
-        self.requests[client_ip] = [
-            ts for ts in self.requests[client_ip] if ts > window_start
-        ]
-        if len(self.requests[client_ip]) >= self.max_requests:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later.",
-            )
-
-        self.requests[client_ip].append(now)
-
-        return await call_next(request)
+        self.store = store or MemoryRateLimitStore(max_requests, window_seconds)
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Apply rate limiting to HTTP requests based on client IP."""
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        with STAGE_SECONDS.time("rate_limit"):
+            allowed, tokens_left, retry_after = await self.store.acquire(client_ip)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc()
+
+        body = ErrorApiResponse(
+            status_code=429,
+            message="Too many requests. Please try again later.",
+            error={"retryAfterSeconds": math.ceil(retry_after)},
+        ).model_dump_json(by_alias=True).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(retry_after)).encode()),
+                    (b"x-ratelimit-limit", str(self.max_requests).encode()),
+                    (b"x-ratelimit-remaining", str(int(tokens_left)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_rate_limit_store(
+    backend: str,
+    max_requests: int,
+    window_seconds: int,
+    sqlite_path: str = "cache/rate_limit.sqlite",
+    max_clients: int = 100_000,
+) -> RateLimitStore:
+    """Return the bucket store for *backend* (``memory`` or ``sqlite``)."""
+    if backend == "sqlite":
+        return SQLiteRateLimitStore(sqlite_path, max_requests, window_seconds)
+    if backend != "memory":
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    return MemoryRateLimitStore(max_requests, window_seconds, max_clients)
@@ -0,0 +1,77 @@
+"""
+Per-request log context as pure ASGI middleware.
+
+Each request gets an id, taken from the ``X-Request-ID`` header when the
+client sends one and echoed back in the response. Records logged while it is
+served carry the id. With ``access_log`` on, one line is logged when the
+request finishes, with its status, duration and the time spent in each stage.
+"""
+
+import time
+import uuid
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.logger import (
+    bind_request,
+    current_request,
+    get_logger,
+    reset_request,
+)
+
+logger = get_logger(__name__)
+
+
+class RequestContextMiddleware:
+    """Binds a request id to every request except *exempt_paths*."""
+
+    def __init__(
+        self, app: ASGIApp, exempt_paths: Iterable[str] = (), access_log: bool = True
+    ):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64]
+        request_id = request_id or uuid.uuid4().hex
+        token = bind_request(request_id)
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if self.access_log:
+                self._log(scope, status, time.perf_counter() - start)
+            reset_request(token)
+
+    @staticmethod
+    def _log(scope: Scope, status: int, seconds: float) -> None:
+        request = current_request()
+        stages = dict(request.stages) if request is not None else {}
+        stages.pop("request", None)
+        timings = " ".join(
+            f"{stage}={value * 1000:.1f}ms" for stage, value in stages.items()
+        )
+        logger.info(
+            f"{scope['method']} {scope['path']} {status} "
+            f"in {seconds * 1000:.1f}ms" + (f" ({timings})" if timings else ""),
+            extra={"stages": stages, "status": status},
+        )
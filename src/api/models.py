@@ -1,5 +1,5 @@
 # mypy: disable-error-code="call-overload"
-from typing import Any, Generic, Optional, TypeVar
+from typing import Any, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
@@ -64,6 +64,11 @@ class ChatRequest(BaseCamel):
     """
 
     user_input: str = Field(..., description="User input for the chat")
+    session_id: Optional[str] = Field(
+        None,
+        max_length=128,
+        description="Conversation to continue; a new one is started when omitted",
+    )
 
 
 class ChatResponse(BaseCamel):
@@ -72,6 +77,38 @@ class ChatResponse(BaseCamel):
     """
 
     response: str = Field(..., description="Response from the chat")
+    session_id: Optional[str] = Field(
+        None, description="Conversation id to send with follow-up questions"
+    )
+
+
+class BatchChatRequest(BaseCamel):
+    """
+    Request model for batch chat API.
+    """
+
+    user_inputs: List[str] = Field(
+        ..., min_length=1, description="Independent questions to answer"
+    )
+
+
+class BatchChatItem(BaseCamel):
+    """
+    Result for a single question of a batch chat request.
+    """
+
+    index: int = Field(..., description="Position of the question in the request")
+    success: bool = Field(..., description="Whether this question was answered")
+    response: Optional[str] = Field(None, description="Response from the chat")
+    error: Optional[str] = Field(None, description="Failure reason for this question")
+
+
+class BatchChatResponse(BaseCamel):
+    """
+    Response model for batch chat API.
+    """
+
+    results: List[BatchChatItem] = Field(..., description="Results in input order")
 
 
 StandardApiResponse[Any].model_rebuild()
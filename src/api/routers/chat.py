@@ -1,21 +1,222 @@
-from fastapi import APIRouter
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict
 
-from src.api.models import ChatRequest, ChatResponse, StandardApiResponse
-from src.services.rag.rag_chat import process_user_input
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from src.api.dependencies import get_chat_engine
+from src.api.models import (
+    BatchChatItem,
+    BatchChatRequest,
+    BatchChatResponse,
+    ChatRequest,
+    ChatResponse,
+    ErrorApiResponse,
+    StandardApiResponse,
+)
+from src.database.chroma_db import get_chroma_manager
+from src.services.rag.rag_chat import RAGChat
+from src.services.rag.utils.embedding_cache import get_embedding_cache
+from src.services.rag.utils.gemini_client import pool_stats
+from src.services.rag.utils.governor import governor_stats
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import STAGE_SECONDS
 
 router = APIRouter()
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+def _sse(event: str, data: str) -> str:
+    """Format a single Server-Sent Event frame."""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+
+def _json_response(payload: StandardApiResponse[Any]) -> Response:
+    """Serialize *payload* once, timed as the ``serialization`` stage."""
+    with STAGE_SECONDS.time("serialization"):
+        body = payload.model_dump_json(by_alias=True)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/chat", response_model=StandardApiResponse[ChatResponse])
-async def chat(request: ChatRequest) -> StandardApiResponse[ChatResponse]:
+async def chat(
+    request: ChatRequest, engine: RAGChat = Depends(get_chat_engine)
+) -> Response:
     """
     Process the user input and return the response.
+
+    Send the returned ``sessionId`` with follow-up questions to continue the
+    same conversation.
     """
     user_input = request.user_input
-    response_text = await process_user_input(user_input)
+    session_id = request.session_id or uuid.uuid4().hex
+    response_text = await engine.process_user_input(user_input, thread_id=session_id)
+    return _json_response(
+        StandardApiResponse(
+            success=True,
+            status_code=200,
+            message="Chat processed successfully",
+            response=ChatResponse(response=response_text, session_id=session_id),
+        )
+    )
+
+
+@router.post("/chat/batch", response_model=StandardApiResponse[BatchChatResponse])
+async def chat_batch(
+    request: BatchChatRequest, engine: RAGChat = Depends(get_chat_engine)
+) -> Response:
+    """
+    Answer many independent questions in one request.
+
+    All questions are embedded in one call and retrieved with one vector query;
+    generation runs with bounded concurrency. A failure is reported per item.
+    """
+    if len(request.user_inputs) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_SIZE} questions.",
+        )
+    answers = await engine.process_batch(request.user_inputs)
+    results = [
+        BatchChatItem(
+            index=i,
+            success=answer.error is None,
+            response=answer.response,
+            error=answer.error,
+        )
+        for i, answer in enumerate(answers)
+    ]
+    failed = sum(1 for item in results if not item.success)
+    return _json_response(
+        StandardApiResponse(
+            success=failed == 0,
+            status_code=200,
+            message=(
+                "Batch processed successfully"
+                if failed == 0
+                else f"Batch processed with {failed} failed item(s)"
+            ),
+            response=BatchChatResponse(results=results),
+        )
+    )
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest, engine: RAGChat = Depends(get_chat_engine)
+) -> StreamingResponse:
+    """
+    Stream the response as Server-Sent Events.
+
+    Each ``token`` event carries a JSON object with the next piece of text. The
+    final ``done`` event carries the standard response envelope with the full
+    answer, or an ``error`` event carries the standard error envelope.
+    """
+
+    session_id = request.session_id or uuid.uuid4().hex
+
+    async def events() -> AsyncIterator[str]:
+        start = time.perf_counter()
+        first_token_at = None
+        parts = []
+        # Time spent formatting events, observed once per stream.
+        serialization = 0.0
+        try:
+            async for token in engine.stream_user_input(
+                request.user_input, thread_id=session_id
+            ):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    logger.info(
+                        f"Chat stream time to first token: "
+                        f"{(first_token_at - start) * 1000:.1f}ms"
+                    )
+                parts.append(token)
+                encode_start = time.perf_counter()
+                frame = _sse("token", json.dumps({"token": token}, ensure_ascii=False))
+                serialization += time.perf_counter() - encode_start
+                yield frame
+        except Exception as e:
+            logger.exception("Chat stream failed")
+            error = ErrorApiResponse(
+                status_code=500, message="Chat stream failed", error=str(e)
+            )
+            yield _sse("error", error.model_dump_json(by_alias=True))
+            return
+
+        final: StandardApiResponse[ChatResponse] = StandardApiResponse(
+            success=True,
+            status_code=200,
+            message="Chat processed successfully",
+            response=ChatResponse(response="".join(parts), session_id=session_id),
+        )
+        encode_start = time.perf_counter()
+        frame = _sse("done", final.model_dump_json(by_alias=True))
+        serialization += time.perf_counter() - encode_start
+        STAGE_SECONDS.observe(serialization, "serialization")
+        yield frame
+        logger.info(
+            f"Chat stream completed in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/chat/stats", response_model=StandardApiResponse[Dict[str, Any]])
+async def chat_stats(
+    request: Request,
+    engine: RAGChat = Depends(get_chat_engine),
+) -> StandardApiResponse[Dict[str, Any]]:
+    """
+    Return cache counters, prompt tokens per turn, the active session count,
+    the admission queue depth and wait times, and Gemini connection reuse.
+    """
+    stats: Dict[str, Any] = {
+        "prompt_tokens": engine.prompt_stats.as_dict(),
+        "context_compression": engine.compression_stats.as_dict(),
+    }
+    admission = getattr(request.app.state, "admission", None)
+    if admission is not None:
+        stats["admission"] = admission.as_dict()
+    governors = governor_stats()
+    if governors:
+        stats["governor"] = governors
+    connection_pool = pool_stats()
+    if connection_pool is not None:
+        stats["gemini_client"] = connection_pool
+    if engine.single_flight is not None:
+        stats["single_flight"] = engine.single_flight.stats.as_dict()
+    if engine.sessions is not None:
+        stats["sessions"] = {
+            "active": len(engine.sessions),
+            "evicted": engine.sessions.evicted,
+        }
+    if engine.answer_cache is not None:
+        stats["answer_cache"] = {
+            **engine.answer_cache.stats.as_dict(),
+            "entries": len(engine.answer_cache),
+        }
+    batcher = get_chroma_manager().query_batcher
+    if batcher is not None:
+        stats["embedding_batcher"] = batcher.stats.as_dict()
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is not None:
+        stats["embedding_cache"] = {
+            **embedding_cache.stats.as_dict(),
+            "entries": len(embedding_cache),
+        }
     return StandardApiResponse(
         success=True,
         status_code=200,
-        message="Chat processed successfully",
-        response=ChatResponse(response=response_text),
+        message="Chat statistics retrieved successfully",
+        response=stats,
     )
@@ -1,21 +1,72 @@
+from __future__ import annotations
+
 import asyncio
-from typing import List
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-import chromadb
-from chromadb.types import Collection
+import numpy as np
 
-from src.services.rag.utils.llm import GeminiEmbeddingFunction
+from src.database.manifest import chunk_id
+from src.services.rag.utils.embedding_batcher import EmbeddingBatcher
+from src.services.rag.utils.governor import get_governor
 from src.utils.config import get_settings
 
+if TYPE_CHECKING:
+    from chromadb.api.types import Embeddings
+    from chromadb.types import Collection
+
 settings = get_settings()
 
+ChangeListener = Callable[[Optional[Iterable[str]]], None]
+_change_listeners: List[ChangeListener] = []
+
+
+def add_change_listener(listener: ChangeListener) -> None:
+    """
+    Registers a callback invoked whenever collection contents change.
+    Args:
+        listener: Called with the ids of removed or replaced chunks, or with
+            ``None`` when chunks were added.
+    """
+    _change_listeners.append(listener)
+
+
+def _notify_change(chunk_ids: Optional[Iterable[str]] = None) -> None:
+    for listener in _change_listeners:
+        listener(chunk_ids)
+
 
 class ChromaDBManager:
     """Manages ChromaDB interactions."""
 
     def __init__(self, path: str = "/app/chroma_data"):
         """Initializes the ChromaDB client."""
+        import chromadb
+
+        from src.database.embedding_function import GeminiEmbeddingFunction
+
+        self.path = path
         self.client = chromadb.PersistentClient(path=path)
+        self.embedding_function = GeminiEmbeddingFunction()
+        self.query_batcher: Optional[EmbeddingBatcher] = None
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self.query_batcher = EmbeddingBatcher(
+                lambda texts: self._embed_upstream(
+                    self.embedding_function.aembed_uncached_queries, texts
+                ),
+                window_ms=settings.EMBEDDING_BATCHING_WINDOW_MS,
+                max_batch_size=settings.EMBEDDING_BATCHING_MAX_BATCH_SIZE,
+            )
 
     def get_or_create_collection(self, name: str) -> Collection:
         """
@@ -25,39 +76,225 @@ class ChromaDBManager:
         Returns:
             The ChromaDB collection.
         """
-        embedding_function = GeminiEmbeddingFunction()
         return self.client.get_or_create_collection(
-            name=name, embedding_function=embedding_function
+            name=name, embedding_function=self.embedding_function
         )
 
-    def add_documents(self, collection: Collection, documents: List[str]):
+    def get_ids(self, collection: Collection) -> List[str]:
+        """
+        Returns the ids of every chunk stored in a ChromaDB collection.
+        Args:
+            collection: The ChromaDB collection.
+        Returns:
+            The stored chunk ids.
+        """
+        return collection.get(include=[])["ids"]
+
+    def add_documents(
+        self,
+        collection: Collection,
+        documents: List[str],
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ):
         """
-        Adds documents to a ChromaDB collection.
+        Adds or replaces documents in a ChromaDB collection.
         Args:
             collection: The ChromaDB collection.
             documents: The documents to add.
+            ids: The document ids; when omitted, content-addressed ids in the
+                embedding function's provider space are used.
+            embeddings: Precomputed embeddings; when given, they are written in
+                bulk without calling the embedding function.
         """
-        batch_size = 100
+        if ids is None:
+            identity = self.embedding_function.provider.identity
+            ids = [chunk_id(doc, identity) for doc in documents]
+        batch_size = self.client.get_max_batch_size() if embeddings else 100
         for i in range(0, len(documents), batch_size):
-            batch_documents = documents[i : i + batch_size]
-            collection.add(
-                documents=batch_documents,
-                ids=[str(j) for j in range(i, i + len(batch_documents))],
+            collection.upsert(
+                documents=documents[i : i + batch_size],
+                ids=ids[i : i + batch_size],
+                embeddings=embeddings[i : i + batch_size] if embeddings else None,
             )
+        if documents:
+            _notify_change()
+
+    def delete_documents(self, collection: Collection, ids: List[str]):
+        """
+        Deletes documents from a ChromaDB collection.
+        Args:
+            collection: The ChromaDB collection.
+            ids: The ids of the documents to delete.
+        """
+        batch_size = 100
+        for i in range(0, len(ids), batch_size):
+            collection.delete(ids=ids[i : i + batch_size])
+        if ids:
+            _notify_change(ids)
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds query texts with the collection's query embedding task.
+
+        Cache misses are sent upstream in micro-batches shared with concurrent
+        callers when ``embedding.batching`` is enabled, else in one call.
+        Args:
+            texts: The query texts.
+        Returns:
+            One embedding per query text, in input order.
+        """
+        if self.query_batcher is None:
+            embeddings = await self._embed_upstream(
+                self.embedding_function.aembed_query, texts
+            )
+            return [list(embedding) for embedding in embeddings]
+
+        # Cache hits are answered at once; only misses wait for a batch.
+        vectors = await asyncio.to_thread(self.embedding_function.cached_queries, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = await self.query_batcher.embed_many([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        embeddings: List[List[float]] = []
+        for text, vector in zip(texts, vectors):
+            # Dropping a missing vector would shift later results onto the
+            # wrong query.
+            if vector is None:
+                raise RuntimeError(f"No embedding was returned for query {text!r}")
+            embeddings.append(list(vector))
+        return embeddings
+
+    async def _embed_upstream(
+        self, embed: Callable[[List[str]], Awaitable[Embeddings]], texts: List[str]
+    ) -> Embeddings:
+        governor = get_governor("embedding")
+        if governor is None:
+            return await embed(texts)
+        return await governor.call(lambda _: embed(texts))
+
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Embeds a query text with the collection's query embedding task.
+        Args:
+            text: The query text.
+        Returns:
+            The query embedding.
+        """
+        return (await self.embed_queries([text]))[0]
+
+    async def query_by_embeddings(
+        self,
+        collection: Collection,
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 2,
+    ) -> List[Tuple[List[str], List[str]]]:
+        """
+        Queries a ChromaDB collection with several precomputed embeddings at once.
+        Args:
+            collection: The ChromaDB collection.
+            embeddings: The query embeddings.
+            n_results: The number of results to return per query.
+        Returns:
+            The ids and documents of the matching chunks, one pair per query.
+        """
+        results = await asyncio.to_thread(
+            collection.query,
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=n_results,
+            include=["documents"],
+        )
+        if not results["documents"]:
+            return [([], []) for _ in embeddings]
+        return list(zip(results["ids"], results["documents"]))
+
+    async def query_candidates(
+        self,
+        collection: Collection,
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+    ) -> List[Tuple[List[str], List[str], np.ndarray]]:
+        """
+        Queries a ChromaDB collection and returns the stored chunk embeddings too.
+        Args:
+            collection: The ChromaDB collection.
+            embeddings: The query embeddings.
+            n_results: The number of candidates to return per query.
+        Returns:
+            The ids, documents and embedding matrix of the candidates, one
+            triple per query.
+        """
+        results = await asyncio.to_thread(
+            collection.query,
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=n_results,
+            include=["documents", "embeddings"],
+        )
+        if not results["documents"]:
+            return [([], [], np.empty((0, 0), dtype=np.float32)) for _ in embeddings]
+        return [
+            (ids, documents, np.asarray(vectors, dtype=np.float32))
+            for ids, documents, vectors in zip(
+                results["ids"], results["documents"], results["embeddings"]
+            )
+        ]
+
+    async def get_embeddings(
+        self, collection: Collection, ids: Sequence[str]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Fetches the stored embeddings of chunks by id.
+        Args:
+            collection: The ChromaDB collection.
+            ids: The chunk ids.
+        Returns:
+            The embedding of every id that exists in the collection.
+        """
+        if not ids:
+            return {}
+        records = await asyncio.to_thread(
+            collection.get, ids=list(ids), include=["embeddings"]
+        )
+        return {
+            doc_id: np.asarray(vector, dtype=np.float32)
+            for doc_id, vector in zip(records["ids"], records["embeddings"])
+        }
 
     async def query(
         self, collection: Collection, query_texts: List[str], n_results: int = 2
     ) -> List[str]:
         """
         Queries a ChromaDB collection asynchronously.
+
+        The texts are embedded with the query task type (through the query
+        cache) rather than by the collection, which embeds as documents.
         Args:
             collection: The ChromaDB collection.
             query_texts: The query texts.
             n_results: The number of results to return.
         Returns:
-            The query results.
+            The documents matching the first query text.
         """
-        results = await asyncio.to_thread(
-            collection.query, query_texts=query_texts, n_results=n_results
+        embeddings = await self.embed_queries(query_texts)
+        results = await self.query_by_embeddings(
+            collection, embeddings, n_results=n_results
         )
-        return results["documents"][0] if results["documents"] else []
+        return results[0][1] if results else []
+
+
+_manager: Optional[ChromaDBManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_chroma_manager() -> ChromaDBManager:
+    """
+    Returns the process-wide ChromaDB manager, creating its client on first use.
+    Returns:
+        The shared manager; one `PersistentClient` per process.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ChromaDBManager(path=settings.CHROMA_PATH)
+        return _manager
@@ -0,0 +1,113 @@
+"""
+ChromaDB embedding function backed by the Gemini embedding API.
+
+Kept apart from `src.services.rag.utils.llm` so that importing the LLM helpers
+does not import ChromaDB; this module is only loaded when a
+`ChromaDBManager` is created.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, List, Optional
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from src.services.rag.utils.embedding_cache import (
+    EmbeddingCache,
+    get_embedding_cache,
+    make_key,
+)
+from src.services.rag.utils.embedding_provider import (
+    EmbeddingProvider,
+    get_embedding_provider,
+)
+from src.services.rag.utils.gemini_client import get_gemini_client
+from src.services.rag.utils.llm import (
+    DOCUMENT_TASK_TYPE,
+    EMBEDDING_MODEL,
+    QUERY_TASK_TYPE,
+)
+
+if TYPE_CHECKING:
+    from google import genai
+
+# mypy: disable-error-code="return-value,index"
+
+
+class GeminiEmbeddingFunction(EmbeddingFunction):
+    """Gemini embeddings with separate document and query task types.
+
+    Query embeddings are served from the two-tier embedding cache when enabled.
+    ChromaDB calls the embedding function synchronously; the query path uses
+    the async methods, which go through the configured embedding provider, so
+    ``embedding.provider: "fake"`` also covers queries.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[EmbeddingCache] = None,
+        client: Optional[genai.Client] = None,
+        provider: Optional[EmbeddingProvider] = None,
+    ):
+        self._client = client
+        self.cache = cache if cache is not None else get_embedding_cache()
+        self.provider = (
+            provider
+            if provider is not None
+            else get_embedding_provider(EMBEDDING_MODEL)
+        )
+
+    @property
+    def client(self) -> genai.Client:
+        if self._client is None:
+            self._client = get_gemini_client()
+        return self._client
+
+    def _embed(self, input: Documents, task_type: str) -> Embeddings:
+        from google.genai import types
+
+        response = self.client.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=list(input),
+            config=types.EmbedContentConfig(task_type=task_type),
+        )
+        return [embedding.values for embedding in response.embeddings]
+
+    async def _aembed(self, input: Documents, task_type: str) -> Embeddings:
+        return await self.provider.embed(list(input), task_type)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._embed(input, DOCUMENT_TASK_TYPE)
+
+    def cached_queries(self, input: Documents) -> List[Optional[List[float]]]:
+        """Return the cached query embedding of each text, ``None`` for misses."""
+        if self.cache is None:
+            return [None] * len(input)
+        return [
+            self.cache.get(make_key(text, self.provider.identity, QUERY_TASK_TYPE))
+            for text in input
+        ]
+
+    def _store_queries(self, input: Documents, vectors: Embeddings) -> None:
+        if self.cache is not None:
+            for text, vector in zip(input, vectors):
+                self.cache.put(
+                    make_key(text, self.provider.identity, QUERY_TASK_TYPE), vector
+                )
+
+    async def aembed_uncached_queries(self, input: Documents) -> Embeddings:
+        """Embed query texts upstream and store the results in the cache."""
+        vectors = await self._aembed(input, QUERY_TASK_TYPE)
+        if self.cache is not None:
+            await asyncio.to_thread(self._store_queries, input, vectors)
+        return vectors
+
+    async def aembed_query(self, input: Documents) -> Embeddings:
+        vectors = await asyncio.to_thread(self.cached_queries, input)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = await self.aembed_uncached_queries([input[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = list(vector)
+        return vectors
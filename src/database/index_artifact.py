@@ -0,0 +1,91 @@
+"""
+Portable, prebuilt index artifact.
+
+A single compressed ``.npz`` file holding the chunk ids, texts and embeddings
+together with the source file hash and the chunker/embedding parameters they
+were built with. A fresh container whose vector database is empty bulk-loads
+the artifact instead of re-chunking and re-embedding the corpus over the
+network. Built with ``python -m src.utils.build_index``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_VERSION = 1
+
+
+@dataclass
+class IndexArtifact:
+    """Chunks and embeddings of a built index with the metadata they depend on."""
+
+    collection: str
+    source_sha256: str
+    params: Dict[str, Any]
+    ids: List[str]
+    documents: List[str]
+    embeddings: np.ndarray
+    version: int = ARTIFACT_VERSION
+    created: float = field(default_factory=time.time)
+
+    def matches(self, source_sha256: str, params: Dict[str, Any]) -> bool:
+        """Return whether this artifact was built from the same source and parameters."""
+        return (
+            self.version == ARTIFACT_VERSION
+            and self.source_sha256 == source_sha256
+            and self.params == params
+        )
+
+    def save(self, path: str) -> None:
+        """Atomically write the artifact to *path* as a compressed ``.npz`` file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        metadata = {
+            "version": self.version,
+            "collection": self.collection,
+            "source_sha256": self.source_sha256,
+            "params": self.params,
+            "created": self.created,
+        }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            metadata=np.array(json.dumps(metadata, ensure_ascii=False)),
+            ids=np.array(self.ids, dtype=str),
+            documents=np.array(self.documents, dtype=str),
+            embeddings=np.asarray(self.embeddings, dtype=np.float32),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IndexArtifact"]:
+        """Return the artifact stored at *path*, or ``None`` if absent or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                metadata = json.loads(str(data["metadata"]))
+                return cls(
+                    collection=metadata["collection"],
+                    source_sha256=metadata["source_sha256"],
+                    params=metadata["params"],
+                    ids=data["ids"].tolist(),
+                    documents=data["documents"].tolist(),
+                    embeddings=data["embeddings"],
+                    version=metadata["version"],
+                    created=metadata["created"],
+                )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable index artifact {path}: {e}")
+            return None
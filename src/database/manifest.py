@@ -0,0 +1,85 @@
+"""
+Manifest of what is indexed in a ChromaDB collection.
+
+Chunks are identified by a hash of their content and the identity of the
+embedding provider, so an unchanged chunk keeps its id across re-chunking
+and only new or edited chunks need embedding, while switching providers
+re-embeds everything. The manifest records those ids together with the
+source file hash and the chunker/embedding parameters, which lets startup
+skip ingestion entirely when nothing changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = "index_manifest.json"
+
+
+def chunk_id(text: str, embedding_identity: str) -> str:
+    """Return the content-addressed id of chunk *text* in the given embedding space.
+
+    *embedding_identity* is the ``identity`` of the provider that embeds it;
+    for Gemini that is the model name.
+    """
+    digest = hashlib.sha256(f"{embedding_identity}\x1f{text}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 of the file at *path*."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class IndexManifest:
+    """What was indexed into a collection, and with which parameters."""
+
+    collection: str
+    source_sha256: str
+    params: Dict[str, Any]
+    chunk_ids: List[str] = field(default_factory=list)
+    version: int = MANIFEST_VERSION
+
+    def matches(self, source_sha256: str, params: Dict[str, Any]) -> bool:
+        """Return whether this manifest was built from the same source and parameters."""
+        return (
+            self.version == MANIFEST_VERSION
+            and self.source_sha256 == source_sha256
+            and self.params == params
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IndexManifest"]:
+        """Return the manifest stored at *path*, or ``None`` if absent or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return cls(**json.load(file))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable index manifest {path}: {e}")
+            return None
+
+    def save(self, path: str) -> None:
+        """Atomically write the manifest to *path*."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(asdict(self), file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
@@ -1,19 +1,31 @@
+import asyncio
 import os
+import time
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import Dict
 from urllib.parse import urlparse
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from src.api.middleware.rate_limit import RateLimitMiddleware
-from src.api.models import StandardApiResponse
+from src.api.middleware.admission import AdmissionController, AdmissionMiddleware
+from src.api.middleware.metrics import MetricsMiddleware
+from src.api.middleware.rate_limit import (
+    RateLimitMiddleware,
+    create_rate_limit_store,
+)
+from src.api.middleware.request_context import RequestContextMiddleware
+from src.api.models import ErrorApiResponse, StandardApiResponse
 from src.api.routers import chat as chat_router
 from src.services.rag.preprocessing.preprocess import (
     PROCESSED_FILE_PATH,
     process_and_save,
 )
+from src.services.memory import memory_manager
+from src.services.rag.rag_chat import get_rag_chat
+from src.utils import metrics
 from src.utils.config import get_settings
 from src.utils.helper import initialize_vector_db
 from src.utils.logger import get_logger
@@ -22,23 +34,63 @@ config = get_settings()
 logger = get_logger(__name__)
 
 
+async def warm_up(app: FastAPI) -> None:
+    """Prepare the corpus, indexes and model clients, then mark the app ready."""
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(PROCESSED_FILE_PATH):
+            logger.info(
+                f"Processed file not found at {PROCESSED_FILE_PATH}. "
+                "Starting processing..."
+            )
+            await process_and_save()
+        else:
+            logger.info(f"Processed file found at {PROCESSED_FILE_PATH}.")
+
+        await initialize_vector_db()
+        await memory_manager.warm_up()
+        app.state.rag_chat = await asyncio.to_thread(get_rag_chat)
+    except Exception as e:
+        app.state.startup_error = str(e)
+        logger.exception("Application warm-up failed")
+        return
+    app.state.ready = True
+    logger.info(
+        f"Shared RAG chat engine ready in {time.perf_counter() - start:.2f}s."
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Handles application startup and shutdown events."""
-    logger.info("Application startup sequence initiated...")
+    """Handles application startup and shutdown events.
 
-    if not os.path.exists(PROCESSED_FILE_PATH):
-        logger.info(
-            f"Processed file not found at {PROCESSED_FILE_PATH}. Starting processing..."
+    Warm-up runs in the background so the server accepts connections at once:
+    ``/health`` answers immediately, while ``/ready`` and the chat endpoints
+    return 503 until the indexes and model clients are loaded.
+    """
+    logger.info("Application startup sequence initiated...")
+    app.state.ready = False
+    app.state.rag_chat = None
+    app.state.startup_error = None
+    warm_up_task = asyncio.create_task(warm_up(app))
+    metrics_task = None
+    if config.METRICS_ENABLED and config.WORKERS > 1:
+        exporter = metrics.start_multiprocess(
+            config.METRICS_MULTIPROCESS_DIR, config.METRICS_FLUSH_INTERVAL_SECONDS
         )
-        await process_and_save()
-    else:
-        logger.info(f"Processed file found at {PROCESSED_FILE_PATH}.")
-
-    await initialize_vector_db()
+        metrics_task = asyncio.create_task(exporter.run())
 
     yield
     logger.info("Application shutdown sequence initiated...")
+    for task in (warm_up_task, metrics_task):
+        if task is not None and not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    if app.state.rag_chat is not None:
+        close = getattr(app.state.rag_chat.checkpointer, "close", None)
+        if close is not None:
+            close()
 
 
 app = FastAPI(
@@ -49,6 +101,22 @@ app = FastAPI(
 )
 
 
+if config.ADMISSION_ENABLED:
+    app.state.admission = AdmissionController(
+        max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+        max_queued=config.ADMISSION_MAX_QUEUED,
+        queue_timeout_seconds=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        lanes=config.ADMISSION_LANES,
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=app.state.admission,
+        paths=("/api/chat",),
+        exempt_paths=("/api/chat/stats",),
+        lane_paths={"/api/chat/batch": "batch"},
+        request_timeout_seconds=config.ADMISSION_REQUEST_TIMEOUT_SECONDS,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -61,6 +129,25 @@ app.add_middleware(
     RateLimitMiddleware,
     max_requests=config.RATE_LIMIT_MAX_REQUESTS,
     window_seconds=config.RATE_LIMIT_WINDOW_SECONDS,
+    store=create_rate_limit_store(
+        config.RATE_LIMIT_BACKEND,
+        config.RATE_LIMIT_MAX_REQUESTS,
+        config.RATE_LIMIT_WINDOW_SECONDS,
+        sqlite_path=config.RATE_LIMIT_SQLITE_PATH,
+        max_clients=config.RATE_LIMIT_MAX_CLIENTS,
+    ),
+    exempt_paths=("/", "/health", "/ready", "/metrics"),
+)
+
+if config.METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware, exempt_paths=("/", "/health", "/ready", "/metrics")
+    )
+
+app.add_middleware(
+    RequestContextMiddleware,
+    exempt_paths=("/", "/health", "/ready", "/metrics"),
+    access_log=config.LOG_ACCESS,
 )
 
 logger.info("Registering API routers")
@@ -91,6 +178,42 @@ async def health_alias() -> StandardApiResponse[Dict[str, str]]:
     return await health_check()
 
 
+@app.get(
+    "/ready", tags=["Health Check"], response_model=StandardApiResponse[Dict[str, str]]
+)
+async def readiness_check():
+    """Reports whether the indexes and model clients are loaded and chat is served."""
+    if app.state.ready:
+        return StandardApiResponse(
+            success=True,
+            status_code=200,
+            message="RAG Assistant API is ready",
+            response={"status": "ready"},
+        )
+    failed = app.state.startup_error is not None
+    body = ErrorApiResponse(
+        status_code=503,
+        message="RAG Assistant API failed to start" if failed else "Warming up",
+        error={"status": "failed" if failed else "starting"},
+    )
+    return JSONResponse(
+        status_code=503,
+        content=body.model_dump(by_alias=True),
+        headers={} if failed else {"Retry-After": "5"},
+    )
+
+
+@app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Exposes latency histograms, counters and gauges in the Prometheus format."""
+    if not config.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(
+        await asyncio.to_thread(metrics.render),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,74 @@
+"""
+Token-budgeted context selection with maximal marginal relevance.
+
+Neighbouring chunks overlap, so the nearest neighbours of a query are often
+near-duplicates of each other. Candidates are picked greedily by maximal
+marginal relevance (relevance to the query minus similarity to the chunks
+already picked) until the context token budget is spent, so the number of
+chunks adapts to their length and to how much new information each adds.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    candidate_embeddings: np.ndarray,
+    costs: Sequence[int],
+    token_budget: int,
+    lambda_mult: float = 0.7,
+    max_chunks: Optional[int] = None,
+    duplicate_threshold: float = 0.95,
+) -> List[int]:
+    """Return the indices of the candidates to use as context, in pick order.
+
+    Args:
+        query_embedding: The query embedding.
+        candidate_embeddings: One row per candidate chunk.
+        costs: Token cost of each candidate.
+        token_budget: Total tokens the selected chunks may use. The most
+            relevant chunk is always selected, even if it alone exceeds it.
+        lambda_mult: Weight of relevance against novelty; 1.0 is plain
+            similarity ranking.
+        max_chunks: Upper bound on the number of chunks selected.
+        duplicate_threshold: Candidates at least this similar to a selected
+            chunk are discarded outright.
+    """
+    count = len(candidate_embeddings)
+    if count == 0:
+        return []
+    vectors = _normalize_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
+    costs_array = np.asarray(costs)
+
+    available = np.ones(count, dtype=bool)
+    redundancy = np.zeros(count, dtype=np.float32)
+    limit = max_chunks or count
+    selected: List[int] = []
+    used = 0
+    while len(selected) < limit:
+        if selected:
+            available &= costs_array <= token_budget - used
+        if not available.any():
+            break
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(best)
+        used += int(costs_array[best])
+        available[best] = False
+        available &= pairwise[best] < duplicate_threshold
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
@@ -0,0 +1,174 @@
+"""
+In-process BM25 index over the indexed chunks.
+
+Postings are stored in compressed-sparse-row form: one ``offsets`` array per
+term plus flat ``doc_ids``/``term_freqs`` arrays, so the whole index is a
+handful of contiguous NumPy arrays and a term-to-id dictionary.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Variants that should compare equal after NFC: zero-width (non-)joiners used
+# to force or break conjunct rendering, the explicit khanda-ta spelling, the
+# Assamese ra that OCR/LLM extraction sometimes emits for Bengali ra, and
+# Bengali digits (mapped to ASCII so "২৭" matches "27").
+_CHAR_MAP = str.maketrans(
+    {
+        "\u200c": None,
+        "\u200d": None,
+        "\u09f0": "\u09b0",
+        **{chr(0x09E6 + digit): str(digit) for digit in range(10)},
+    }
+)
+_KHANDA_TA_RE = re.compile("\u09a4\u09cd(?=[^\u0980-\u09ff]|$)")
+# Latin letters, digits and the Bengali letter/sign ranges; danda ('\u0964'),
+# double danda and all other punctuation split tokens.
+_TOKEN_RE = re.compile(
+    "[0-9a-z\u0981-\u0983\u0985-\u09b9\u09bc-\u09ce\u09d7\u09dc-\u09e3]+"
+)
+# Common inflectional suffixes (case markers, plural and classifier endings),
+# longest first. Stripped only when a stem of at least two characters remains.
+_SUFFIXES = (
+    "গুলোর",
+    "গুলির",
+    "গুলো",
+    "গুলি",
+    "দের",
+    "টির",
+    "টার",
+    "েরা",
+    "ের",
+    "কে",
+    "তে",
+    "টি",
+    "টা",
+)
+_MIN_STEM = 2
+
+
+def normalize(text: str) -> str:
+    """Return *text* NFC-normalized with Bengali spelling variants unified."""
+    text = unicodedata.normalize("NFC", text).casefold().translate(_CHAR_MAP)
+    return _KHANDA_TA_RE.sub("\u09ce", text)
+
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split *text* into normalized, lightly stemmed terms."""
+    return [_stem(token) for token in _TOKEN_RE.findall(normalize(text))]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents with array-backed postings."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        freqs: List[int] = []
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for doc_id, document in enumerate(self.documents):
+            counts = Counter(tokenize(document))
+            lengths[doc_id] = sum(counts.values())
+            for term, freq in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                freqs.append(freq)
+
+        terms = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        self.term_freqs = np.asarray(freqs, dtype=np.float32)[order]
+        doc_freqs = np.bincount(terms, minlength=len(self.vocabulary))
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=self.offsets[1:])
+
+        n_docs = max(len(self.documents), 1)
+        self.idf = np.log1p(
+            (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)
+        ).astype(np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        # Per-document part of the BM25 denominator, precomputed once.
+        self._length_norm = (
+            k1 * (1 - b + b * lengths / avg_length) if avg_length else lengths
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the posting and per-document arrays."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.doc_ids,
+                self.term_freqs,
+                self.offsets,
+                self.idf,
+                self._length_norm,
+            )
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every document for *query*."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            scores[docs] += (
+                self.idf[term_id]
+                * tf
+                * (self.k1 + 1)
+                / (tf + self._length_norm[docs])
+            )
+        return scores
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, str, float]]:
+        """Return up to *n_results* ``(id, document, score)`` with a positive score."""
+        scores = self.scores(query)
+        n_results = min(n_results, int(np.count_nonzero(scores)))
+        if n_results <= 0:
+            return []
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[i], self.documents[i], float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[str]:
+    """Merge several ranked id lists into one by reciprocal-rank fusion."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda doc_id: fused[doc_id], reverse=True)
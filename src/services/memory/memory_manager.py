@@ -1,11 +1,321 @@
-from typing import List
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from src.database.chroma_db import ChromaDBManager
+import numpy as np
 
-_db_manager = ChromaDBManager()
-_collection = _db_manager.get_or_create_collection("assignment")
+from src.database.chroma_db import add_change_listener, get_chroma_manager
+from src.services.memory.context_builder import mmr_select
+from src.services.memory.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.services.memory.vector_index import VectorIndex, fingerprint
+from src.services.rag.utils.history import estimate_tokens
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import Gauge
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+if TYPE_CHECKING:
+    from chromadb.types import Collection
+
+COLLECTION_NAME = "assignment"
+
+_collection: Optional["Collection"] = None
+_lexical_index: Optional[BM25Index] = None
+_vector_index: Optional[VectorIndex] = None
+# Path prefixes of the index files this process wrote itself.
+_written_indexes: List[str] = []
+
+
+@dataclass
+class RetrievalResult:
+    """Chunks retrieved for a query, with their ids and query similarities."""
+
+    ids: List[str] = field(default_factory=list)
+    documents: List[str] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+
+
+def _get_collection() -> "Collection":
+    """Return the chunk collection, opening the shared ChromaDB client on first use."""
+    global _collection
+    if _collection is None:
+        _collection = get_chroma_manager().get_or_create_collection(COLLECTION_NAME)
+    return _collection
+
+
+async def warm_up() -> None:
+    """Open the collection, create the embedding client and build the indexes."""
+    await asyncio.to_thread(_get_collection)
+    await asyncio.to_thread(lambda: get_chroma_manager().embedding_function.client)
+    await build_lexical_index()
+    await build_vector_index()
+
+
+async def build_lexical_index() -> None:
+    """(Re)build the BM25 index from the chunks currently in ChromaDB."""
+    global _lexical_index
+    if not settings.RETRIEVAL_HYBRID:
+        return
+    start = time.perf_counter()
+    records = await asyncio.to_thread(_get_collection().get, include=["documents"])
+    _lexical_index = await asyncio.to_thread(
+        BM25Index,
+        records["ids"],
+        records["documents"] or [],
+        settings.RETRIEVAL_BM25_K1,
+        settings.RETRIEVAL_BM25_B,
+    )
+    logger.info(
+        f"BM25 index built over {len(_lexical_index)} chunks "
+        f"({len(_lexical_index.vocabulary)} terms, {_lexical_index.nbytes} bytes) "
+        f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+
+def _drop_vector_index(_chunk_ids: object = None) -> None:
+    global _vector_index
+    if _vector_index is not None:
+        logger.info("Collection changed; retrieval falls back to ChromaDB")
+    _vector_index = None
+
+
+def _drop_lexical_index(_chunk_ids: object = None) -> None:
+    global _lexical_index
+    if _lexical_index is not None:
+        logger.info("Collection changed; BM25 is off until the index is rebuilt")
+    _lexical_index = None
+
+
+add_change_listener(_drop_vector_index)
+add_change_listener(_drop_lexical_index)
+
+
+def _remove_index_files(base: str) -> None:
+    directory, prefix = os.path.split(base)
+    for name in os.listdir(directory):
+        if name.startswith(f"{prefix}."):
+            os.remove(os.path.join(directory, name))
+
+
+async def build_vector_index() -> None:
+    """Load every chunk embedding into the in-process index when it is the configured engine.
+
+    The index files are shared by all workers through the page cache. Files
+    of earlier collection states are removed only by the process that wrote
+    them, once it has loaded a newer one; files written by other workers,
+    which may still be mapped or being built, are left alone.
+    """
+    global _vector_index
+    if settings.RETRIEVAL_ENGINE != "numpy":
+        return
+    start = time.perf_counter()
+    records = await asyncio.to_thread(
+        _get_collection().get, include=["documents", "embeddings"]
+    )
+    if not records["ids"]:
+        logger.warning("Collection is empty; retrieval stays on ChromaDB")
+        return
+    order = np.argsort(records["ids"])
+    ids = [records["ids"][i] for i in order]
+    base = os.path.join(
+        settings.RETRIEVAL_INDEX_DIR,
+        fingerprint(ids, settings.RETRIEVAL_QUANTIZATION),
+    )
+    written = not os.path.exists(f"{base}.json")
+    index = await asyncio.to_thread(
+        VectorIndex.build,
+        settings.RETRIEVAL_INDEX_DIR,
+        ids,
+        [records["documents"][i] for i in order],
+        np.asarray(records["embeddings"], dtype=np.float32)[order],
+        settings.RETRIEVAL_QUANTIZATION,
+    )
+    for old in [b for b in _written_indexes if b != index.base]:
+        await asyncio.to_thread(_remove_index_files, old)
+        _written_indexes.remove(old)
+    if written and index.base not in _written_indexes:
+        _written_indexes.append(index.base)
+    _vector_index = index
+    logger.info(
+        f"Vector index loaded with {len(index)} chunks "
+        f"({index.quantization}, {index.nbytes} bytes) "
+        f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+
+def _index_sizes() -> Dict[Tuple[str, ...], float]:
+    sizes: Dict[Tuple[str, ...], float] = {}
+    if _vector_index is not None:
+        sizes[("vector",)] = len(_vector_index)
+    if _lexical_index is not None:
+        sizes[("lexical",)] = len(_lexical_index)
+    return sizes
+
+
+INDEX_CHUNKS = Gauge(
+    "rag_index_chunks",
+    "Chunks in each in-process retrieval index.",
+    ("index",),
+    multiprocess_mode="max",
+)
+INDEX_CHUNKS.add_callback(_index_sizes)
+
+
+async def embed_query(text: str) -> List[float]:
+    """Return the query embedding for *text*."""
+    return await get_chroma_manager().embed_query(text)
+
+
+async def embed_queries(texts: List[str]) -> List[List[float]]:
+    """Return query embeddings for all *texts* from a single embedding call."""
+    return await get_chroma_manager().embed_queries(texts)
+
+
+def _select_context(
+    embedding: Sequence[float],
+    ids: List[str],
+    documents: Dict[str, str],
+    vectors: Dict[str, np.ndarray],
+    n_results: int,
+) -> RetrievalResult:
+    """Pick context chunks from ranked candidate *ids*.
+
+    With a context token budget configured, chunks are chosen by MMR until the
+    budget is spent; otherwise the top *n_results* are used.
+    """
+    ids = [doc_id for doc_id in ids if doc_id in documents]
+    if settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET > 0:
+        ids = [doc_id for doc_id in ids if doc_id in vectors]
+    if not ids:
+        return RetrievalResult()
+    query = np.asarray(embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    scores: Dict[str, float] = {}
+    for doc_id in ids:
+        vector = vectors.get(doc_id)
+        if vector is not None:
+            scores[doc_id] = float(vector @ query) / (float(np.linalg.norm(vector)) or 1.0)
+    if settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET <= 0:
+        ids = ids[:n_results]
+        return RetrievalResult(
+            ids=ids,
+            documents=[documents[i] for i in ids],
+            scores=[scores.get(i, 0.0) for i in ids],
+        )
+    picked = mmr_select(
+        embedding,
+        np.stack([vectors[doc_id] for doc_id in ids]),
+        [estimate_tokens(documents[doc_id]) for doc_id in ids],
+        token_budget=settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET,
+        lambda_mult=settings.RETRIEVAL_MMR_LAMBDA,
+        max_chunks=settings.RETRIEVAL_MAX_CHUNKS,
+        duplicate_threshold=settings.RETRIEVAL_DUPLICATE_THRESHOLD,
+    )
+    selected = [ids[i] for i in picked]
+    return RetrievalResult(
+        ids=selected,
+        documents=[documents[i] for i in selected],
+        scores=[scores[i] for i in selected],
+    )
+
+
+async def search_many(
+    texts: Sequence[str], embeddings: Sequence[Sequence[float]], n_results: int = 2
+) -> List[RetrievalResult]:
+    """Return context chunks for several queries from one vector lookup, in input order.
+
+    Candidates are over-fetched together with their stored embeddings, from
+    the in-process index when loaded and from ChromaDB otherwise. With
+    the lexical index enabled, BM25 scoring runs on a worker thread at the
+    same time as the vector query, and both rankings are merged by
+    reciprocal-rank fusion. The context is then chosen from the candidates
+    by `_select_context`.
+    """
+    lexical_index = _lexical_index
+    index = _vector_index
+    candidates = (
+        max(n_results, settings.RETRIEVAL_CANDIDATES)
+        if lexical_index is not None or settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET > 0
+        else n_results
+    )
+
+    async def lexical_search() -> List[List[Tuple[str, str, float]]]:
+        if lexical_index is None:
+            return [[] for _ in texts]
+        search = lexical_index.search
+        return await asyncio.to_thread(
+            lambda: [search(text, n_results=candidates) for text in texts]
+        )
+
+    async def vector_search() -> List[Tuple[List[str], List[str], np.ndarray]]:
+        if index is None:
+            return await get_chroma_manager().query_candidates(
+                _get_collection(), embeddings, n_results=candidates
+            )
+        return [
+            (
+                [index.ids[row] for row in rows],
+                [index.documents[row] for row in rows],
+                index.vectors(rows),
+            )
+            for rows, _ in index.search(embeddings, candidates)
+        ]
+
+    # The lexical search is started first, so its thread also overlaps the
+    # in-process vector search.
+    lexical, matches = await asyncio.gather(lexical_search(), vector_search())
+
+    rankings: List[List[str]] = []
+    documents: Dict[str, str] = {}
+    vectors: Dict[str, np.ndarray] = {}
+    for (vector_ids, vector_documents, matrix), lexical_hits in zip(matches, lexical):
+        documents.update(zip(vector_ids, vector_documents))
+        vectors.update(zip(vector_ids, matrix))
+        if not lexical_hits:
+            rankings.append(vector_ids)
+            continue
+        documents.update((doc_id, document) for doc_id, document, _ in lexical_hits)
+        rankings.append(
+            reciprocal_rank_fusion(
+                [vector_ids, [doc_id for doc_id, _, _ in lexical_hits]],
+                k=settings.RETRIEVAL_RRF_K,
+            )
+        )
+
+    if settings.RETRIEVAL_CONTEXT_TOKEN_BUDGET > 0:
+        missing = sorted(
+            {i for ranking in rankings for i in ranking if i not in vectors}
+        )
+        if index is not None:
+            vectors.update(index.get_vectors(missing))
+        else:
+            vectors.update(
+                await get_chroma_manager().get_embeddings(_get_collection(), missing)
+            )
+
+    return [
+        _select_context(embedding, ranking, documents, vectors, n_results)
+        for embedding, ranking in zip(embeddings, rankings)
+    ]
+
+
+async def search(
+    text: str, embedding: Sequence[float], n_results: int = 2
+) -> RetrievalResult:
+    """Return chunks relevant to the query, fused with BM25 when enabled."""
+    return (await search_many([text], [embedding], n_results=n_results))[0]
 
 
 async def query(text: str, n_results: int = 2) -> List[str]:
-    """Return documents relevant to *text* from ChromaDB."""
-    return await _db_manager.query(_collection, [text], n_results=n_results)
+    """Return documents relevant to *text* from the configured vector engine."""
+    index = _vector_index
+    if index is None:
+        return await get_chroma_manager().query(
+            _get_collection(), [text], n_results=n_results
+        )
+    rows, _ = index.search([await embed_query(text)], n_results)[0]
+    return [index.documents[row] for row in rows]
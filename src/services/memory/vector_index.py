@@ -0,0 +1,192 @@
+"""
+Exact in-process vector index over the chunk embeddings.
+
+The corpus is a few hundred chunks, so brute force beats HNSW: all embeddings
+are L2-normalized into one contiguous matrix and a query is a single matmul
+followed by ``argpartition``. The matrix is written once to a file named by a
+fingerprint of its contents and memory-mapped, so every worker that loads the
+same collection shares the same page-cache pages. In ``int8`` mode each row is
+stored as int8 with a per-row scale, cutting the matrix to a quarter of its
+float32 size; it is scored block by block, so no full float32 copy is made.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUANTIZATIONS = ("none", "int8")
+# Rows of an int8 matrix converted to float32 at a time while scoring.
+INT8_BLOCK_ROWS = 1024
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _quantize(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization of a normalized float matrix."""
+    scale = np.abs(matrix).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    quantized = np.round(matrix / scale[:, None]).astype(np.int8)
+    return quantized, scale.astype(np.float32)
+
+
+def _publish(base: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    """Write the index files under *base*, each via a temporary file of this process.
+
+    Workers may build the same fingerprint at once, so temporary names carry
+    the pid; the metadata file is published last and marks the index complete.
+    """
+    suffix = f"tmp.{os.getpid()}"
+    written: List[str] = []
+    try:
+        for name, array in arrays.items():
+            tmp_path = f"{base}.{name}.{suffix}.npy"
+            written.append(tmp_path)
+            np.save(tmp_path, array)
+            os.replace(tmp_path, f"{base}.{name}.npy")
+        tmp_path = f"{base}.json.{suffix}"
+        written.append(tmp_path)
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(tmp_path, f"{base}.json")
+    finally:
+        for tmp_path in written:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def fingerprint(ids: Sequence[str], quantization: str) -> str:
+    """Return a short hash identifying an index over *ids* in *quantization* mode."""
+    digest = hashlib.sha256(quantization.encode("utf-8"))
+    for doc_id in ids:
+        digest.update(b"\x1f" + doc_id.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class VectorIndex:
+    """Brute-force cosine top-k over a memory-mapped embedding matrix."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        matrix: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        base: str = "",
+    ):
+        self.base = base
+        self.ids = ids
+        self.documents = documents
+        self.matrix = matrix
+        self.scale = scale
+        self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def quantization(self) -> str:
+        return "none" if self.scale is None else "int8"
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + (0 if self.scale is None else self.scale.nbytes)
+
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        embeddings: np.ndarray,
+        quantization: str = "none",
+    ) -> "VectorIndex":
+        """Write the index for the given chunks under *directory* (unless present) and load it."""
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}"
+            )
+        base = os.path.join(directory, fingerprint(ids, quantization))
+        if not os.path.exists(f"{base}.json"):
+            os.makedirs(directory, exist_ok=True)
+            matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+            arrays = {"matrix": matrix}
+            if quantization == "int8":
+                arrays["matrix"], arrays["scale"] = _quantize(matrix)
+            try:
+                _publish(base, arrays, {"ids": list(ids), "documents": list(documents)})
+            except OSError:
+                # Another worker may have published the same fingerprint, with
+                # the same contents, while this one was writing.
+                if not os.path.exists(f"{base}.json"):
+                    raise
+        return cls.load(base)
+
+    @classmethod
+    def load(cls, base: str) -> "VectorIndex":
+        """Memory-map the index files written under path prefix *base*."""
+        with open(f"{base}.json", "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        matrix = np.load(f"{base}.matrix.npy", mmap_mode="r")
+        scale = (
+            np.load(f"{base}.scale.npy", mmap_mode="r")
+            if os.path.exists(f"{base}.scale.npy")
+            else None
+        )
+        return cls(meta["ids"], meta["documents"], matrix, scale, base=base)
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Return the normalized float32 embeddings of *rows*."""
+        vectors = np.asarray(self.matrix[rows], dtype=np.float32)
+        if self.scale is not None:
+            vectors *= self.scale[rows][:, None]
+        return vectors
+
+    def get_vectors(self, ids: Sequence[str]) -> List[Tuple[str, np.ndarray]]:
+        """Return ``(id, embedding)`` for each of *ids* present in the index."""
+        known = [doc_id for doc_id in ids if doc_id in self._positions]
+        rows = np.array([self._positions[doc_id] for doc_id in known], dtype=np.int64)
+        return list(zip(known, self.vectors(rows))) if known else []
+
+    def _scores(self, query_matrix: np.ndarray) -> np.ndarray:
+        if self.scale is None:
+            return query_matrix @ np.asarray(self.matrix).T
+        scores = np.empty((len(query_matrix), len(self)), dtype=np.float32)
+        for start in range(0, len(self), INT8_BLOCK_ROWS):
+            stop = start + INT8_BLOCK_ROWS
+            block = self.matrix[start:stop].astype(np.float32)
+            np.matmul(query_matrix, block.T, out=scores[:, start:stop])
+            scores[:, start:stop] *= self.scale[start:stop]
+        return scores
+
+    def search(
+        self, queries: Sequence[Sequence[float]], n_results: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return the top *n_results* rows and cosine scores for each query."""
+        if not len(self) or not len(queries):
+            empty = np.empty(0, dtype=np.int64)
+            return [(empty, np.empty(0, dtype=np.float32)) for _ in queries]
+        query_matrix = _normalize_rows(np.atleast_2d(np.asarray(queries, np.float32)))
+        scores = self._scores(query_matrix)
+        k = min(n_results, len(self))
+        if k < len(self):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(len(self)), (len(scores), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return list(zip(top, top_scores))
@@ -0,0 +1,123 @@
+"""
+Bulk embedding for ingestion.
+
+Texts are split into provider-sized batches that are embedded with bounded
+concurrency and retried with exponential backoff. Embedding is decoupled from
+the vector store so the resulting vectors can be written in bulk.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from src.services.rag.utils.embedding_provider import EmbeddingProvider
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class EmbeddingProgress:
+    """Progress of a bulk embedding run."""
+
+    total: int
+    done: int = 0
+    failed: int = 0
+    retries: int = 0
+    reported: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Texts embedded per second."""
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class EmbeddingResult:
+    """Vectors in input order; ``None`` where a batch failed after all retries."""
+
+    embeddings: List[Optional[List[float]]]
+    progress: EmbeddingProgress
+
+    @property
+    def complete(self) -> bool:
+        return self.progress.failed == 0
+
+
+def _log_progress(progress: EmbeddingProgress) -> None:
+    logger.info(
+        f"Embedded {progress.done}/{progress.total} chunks "
+        f"({progress.throughput:.1f}/s, {progress.retries} retries, "
+        f"{progress.failed} failed)"
+    )
+
+
+async def embed_texts(
+    texts: List[str],
+    provider: EmbeddingProvider,
+    task_type: str,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    retry_attempts: Optional[int] = None,
+    retry_delay: Optional[float] = None,
+    on_progress: Callable[[EmbeddingProgress], None] = _log_progress,
+) -> EmbeddingResult:
+    """
+    Embed *texts* in concurrent batches, retrying each batch with backoff.
+
+    A batch that still fails after ``retry_attempts`` retries is recorded as
+    failed instead of aborting the run, so completed batches can be stored.
+    """
+    batch_size = batch_size or settings.INGESTION_EMBED_BATCH_SIZE
+    max_concurrency = max_concurrency or settings.INGESTION_EMBED_CONCURRENCY
+    retry_attempts = (
+        settings.PROCESSING_RETRY_ATTEMPTS if retry_attempts is None else retry_attempts
+    )
+    retry_delay = settings.PROCESSING_RETRY_DELAY if retry_delay is None else retry_delay
+
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    progress = EmbeddingProgress(total=len(texts))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    report_every = max(batch_size, len(texts) // 10)
+
+    async def run(start: int) -> None:
+        batch = texts[start : start + batch_size]
+        async with semaphore:
+            for attempt in range(retry_attempts + 1):
+                try:
+                    vectors = await provider.embed(batch, task_type)
+                    break
+                except Exception as e:
+                    if attempt == retry_attempts:
+                        logger.error(
+                            f"Embedding batch at {start} failed after "
+                            f"{attempt + 1} attempts: {e}"
+                        )
+                        progress.failed += len(batch)
+                        return
+                    progress.retries += 1
+                    delay = retry_delay * (2**attempt) * (0.5 + random.random())
+                    logger.warning(
+                        f"Embedding batch at {start} failed ({e}); "
+                        f"retrying in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+        embeddings[start : start + len(batch)] = [list(v) for v in vectors]
+        progress.done += len(batch)
+        if progress.done - progress.reported >= report_every or (
+            progress.done + progress.failed == progress.total
+        ):
+            progress.reported = progress.done
+            on_progress(progress)
+
+    await asyncio.gather(*(run(i) for i in range(0, len(texts), batch_size)))
+    return EmbeddingResult(embeddings=embeddings, progress=progress)
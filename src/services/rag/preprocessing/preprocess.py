@@ -1,60 +1,232 @@
 """
 Uses llm to convert pdf to text, instead of generic ocr.
+
+The PDF is split into page ranges that are extracted concurrently. Each
+range's text is cached on disk by content hash, so an interrupted run only
+re-extracts the ranges that did not finish. Splitting uses ``pypdf``; if it
+cannot be imported the whole document is extracted as one range.
 """
 
+from __future__ import annotations
+
 import asyncio
+import hashlib
+import io
 import os
+import re
+from typing import TYPE_CHECKING, List, Optional, Protocol
 
-from src.services.rag.prompts.prompt import EXTRACT_PROMPT_TEMPLATE
+from src.services.rag.prompts import prompt as prompts
 from src.utils.config import get_settings
 from src.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from google import genai
+
 logger = get_logger(__name__)
 settings = get_settings()
 SOURCE_FILE_PATH = "data/raw.pdf"
 PROCESSED_FILE_PATH = "data/processed.txt"
-from google import genai
-from google.genai import types
 
 EXTRACT_MODEL_NAME = "gemini-2.5-pro"
 
+PART_ONE_HEADER = "Part One: Information"
+PART_TWO_HEADER = "Part Two: Q&A"
+
+
+class PageExtractor(Protocol):
+    """Turns a PDF (usually a range of pages) into text."""
+
+    name: str
+
+    async def extract(self, pdf_bytes: bytes) -> str: ...
+
+
+class GeminiPageExtractor:
+    """Extracts text with a Gemini model using the extraction prompt."""
+
+    def __init__(self, model: str = EXTRACT_MODEL_NAME):
+        self.model = model
+        self.name = f"gemini:{model}"
+        self._client: Optional[genai.Client] = None
+
+    @property
+    def client(self) -> genai.Client:
+        if self._client is None:
+            from src.services.rag.utils.gemini_client import get_gemini_client
 
-async def pdf_to_text(file_path: str) -> str:
+            self._client = get_gemini_client()
+        return self._client
+
+    async def extract(self, pdf_bytes: bytes) -> str:
+        from google.genai import types
+
+        contents = [
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_bytes(
+                        mime_type="application/pdf",
+                        data=pdf_bytes,
+                    ),
+                    types.Part.from_text(text=prompts.EXTRACT_PROMPT_TEMPLATE),
+                ],
+            )
+        ]
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_mime_type="text/plain",
+            ),
+        )
+        return response.text or ""
+
+
+class TextLayerExtractor:
+    """Reads the PDF's embedded text layer locally with ``pypdf``.
+
+    No model call is made, so it is suitable for tests and benchmarks, but the
+    output keeps the PDF's raw layout and is not restructured into Q&A form.
     """
-    Convert a PDF file to text using a LLM.
+
+    name = "text-layer"
+
+    async def extract(self, pdf_bytes: bytes) -> str:
+        return await asyncio.to_thread(self._extract, pdf_bytes)
+
+    @staticmethod
+    def _extract(pdf_bytes: bytes) -> str:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def split_pdf(pdf_bytes: bytes, pages_per_chunk: int) -> List[bytes]:
+    """Split a PDF into standalone PDFs of *pages_per_chunk* pages each."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        logger.warning("pypdf is not installed; extracting the PDF as a single range.")
+        return [pdf_bytes]
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    ranges = []
+    for start in range(0, len(reader.pages), pages_per_chunk):
+        writer = PdfWriter()
+        for page in reader.pages[start : start + pages_per_chunk]:
+            writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        ranges.append(buffer.getvalue())
+    return ranges or [pdf_bytes]
+
+
+def stitch_sections(texts: List[str]) -> str:
+    """Merge per-range outputs into one document with a single pair of parts.
+
+    Each range is extracted with the full prompt, so each may carry its own
+    "Part One"/"Part Two" headers; their bodies are concatenated in page order.
     """
-    with open(file_path, "rb") as file:
-        pdf_bytes = file.read()
+    information: List[str] = []
+    questions: List[str] = []
+    for text in texts:
+        info, _, qa = text.partition(PART_TWO_HEADER)
+        info = re.sub(rf"^\s*{re.escape(PART_ONE_HEADER)}\s*", "", info)
+        if info.strip():
+            information.append(info.strip())
+        if qa.strip():
+            questions.append(qa.strip())
+    parts = [PART_ONE_HEADER, *information]
+    if questions:
+        parts += [PART_TWO_HEADER, *questions]
+    return "\n\n".join(parts) + "\n"
 
-    prompt = EXTRACT_PROMPT_TEMPLATE
-    client = genai.Client(
-        api_key=settings.GEMINI_API_KEY,
-    )
 
-    model = EXTRACT_MODEL_NAME
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_bytes(
-                    mime_type="application/pdf",
-                    data=pdf_bytes,
-                ),
-                types.Part.from_text(text=prompt),
-            ],
+def _read_cached(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _write_cached(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+async def _extract_range(
+    index: int,
+    pdf_bytes: bytes,
+    extractor: PageExtractor,
+    cache_dir: str,
+    semaphore: asyncio.Semaphore,
+) -> str:
+    key = hashlib.sha256(
+        pdf_bytes + extractor.name.encode() + prompts.EXTRACT_PROMPT_TEMPLATE.encode()
+    ).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{key}.txt")
+    cached = await asyncio.to_thread(_read_cached, cache_path)
+    if cached is not None:
+        logger.info(f"Page range {index}: using cached extraction")
+        return cached
+
+    async with semaphore:
+        for attempt in range(settings.PROCESSING_RETRY_ATTEMPTS + 1):
+            try:
+                text = await extractor.extract(pdf_bytes)
+                break
+            except Exception as e:
+                if attempt == settings.PROCESSING_RETRY_ATTEMPTS:
+                    raise
+                delay = settings.PROCESSING_RETRY_DELAY * (2**attempt)
+                logger.warning(
+                    f"Page range {index} failed ({e}); retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+
+    await asyncio.to_thread(_write_cached, cache_path, text)
+    logger.info(f"Page range {index}: extracted {len(text)} characters")
+    return text
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+async def pdf_to_text(
+    file_path: str, extractor: Optional[PageExtractor] = None
+) -> str:
+    """
+    Convert a PDF file to text, extracting page ranges concurrently.
+    """
+    extractor = extractor or GeminiPageExtractor()
+    pdf_bytes = await asyncio.to_thread(_read_bytes, file_path)
+
+    ranges = await asyncio.to_thread(
+        split_pdf, pdf_bytes, settings.PROCESSING_PAGES_PER_CHUNK
+    )
+    cache_dir = settings.PROCESSING_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(settings.PROCESSING_MAX_WORKERS)
+    logger.info(
+        f"Extracting {len(ranges)} page range(s) with {extractor.name} "
+        f"({settings.PROCESSING_MAX_WORKERS} workers)"
+    )
+    texts = await asyncio.gather(
+        *(
+            _extract_range(i, data, extractor, cache_dir, semaphore)
+            for i, data in enumerate(ranges)
         )
-    ]
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=types.GenerateContentConfig(
-            response_mime_type="text/plain",
-        ),
     )
-    return response.text
+    return stitch_sections(list(texts))
 
 
-async def process_and_save():
+async def process_and_save(extractor: Optional[PageExtractor] = None):
     """
     Process the source PDF file and save the text to the processed file.
     """
@@ -62,7 +234,7 @@ async def process_and_save():
         print(f"Error: Source file {SOURCE_FILE_PATH} not found")
         return
     print(f"Processing PDF: {SOURCE_FILE_PATH}")
-    processed_text = await pdf_to_text(SOURCE_FILE_PATH)
+    processed_text = await pdf_to_text(SOURCE_FILE_PATH, extractor)
     os.makedirs(os.path.dirname(PROCESSED_FILE_PATH), exist_ok=True)
     with open(PROCESSED_FILE_PATH, "w", encoding="utf-8") as file:
         file.write(processed_text)
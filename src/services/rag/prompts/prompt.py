@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Final
+from typing import Dict, Final
 
 _THIS_DIR: Final[Path] = Path(__file__).resolve().parent
 _DATE_PKG: Final[str] = "v250718"
@@ -11,6 +12,19 @@ _DATE_DIR: Final[Path] = _THIS_DIR / _DATE_PKG
 _TXT_DIR: Final[Path] = _DATE_DIR
 
 
+_FILES: Final[Dict[str, str]] = {
+    "RAG_PROMPT_TEMPLATE": "rag_prompt.txt",
+    "EXTRACT_PROMPT_TEMPLATE": "extract_prompt.txt",
+    "SUMMARY_PROMPT_TEMPLATE": "summary_prompt.txt",
+}
+
+# Loaded on first attribute access (see ``__getattr__``), not at import.
+RAG_PROMPT_TEMPLATE: str
+EXTRACT_PROMPT_TEMPLATE: str
+SUMMARY_PROMPT_TEMPLATE: str
+
+
+@lru_cache(maxsize=None)
 def _load(filename: str) -> str:
     """Return the contents of *filename* located in the texts directory."""
     path = _TXT_DIR / filename
@@ -19,11 +33,14 @@ def _load(filename: str) -> str:
     return path.read_text(encoding="utf-8")
 
 
-RAG_PROMPT_TEMPLATE: str = _load("rag_prompt.txt")
-EXTRACT_PROMPT_TEMPLATE: str = _load("extract_prompt.txt")
+def __getattr__(name: str) -> str:
+    if name in _FILES:
+        return _load(_FILES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "RAG_PROMPT_TEMPLATE",
     "EXTRACT_PROMPT_TEMPLATE",
+    "SUMMARY_PROMPT_TEMPLATE",
 ]
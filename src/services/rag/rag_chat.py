@@ -1,61 +1,557 @@
 from __future__ import annotations
 
-from typing import Annotated, Any, Dict, List
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config, merge_configs
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
-from src.services.memory.memory_manager import query
-from src.services.rag.prompts.prompt import RAG_PROMPT_TEMPLATE
+from src.database.checkpointer import create_checkpointer
+from src.services.memory import memory_manager
+from src.services.memory.memory_manager import RetrievalResult
+from src.services.rag.prompts import prompt as prompts
+from src.services.rag.utils import deadline
+from src.services.rag.utils.answer_cache import (
+    SemanticAnswerCache,
+    get_answer_cache,
+)
+from src.services.rag.utils.context_compression import (
+    CompressionStats,
+    compress_context,
+)
+from src.services.rag.utils.embedding_cache import normalize_text
+from src.services.rag.utils.governor import Governor, get_governor
+from src.services.rag.utils.history import (
+    PromptTokenStats,
+    SessionTracker,
+    message_tokens,
+    select_history,
+)
 from src.services.rag.utils.llm import get_response_llm
+from src.services.rag.utils.single_flight import SingleFlight, messages_fingerprint
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import STAGE_SECONDS
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DEFAULT_THREAD_ID = "assignment"
+
+T = TypeVar("T")
+
+
+class Retriever(Protocol):
+    """Embeds queries and searches the vector store with the embedding."""
+
+    async def embed_query(self, text: str) -> List[float]: ...
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]: ...
+
+    async def search(
+        self, text: str, embedding: Sequence[float], n_results: int = 2
+    ) -> RetrievalResult: ...
+
+    async def search_many(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 2,
+    ) -> List[RetrievalResult]: ...
+
+
+@dataclass
+class BatchAnswer:
+    """Outcome of one question in a batch: either a response or an error."""
+
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+
+class _FirstTokenTimer(BaseCallbackHandler):
+    """Records each streamed model call's time to first token."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: Any, messages: Any, **kwargs: Any
+    ) -> None:
+        self._started[kwargs["run_id"]] = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        start = self._started.pop(kwargs["run_id"], None)
+        if start is not None:
+            STAGE_SECONDS.observe(time.perf_counter() - start, "llm_first_token")
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self._started.pop(kwargs["run_id"], None)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self._started.pop(kwargs["run_id"], None)
+
+
+class _TokenFlag(BaseCallbackHandler):
+    """Notes whether a model call has streamed any text to the caller."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.streamed = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.streamed = True
 
 
 class State(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     context: str
+    summary: NotRequired[str]
 
 
 class RAGChat:
-    """Manages the Retrieval-Augmented Generation chat process."""
+    """Manages the Retrieval-Augmented Generation chat process.
+
+    A single instance is meant to live for the whole process: the LLM client,
+    the parsed prompt and the compiled graph are built once and shared by every
+    conversation. Individual conversations are isolated by ``thread_id``.
+
+    Only the most recent turns that fit ``HISTORY_TOKEN_BUDGET`` are sent to
+    the model. When a thread's stored history outgrows the budget, the oldest
+    turns are removed from its state, or folded into a rolling summary with
+    the ``summarize`` strategy. With the in-memory checkpointer, idle threads
+    are evicted by *sessions*; the SQLite checkpointer ages them out itself.
+
+    Concurrent identical work is coalesced: the same question is embedded and
+    retrieved once, and identical prompts share one model call, while every
+    caller still records the turn in its own thread. Model calls go through
+    the *governor*, which bounds their concurrency, deadline and retries.
+    """
 
-    def __init__(self, thread_id: str = "assignment"):
-        self.thread_id = thread_id
-        self.llm = get_response_llm()
-        self.prompt_template = PromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        retriever: Optional[Retriever] = None,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        sessions: Optional[SessionTracker] = None,
+        governor: Optional[Governor] = None,
+    ):
+        self.llm = llm if llm is not None else get_response_llm()
+        callbacks = list(self.llm.callbacks or [])  # type: ignore[arg-type]
+        if not any(isinstance(c, _FirstTokenTimer) for c in callbacks):
+            self.llm.callbacks = [*callbacks, _FirstTokenTimer()]
+        self.governor = governor if governor is not None else get_governor("llm")
+        self.retriever: Retriever = (
+            retriever if retriever is not None else memory_manager  # type: ignore[assignment]
+        )
+        self.answer_cache = (
+            answer_cache if answer_cache is not None else get_answer_cache()
+        )
+        self.prompt_template = PromptTemplate.from_template(
+            prompts.RAG_PROMPT_TEMPLATE
+        )
+        self.summary_template = PromptTemplate.from_template(
+            prompts.SUMMARY_PROMPT_TEMPLATE
+        )
+        self.checkpointer = (
+            checkpointer if checkpointer is not None else create_checkpointer()
+        )
+        if sessions is None and isinstance(self.checkpointer, MemorySaver):
+            sessions = SessionTracker(
+                max_sessions=settings.HISTORY_MAX_SESSIONS,
+                ttl_seconds=settings.HISTORY_SESSION_TTL_SECONDS,
+            )
+        self.sessions = sessions
+        self.history_token_budget = settings.HISTORY_TOKEN_BUDGET
+        self.history_strategy = settings.HISTORY_STRATEGY
+        self.prompt_stats = PromptTokenStats()
+        self.compression_stats = CompressionStats()
+        self._seconds_per_prompt_token = 0.0
+        self.single_flight = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
         self.graph = self._create_rag_graph()
 
     async def _generate_response(self, state: State) -> Dict[str, Any]:
         """Generate assistant response."""
-        prompt = self.prompt_template.format(context=state.get("context", ""))
-        messages = [SystemMessage(content=prompt), *state["messages"]]
-        response = await self.llm.ainvoke(messages)
+        with STAGE_SECONDS.time("prompt_build"):
+            prompt = self.prompt_template.format(context=state.get("context", ""))
+            summary = state.get("summary")
+            if summary:
+                prompt += f"\n\nSummary of the earlier conversation:\n{summary}"
+            history, _ = select_history(state["messages"], self.history_token_budget)
+            messages = [SystemMessage(content=prompt), *history]
+        deadline.check("generation")
+        start = time.perf_counter()
+        # The shared call runs outside this request's context; its callbacks
+        # are passed on explicitly so the caller that starts it still streams.
+        config = ensure_config()
+        response = await self._coalesce(
+            ("generate", messages_fingerprint(messages)),
+            lambda: self._invoke_llm(messages, config),
+        )
+        # Waiters share one response object; each thread stores its own copy.
+        response = response.model_copy()
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens") or sum(
+            message_tokens(m) for m in messages
+        )
+        self.prompt_stats.record(prompt_tokens)
+        per_token = (time.perf_counter() - start) / max(prompt_tokens, 1)
+        self._seconds_per_prompt_token = (
+            per_token
+            if not self._seconds_per_prompt_token
+            else 0.9 * self._seconds_per_prompt_token + 0.1 * per_token
+        )
         return {"messages": [response]}
 
+    async def _invoke_llm(
+        self, messages: List[BaseMessage], config: Optional[RunnableConfig] = None
+    ) -> BaseMessage:
+        """Call the response model through the governor, when enabled.
+
+        *config* is the caller's run config, taken from the current context
+        when omitted.
+        """
+        config = ensure_config(config)
+        with STAGE_SECONDS.time("llm_total"):
+            if self.governor is None:
+                return await self.llm.ainvoke(messages, config=config)
+            # Only the first attempt reports to the caller's callbacks, so a retry
+            # or hedge does not stream a second copy of the reply; its result is
+            # streamed as one message instead. Once the first attempt has
+            # streamed text it is neither retried nor hedged, so a client never
+            # keeps a partial reply alongside a different complete one.
+            flag = _TokenFlag()
+            first = merge_configs(config, {"callbacks": [flag]})
+            return await self.governor.call(
+                lambda attempt: self.llm.ainvoke(
+                    messages, config={"callbacks": []} if attempt else first
+                ),
+                committed=lambda: flag.streamed,
+            )
+
+    async def _coalesce(
+        self, key: Tuple[Any, ...], fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run *fn*, sharing the call with concurrent callers of the same *key*."""
+        if self.single_flight is None:
+            return await fn()
+        return await self.single_flight.do(key, fn)
+
+    def _build_context(self, user_input: str, retrieved: RetrievalResult) -> str:
+        """Join the retrieved chunks, compressed to their key sentences if enabled."""
+        if not settings.COMPRESSION_ENABLED:
+            return "\n".join(retrieved.documents)
+        with STAGE_SECONDS.time("context_compression"):
+            result = compress_context(
+                user_input,
+                retrieved.documents,
+                retrieved.scores,
+                token_cap=settings.COMPRESSION_TOKEN_CAP,
+                neighbours=settings.COMPRESSION_NEIGHBOURS,
+                lexical_weight=settings.COMPRESSION_LEXICAL_WEIGHT,
+            )
+        self.compression_stats.record(result, self._seconds_per_prompt_token)
+        logger.debug(
+            f"Context compressed {result.original_tokens} -> "
+            f"{result.compressed_tokens} tokens in {result.seconds * 1000:.2f}ms"
+        )
+        return result.text
+
+    async def _compact_history(self, state: State) -> Dict[str, Any]:
+        """Drop the oldest turns once the stored history exceeds the token budget.
+
+        History is cut back to half the budget so the work, and with the
+        ``summarize`` strategy the summary call, happens every few turns
+        rather than on every turn.
+        """
+        messages = state["messages"]
+        if sum(message_tokens(m) for m in messages) <= self.history_token_budget:
+            return {}
+        _, dropped = select_history(messages, self.history_token_budget // 2)
+        if not dropped:
+            return {}
+        update: Dict[str, Any] = {
+            "messages": [RemoveMessage(id=m.id) for m in dropped if m.id]
+        }
+        self.prompt_stats.trimmed_messages += len(dropped)
+        if self.history_strategy == "summarize":
+            transcript = "\n".join(
+                f"{'User' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}"
+                for m in dropped
+            )
+            prompt = self.summary_template.format(
+                summary=state.get("summary") or "(none)", transcript=transcript
+            )
+            try:
+                result = await self._invoke_llm([HumanMessage(content=prompt)])
+                update["summary"] = result.content
+                self.prompt_stats.summaries += 1
+            except Exception as e:
+                logger.warning(f"History summarization failed, trimming only: {e}")
+        return update
+
     def _create_rag_graph(self):
         builder = StateGraph(State)
         builder.add_node("generate", self._generate_response)
+        builder.add_node("compact_history", self._compact_history)
         builder.add_edge(START, "generate")
-        builder.add_edge("generate", END)
-        return builder.compile(checkpointer=MemorySaver())
-
-    async def process_user_input(self, user_input: str) -> str:
-        """Return assistant reply for *user_input*."""
-        context_docs = await query(user_input)
-        context = "\n".join(context_docs)
-        initial_state: State = {
+        builder.add_edge("generate", "compact_history")
+        builder.add_edge("compact_history", END)
+        return builder.compile(checkpointer=self.checkpointer)
+
+    async def _touch_session(self, thread_id: str) -> None:
+        """Record activity on *thread_id* and delete the state of evicted sessions."""
+        if self.sessions is None:
+            return
+        for evicted in self.sessions.touch(thread_id):
+            await self.checkpointer.adelete_thread(evicted)
+            logger.debug(f"Evicted idle session {evicted}")
+
+    async def _prepare(
+        self, user_input: str, config: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[State], Optional[List[float]], List[str]]:
+        """Embed *user_input* and either answer it from the cache or retrieve context.
+
+        Returns the cached answer (or ``None``), the initial graph state for a
+        miss, the query embedding if the answer may be cached (``None`` when
+        the thread has earlier turns, since the answer then depends on them)
+        and the retrieved chunk ids.
+        """
+        deadline.check("retrieval")
+        question = normalize_text(user_input)
+        with STAGE_SECONDS.time("embed"):
+            embedding = await self._coalesce(
+                ("embed", question), lambda: self.retriever.embed_query(user_input)
+            )
+        answer_cache = self.answer_cache
+        cacheable = answer_cache is not None and not await self._has_history(config)
+        if answer_cache is not None and cacheable:
+            cached = answer_cache.lookup(embedding)
+            if cached is not None:
+                await self.graph.aupdate_state(
+                    config,
+                    {
+                        "messages": [
+                            HumanMessage(content=user_input),
+                            AIMessage(content=cached.answer),
+                        ]
+                    },
+                    as_node="compact_history",
+                )
+                return cached.answer, None, embedding, cached.chunk_ids
+
+        with STAGE_SECONDS.time("retrieve"):
+            retrieved = await self._coalesce(
+                ("search", question, settings.RETRIEVAL_N_RESULTS),
+                lambda: self.retriever.search(
+                    user_input, embedding, n_results=settings.RETRIEVAL_N_RESULTS
+                ),
+            )
+        state: State = {
             "messages": [HumanMessage(content=user_input)],
-            "context": context,
+            "context": self._build_context(user_input, retrieved),
         }
-        config = {"configurable": {"thread_id": self.thread_id}}
+        return None, state, embedding if cacheable else None, retrieved.ids
+
+    async def _has_history(self, config: Dict[str, Any]) -> bool:
+        """Return whether the thread in *config* already has turns or a summary."""
+        snapshot = await self.graph.aget_state(config)
+        return bool(snapshot.values.get("messages") or snapshot.values.get("summary"))
+
+    def _remember(
+        self,
+        embedding: Optional[List[float]],
+        chunk_ids: List[str],
+        answer: Any,
+        start: float,
+    ) -> None:
+        if (
+            self.answer_cache is not None
+            and embedding is not None
+            and isinstance(answer, str)
+            and answer
+        ):
+            self.answer_cache.store(
+                embedding, chunk_ids, answer, time.perf_counter() - start
+            )
+
+    async def process_user_input(
+        self, user_input: str, thread_id: str = DEFAULT_THREAD_ID
+    ) -> str:
+        """Return assistant reply for *user_input* within conversation *thread_id*."""
+        start = time.perf_counter()
+        await self._touch_session(thread_id)
+        config = {"configurable": {"thread_id": thread_id}}
+        cached, initial_state, embedding, chunk_ids = await self._prepare(
+            user_input, config
+        )
+        if cached is not None:
+            return cached
         final_state: State = await self.graph.ainvoke(initial_state, config)
-        return final_state["messages"][-1].content
+        answer = final_state["messages"][-1].content
+        self._remember(embedding, chunk_ids, answer, start)
+        return answer
+
+    async def stream_user_input(
+        self, user_input: str, thread_id: str = DEFAULT_THREAD_ID
+    ) -> AsyncIterator[str]:
+        """Yield the assistant reply for *user_input* token by token.
+
+        The graph still runs to completion, so the full reply is checkpointed
+        to the thread state exactly as with `process_user_input`.
+        """
+        start = time.perf_counter()
+        await self._touch_session(thread_id)
+        config = {"configurable": {"thread_id": thread_id}}
+        cached, initial_state, embedding, chunk_ids = await self._prepare(
+            user_input, config
+        )
+        if cached is not None:
+            yield cached
+            return
+        parts: List[str] = []
+        async for chunk, metadata in self.graph.astream(
+            initial_state, config, stream_mode="messages"
+        ):
+            if metadata.get("langgraph_node") != "generate":
+                continue
+            if isinstance(chunk, AIMessageChunk):
+                text = chunk.text()
+            elif isinstance(chunk, AIMessage) and not parts:
+                # A coalesced caller gets the shared reply as one whole message.
+                text = chunk.text()
+            else:
+                continue
+            if text:
+                parts.append(text)
+                yield text
+        self._remember(embedding, chunk_ids, "".join(parts), start)
+
+    async def process_batch(
+        self, user_inputs: Sequence[str], max_concurrency: Optional[int] = None
+    ) -> List[BatchAnswer]:
+        """Answer independent questions with one embedding call and one vector query.
+
+        Each question is answered without conversation history and nothing is
+        checkpointed. Generation runs with at most *max_concurrency* calls in
+        flight. Results are returned in input order with failures recorded per
+        item.
+        """
+        start = time.perf_counter()
+        questions = list(user_inputs)
+        answers = [BatchAnswer() for _ in questions]
+        try:
+            with STAGE_SECONDS.time("embed"):
+                embeddings = await self.retriever.embed_queries(questions)
+        except Exception as e:
+            logger.exception("Batch embedding failed")
+            return [BatchAnswer(error=f"Embedding failed: {e}") for _ in questions]
+
+        pending: List[int] = []
+        for i, embedding in enumerate(embeddings):
+            cached = (
+                self.answer_cache.lookup(embedding)
+                if self.answer_cache is not None
+                else None
+            )
+            if cached is not None:
+                answers[i].response = cached.answer
+            else:
+                pending.append(i)
+
+        try:
+            with STAGE_SECONDS.time("retrieve"):
+                retrieved = await self.retriever.search_many(
+                    [questions[i] for i in pending],
+                    [embeddings[i] for i in pending],
+                    n_results=settings.RETRIEVAL_N_RESULTS,
+                )
+        except Exception as e:
+            logger.exception("Batch retrieval failed")
+            for i in pending:
+                answers[i].error = f"Retrieval failed: {e}"
+            return answers
+
+        semaphore = asyncio.Semaphore(
+            max_concurrency or settings.BATCH_MAX_CONCURRENCY
+        )
+
+        async def generate(i: int, result: RetrievalResult) -> None:
+            async with semaphore:
+                item_start = time.perf_counter()
+                try:
+                    output = await self._generate_response(
+                        {
+                            "messages": [HumanMessage(content=questions[i])],
+                            "context": self._build_context(questions[i], result),
+                        }
+                    )
+                except Exception as e:
+                    logger.warning(f"Batch item {i} failed: {e}")
+                    answers[i].error = str(e)
+                    return
+                answer = output["messages"][-1].content
+                answers[i].response = answer
+                self._remember(embeddings[i], result.ids, answer, item_start)
+
+        await asyncio.gather(*(generate(i, r) for i, r in zip(pending, retrieved)))
+        logger.info(
+            f"Batch of {len(questions)} processed in "
+            f"{time.perf_counter() - start:.2f}s "
+            f"({len(questions) - len(pending)} from cache)"
+        )
+        return answers
+
+
+_rag_chat: Optional[RAGChat] = None
+
+
+def get_rag_chat() -> RAGChat:
+    """Return the process-wide `RAGChat` engine, creating it on first use."""
+    global _rag_chat
+    if _rag_chat is None:
+        logger.info("Creating shared RAGChat engine")
+        _rag_chat = RAGChat()
+    return _rag_chat
 
 
-async def process_user_input(user_input: str, thread_id: str = "assignment") -> str:
-    """Convenience wrapper around `RAGChat.process_user_input`."""
-    chat = RAGChat(thread_id=thread_id)
-    return await chat.process_user_input(user_input)
+async def process_user_input(
+    user_input: str, thread_id: str = DEFAULT_THREAD_ID
+) -> str:
+    """Convenience wrapper around the shared engine's `process_user_input`."""
+    return await get_rag_chat().process_user_input(user_input, thread_id=thread_id)
@@ -0,0 +1,207 @@
+"""
+Semantic answer cache.
+
+Stores the query embedding, the ids of the chunks retrieved for it and the
+final answer. A new query whose embedding is within a cosine-similarity
+threshold of a cached one is answered from the cache without retrieval or
+generation.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.database.chroma_db import add_change_listener
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer together with the chunks it was generated from."""
+
+    answer: str
+    chunk_ids: List[str]
+    similarity: float = 1.0
+
+
+@dataclass
+class AnswerCacheStats:
+    """Hit-rate and latency-saved counters for the answer cache."""
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    latency_saved_seconds: float = 0.0
+    _miss_latency_ewma: float = field(default=0.0, repr=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hit_rate, 4),
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3),
+            "avg_miss_latency_seconds": round(self._miss_latency_ewma, 3),
+        }
+
+
+class SemanticAnswerCache:
+    """Cosine-similarity answer cache with LRU and TTL eviction.
+
+    Embeddings are kept L2-normalized in a preallocated matrix of
+    ``max_entries`` rows, so a lookup is a single matrix-vector product and
+    storing an entry never reallocates.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = AnswerCacheStats()
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._answers: List[Optional[CachedAnswer]] = [None] * max_entries
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            self._valid &= now - self._created <= self.ttl_seconds
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[CachedAnswer]:
+        """Return the closest cached answer above the threshold, if any."""
+        now = time.time()
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._expire(now)
+            if (
+                self._matrix is None
+                or self._matrix.shape[1] != vector.shape[0]
+                or not self._valid.any()
+            ):
+                self.stats.misses += 1
+                return None
+            scores = np.where(self._valid, self._matrix @ vector, -np.inf)
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            cached = self._answers[best]
+            if similarity < self.similarity_threshold or cached is None:
+                self.stats.misses += 1
+                return None
+            self._last_used[best] = now
+            self.stats.hits += 1
+            self.stats.latency_saved_seconds += self.stats._miss_latency_ewma
+            return CachedAnswer(cached.answer, cached.chunk_ids, similarity)
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        chunk_ids: Iterable[str],
+        answer: str,
+        latency_seconds: Optional[float] = None,
+    ) -> None:
+        """Cache *answer* for *embedding*; *latency_seconds* is the uncached cost."""
+        now = time.time()
+        vector = self._normalize(embedding)
+        with self._lock:
+            if latency_seconds is not None:
+                ewma = self.stats._miss_latency_ewma
+                self.stats._miss_latency_ewma = (
+                    latency_seconds if ewma == 0 else 0.9 * ewma + 0.1 * latency_seconds
+                )
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._matrix = np.zeros(
+                    (self.max_entries, vector.shape[0]), dtype=np.float32
+                )
+                self._valid[:] = False
+            self._expire(now)
+            free = np.flatnonzero(~self._valid)
+            slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+            self._matrix[slot] = vector
+            self._answers[slot] = CachedAnswer(answer, list(chunk_ids))
+            self._valid[slot] = True
+            self._created[slot] = now
+            self._last_used[slot] = now
+
+    def invalidate(self, chunk_ids: Optional[Iterable[str]] = None) -> None:
+        """Drop cached answers after the indexed collection changed.
+
+        With *chunk_ids* only answers built from those chunks are dropped (a
+        removed chunk cannot change results it was not part of); without it
+        everything is dropped, since new chunks may outrank any cached result.
+        """
+        with self._lock:
+            if chunk_ids is None:
+                stale = self._valid.copy()
+            else:
+                changed = set(chunk_ids)
+                stale = np.array(
+                    [
+                        answer is not None and bool(changed.intersection(answer.chunk_ids))
+                        for answer in self._answers
+                    ],
+                    dtype=bool,
+                ) & self._valid
+            dropped = int(stale.sum())
+            self._valid &= ~stale
+            if dropped:
+                self.stats.invalidations += dropped
+                logger.info(f"Invalidated {dropped} cached answers")
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Return the process-wide answer cache, or ``None`` when disabled."""
+    global _answer_cache
+    settings = get_settings()
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        )
+        add_change_listener(_answer_cache.invalidate)
+    return _answer_cache
+
+
+def _lookup_counts() -> Dict[Tuple[str, ...], float]:
+    if _answer_cache is None:
+        return {}
+    stats = _answer_cache.stats
+    return {("answer", "hit"): stats.hits, ("answer", "miss"): stats.misses}
+
+
+CACHE_LOOKUPS.add_callback(_lookup_counts)
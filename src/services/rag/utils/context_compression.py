@@ -0,0 +1,176 @@
+"""
+Extractive compression of retrieved context.
+
+Retrieved chunks are long passages, while the answer is usually a single
+sentence. The chunks are split into sentences, each sentence is scored by the
+query similarity of its chunk (from the query embedding already computed for
+retrieval) plus an IDF-weighted overlap with the query terms, and the best
+sentences are kept together with their neighbours until a token cap is
+reached. No extra model call is made.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.services.memory.lexical_index import tokenize
+from src.services.rag.utils.history import estimate_tokens
+
+_SENTENCE_RE = re.compile(r"(?<=[।?!])\s*|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split *text* on danda, question and exclamation marks and on newlines."""
+    return [part.strip() for part in _SENTENCE_RE.split(text) if part.strip()]
+
+
+@dataclass
+class CompressedContext:
+    """Compressed context text and its size before and after compression."""
+
+    text: str
+    original_tokens: int
+    compressed_tokens: int
+    seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Compressed size as a fraction of the original."""
+        return (
+            self.compressed_tokens / self.original_tokens
+            if self.original_tokens
+            else 1.0
+        )
+
+
+@dataclass
+class CompressionStats:
+    """Compression ratio and estimated generation latency saved."""
+
+    requests: int = 0
+    original_tokens: int = 0
+    compressed_tokens: int = 0
+    compression_seconds: float = 0.0
+    latency_saved_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, result: CompressedContext, seconds_per_token: float) -> None:
+        removed = result.original_tokens - result.compressed_tokens
+        with self._lock:
+            self.requests += 1
+            self.original_tokens += result.original_tokens
+            self.compressed_tokens += result.compressed_tokens
+            self.compression_seconds += result.seconds
+            self.latency_saved_seconds += removed * seconds_per_token
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "ratio": (
+                round(self.compressed_tokens / self.original_tokens, 4)
+                if self.original_tokens
+                else 1.0
+            ),
+            "tokens_removed": self.original_tokens - self.compressed_tokens,
+            "avg_compression_ms": (
+                round(self.compression_seconds / self.requests * 1000, 3)
+                if self.requests
+                else 0.0
+            ),
+            "estimated_latency_saved_seconds": round(self.latency_saved_seconds, 3),
+        }
+
+
+def compress_context(
+    query: str,
+    chunks: Sequence[str],
+    chunk_scores: Sequence[float],
+    token_cap: int,
+    neighbours: int = 1,
+    lexical_weight: float = 0.5,
+) -> CompressedContext:
+    """Keep the sentences of *chunks* most relevant to *query* within *token_cap*.
+
+    Args:
+        query: The user question.
+        chunks: Retrieved chunks, most relevant first.
+        chunk_scores: Query similarity of each chunk; missing scores count
+            as zero.
+        token_cap: Approximate token budget of the compressed context.
+        neighbours: Sentences kept on each side of a selected sentence.
+        lexical_weight: Weight of query-term overlap against chunk similarity.
+
+    Returns:
+        The selected sentences in document order, one line per chunk. The
+        chunks are returned unchanged when they already fit *token_cap*.
+    """
+    start = time.perf_counter()
+    original = "\n".join(chunks)
+    original_tokens = estimate_tokens(original)
+    if original_tokens <= token_cap:
+        return CompressedContext(
+            original, original_tokens, original_tokens, time.perf_counter() - start
+        )
+
+    sentences: List[str] = []
+    owner: List[int] = []
+    for index, chunk in enumerate(chunks):
+        parts = split_sentences(chunk)
+        sentences.extend(parts)
+        owner.extend([index] * len(parts))
+    owners = np.asarray(owner)
+
+    query_terms = sorted(set(tokenize(query)))
+    if query_terms:
+        positions = {term: i for i, term in enumerate(query_terms)}
+        incidence = np.zeros((len(sentences), len(query_terms)), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for term in tokenize(sentence):
+                column = positions.get(term)
+                if column is not None:
+                    incidence[row, column] = 1.0
+        idf = np.log1p(len(sentences) / (1.0 + incidence.sum(axis=0)))
+        overlap = incidence @ idf / float(idf.sum())
+    else:
+        overlap = np.zeros(len(sentences), dtype=np.float32)
+    scores_by_chunk = np.zeros(len(chunks), dtype=np.float32)
+    scores_by_chunk[: len(chunk_scores)] = np.asarray(
+        chunk_scores[: len(chunks)], dtype=np.float32
+    )
+    scores = (1.0 - lexical_weight) * scores_by_chunk[owners] + lexical_weight * overlap
+
+    costs = [estimate_tokens(sentence) for sentence in sentences]
+    keep = np.zeros(len(sentences), dtype=bool)
+    used = 0
+    for best in np.argsort(-scores, kind="stable"):
+        low, high = best - neighbours, best + neighbours + 1
+        window = [
+            i
+            for i in range(max(low, 0), min(high, len(sentences)))
+            if owners[i] == owners[best] and not keep[i]
+        ]
+        cost = sum(costs[i] for i in window)
+        if used + cost > token_cap:
+            if used:
+                continue
+            window = [best]
+            cost = costs[best]
+        keep[window] = True
+        used += cost
+        if used >= token_cap:
+            break
+
+    lines = [
+        " ".join(sentences[i] for i in np.flatnonzero(keep & (owners == index)))
+        for index in range(len(chunks))
+    ]
+    text = "\n".join(line for line in lines if line)
+    return CompressedContext(
+        text, original_tokens, estimate_tokens(text), time.perf_counter() - start
+    )
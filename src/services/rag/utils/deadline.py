@@ -0,0 +1,40 @@
+"""
+Per-request deadlines.
+
+The admission middleware sets a deadline for each request in a context
+variable. The chat engine checks it before each upstream stage, so a request
+that can no longer finish in time is dropped before the model is called, and
+the governor caps the time it spends on upstream calls by what is left.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time before an upstream call."""
+
+
+def set_deadline(seconds: float) -> Token:
+    """Give the current request *seconds* from now; returns a token for `reset`."""
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Return the seconds left for the current request, or ``None`` if unbounded."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check(stage: str) -> None:
+    """Raise `DeadlineExceeded` if the current request has no time left for *stage*."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Request deadline passed before {stage}")
@@ -0,0 +1,148 @@
+"""
+Micro-batching of concurrent query embeddings.
+
+Query texts that arrive within ``window_ms`` of each other, up to
+``max_batch_size`` of them, are sent upstream as one embedding request, and
+each caller gets back its own vector. Most of the cost of a single-text
+request is the round trip, so batching raises throughput under load for a
+delay of at most one window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+
+EmbedFn = Callable[[List[str]], Awaitable[Sequence[Sequence[float]]]]
+
+_Entry = Tuple[str, "asyncio.Future[List[float]]", float]
+
+
+@dataclass
+class BatcherStats:
+    """Batch size distribution and time spent waiting for a batch to be sent."""
+
+    batches: int = 0
+    texts: int = 0
+    upstream_texts: int = 0
+    failures: int = 0
+    max_queue_delay_seconds: float = 0.0
+    size_histogram: Dict[int, int] = field(default_factory=dict)
+    _delays: Deque[float] = field(default_factory=lambda: deque(maxlen=1024))
+
+    def record(self, size: int, unique: int, delays: Sequence[float]) -> None:
+        self.batches += 1
+        self.texts += size
+        self.upstream_texts += unique
+        bucket = 1 << (size - 1).bit_length()
+        self.size_histogram[bucket] = self.size_histogram.get(bucket, 0) + 1
+        self._delays.extend(delays)
+        self.max_queue_delay_seconds = max(self.max_queue_delay_seconds, *delays)
+
+    def as_dict(self) -> Dict[str, Any]:
+        delays = np.array(self._delays) * 1000 if self._delays else np.zeros(1)
+        histogram = sorted(self.size_histogram.items())
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "upstream_texts": self.upstream_texts,
+            "failures": self.failures,
+            "avg_batch_size": round(self.texts / max(self.batches, 1), 2),
+            # Number of batches by size, bucketed up to the next power of two.
+            "batch_size_histogram": {f"<={size}": count for size, count in histogram},
+            "queue_delay_ms": {
+                "avg": round(float(delays.mean()), 3),
+                "p95": round(float(np.percentile(delays, 95)), 3),
+                "max": round(self.max_queue_delay_seconds * 1000, 3),
+            },
+        }
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent `embed_many` calls into batched calls to *embed*.
+
+    Identical texts within a batch are embedded once. A failed batch fails
+    every caller in it.
+    """
+
+    def __init__(
+        self, embed: EmbedFn, window_ms: float = 5.0, max_batch_size: int = 64
+    ):
+        self._embed = embed
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.stats = BatcherStats()
+        self._pending: List[_Entry] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Return one vector per text, embedded together with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future: asyncio.Future[List[float]] = loop.create_future()
+            self._pending.append((text, future, time.perf_counter()))
+            futures.append(future)
+        if len(self._pending) >= self.max_batch_size or not self.window_seconds:
+            self._flush()
+        elif self._pending and self._timer is None:
+            # Batches run outside any one caller's context, so no caller's
+            # request deadline applies to the shared call.
+            self._timer = loop.call_later(
+                self.window_seconds, self._flush, context=contextvars.Context()
+            )
+        return list(await asyncio.gather(*futures))
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        pending = [entry for entry in pending if not entry[1].done()]
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(pending), self.max_batch_size):
+            task = loop.create_task(
+                self._run(pending[start : start + self.max_batch_size]),
+                context=contextvars.Context(),
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_Entry]) -> None:
+        now = time.perf_counter()
+        unique = list(dict.fromkeys(text for text, _, _ in batch))
+        delays = [now - queued for _, _, queued in batch]
+        self.stats.record(len(batch), len(unique), delays)
+        try:
+            vectors = await self._embed(unique)
+        except Exception as e:
+            self.stats.failures += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text = dict(zip(unique, vectors))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(list(by_text[text]))
@@ -0,0 +1,245 @@
+"""
+Two-tier cache for query embeddings.
+
+Tier one is an in-process LRU, tier two is a SQLite file that survives
+restarts and can be shared by several workers. Keys are derived from the
+query text, NFC-normalized, case-folded and with collapsed whitespace,
+together with the embedding model and task type, so vectors produced for
+different tasks never mix. The disk tier is pruned to its TTL and size at
+startup and again every ``prune_every`` writes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Return *text* NFC-normalized, case-folded and with collapsed whitespace."""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def make_key(text: str, model: str, task_type: str) -> str:
+    """Return the cache key for *text* embedded with *model* and *task_type*."""
+    raw = f"{model}\x1f{task_type}\x1f{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the embedding cache."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class EmbeddingCache:
+    """LRU memory tier backed by a persistent SQLite tier, both with TTL eviction."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+        prune_every: int = 1000,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._puts_since_prune = 0
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = self._open(path)
+
+    @staticmethod
+    def _open(path: str) -> Optional[sqlite3.Connection]:
+        """Open the SQLite tier, disabling it if the file cannot be created."""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, vector BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_created ON embeddings(created)"
+            )
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache disabled ({path}): {e}")
+            return None
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def _remember(self, key: str, created: float, vector: List[float]) -> None:
+        self._memory[key] = (created, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached vector for *key*, or ``None`` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+                self.stats.evictions += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created, vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[0], now):
+                    vector = array("f", row[1]).tolist()
+                    self._remember(key, row[0], vector)
+                    self.stats.disk_hits += 1
+                    return vector
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, vector: Sequence[float]) -> None:
+        """Store *vector* under *key* in both tiers.
+
+        Each write commits on its own. With WAL and ``synchronous=NORMAL`` a
+        commit is an append to the WAL rather than an fsync, and committing
+        at once keeps the write lock short for other workers sharing the file.
+        """
+        now = time.time()
+        values = list(vector)
+        with self._lock:
+            self._remember(key, now, values)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, created, vector) "
+                    "VALUES (?, ?, ?)",
+                    (key, now, array("f", values).tobytes()),
+                )
+                self._conn.commit()
+                self._puts_since_prune += 1
+                if self.prune_every and self._puts_since_prune >= self.prune_every:
+                    removed = self._prune()
+                    if removed:
+                        logger.debug(f"Pruned {removed} embeddings from the disk cache")
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist embedding: {e}")
+
+    def prune(self) -> int:
+        """Drop expired and surplus rows from the disk tier; return rows removed."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._prune()
+
+    def _prune(self) -> int:
+        assert self._conn is not None
+        removed = 0
+        if self.ttl_seconds > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings WHERE created < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            removed += cursor.rowcount
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        removed += cursor.rowcount
+        self._conn.commit()
+        self._puts_since_prune = 0
+        self.stats.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache, or ``None`` when disabled."""
+    global _embedding_cache
+    settings = get_settings()
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            path=settings.EMBEDDING_CACHE_PATH or None,
+            max_disk_entries=settings.EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+        )
+        removed = _embedding_cache.prune()
+        if removed:
+            logger.info(f"Pruned {removed} stale embeddings from the disk cache")
+    return _embedding_cache
+
+
+def _lookup_counts() -> Dict[Tuple[str, ...], float]:
+    if _embedding_cache is None:
+        return {}
+    stats = _embedding_cache.stats
+    return {
+        ("embedding", "memory_hit"): stats.memory_hits,
+        ("embedding", "disk_hit"): stats.disk_hits,
+        ("embedding", "miss"): stats.misses,
+    }
+
+
+CACHE_LOOKUPS.add_callback(_lookup_counts)
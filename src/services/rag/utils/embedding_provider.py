@@ -0,0 +1,107 @@
+"""
+Async embedding providers.
+
+`GeminiEmbeddingProvider` calls the Gemini embedding API; `FakeEmbeddingProvider`
+returns deterministic vectors locally, with optional latency and failures, for
+tests and benchmarks. The provider is chosen by ``embedding.provider``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+from typing import TYPE_CHECKING, List, Optional, Protocol
+
+import numpy as np
+
+from src.utils.config import get_settings
+
+if TYPE_CHECKING:
+    from google import genai
+
+settings = get_settings()
+
+
+class EmbeddingProvider(Protocol):
+    """Embeds a batch of texts for a given task type.
+
+    ``identity`` names the vector space: vectors from providers with
+    different identities must not be mixed in one index or cache.
+    """
+
+    identity: str
+
+    async def embed(self, texts: List[str], task_type: str) -> List[List[float]]: ...
+
+
+class GeminiEmbeddingProvider:
+    """Embeddings from the Gemini API through the async client."""
+
+    def __init__(self, model: str, client: Optional[genai.Client] = None):
+        self.model = model
+        # The bare model name, as used in chunk ids before providers were keyed.
+        self.identity = model
+        self._client = client
+
+    @property
+    def client(self) -> genai.Client:
+        if self._client is None:
+            from src.services.rag.utils.gemini_client import get_gemini_client
+
+            self._client = get_gemini_client()
+        return self._client
+
+    async def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        from google.genai import types
+
+        response = await self.client.aio.models.embed_content(
+            model=self.model,
+            contents=list(texts),
+            config=types.EmbedContentConfig(task_type=task_type),
+        )
+        return [embedding.values for embedding in response.embeddings]
+
+
+class FakeEmbeddingProvider:
+    """Deterministic local embeddings with configurable latency and error rate.
+
+    The same text always maps to the same unit vector, seeded from its hash.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 768,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.dimensions = dimensions
+        self.identity = f"fake/{dimensions}"
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+    async def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ConnectionError("Injected embedding failure")
+        return [self.vector(text) for text in texts]
+
+
+def get_embedding_provider(model: str) -> EmbeddingProvider:
+    """Return the embedding provider configured by ``embedding.provider``."""
+    if settings.EMBEDDING_PROVIDER == "fake":
+        return FakeEmbeddingProvider(
+            latency_seconds=settings.EMBEDDING_FAKE_LATENCY_SECONDS,
+            error_rate=settings.EMBEDDING_FAKE_ERROR_RATE,
+        )
+    return GeminiEmbeddingProvider(model)
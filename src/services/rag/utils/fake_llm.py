@@ -0,0 +1,134 @@
+"""
+Local stand-in for the response model.
+
+`FakeChatModel` answers without network access after an injected latency,
+with an optional slow tail, injected failures and a token rate, so the
+governor, the API and the benchmarks can be exercised offline. Selected with
+``model.provider: "fake"``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from src.services.rag.utils.governor import UpstreamError
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model replying with a fixed text after a configurable delay.
+
+    Each call waits ``latency_seconds``, or ``slow_latency_seconds`` with
+    probability ``slow_rate``, then fails with a 429 with probability
+    ``rate_limit_rate`` or a 503 with probability ``error_rate``. With a
+    ``capacity``, calls beyond that many in flight are rejected with a 429
+    straight away, like a provider quota. With ``tokens_per_second`` each
+    word of the reply takes that long to generate, streamed or not.
+    """
+
+    response: str = "এটি একটি পরীক্ষামূলক উত্তর।"
+    latency_seconds: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency_seconds: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    capacity: int = 0
+    tokens_per_second: float = 0.0
+    seed: int = 0
+    calls: int = 0
+    _random: random.Random = PrivateAttr()
+    _in_flight: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _admit(self) -> float:
+        """Count the call and return how long it takes, or reject it over capacity."""
+        self.calls += 1
+        if self.capacity and self._in_flight >= self.capacity:
+            raise UpstreamError("Injected quota exceeded", code=429)
+        slow = self.slow_rate and self._random.random() < self.slow_rate
+        return self.slow_latency_seconds if slow else self.latency_seconds
+
+    def _inject_failure(self) -> None:
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            raise UpstreamError("Injected rate limit", code=429)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise UpstreamError("Injected upstream failure", code=503)
+
+    async def _call_upstream(self) -> None:
+        latency = self._admit()
+        self._in_flight += 1
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self._in_flight -= 1
+        self._inject_failure()
+
+    def _call_upstream_sync(self) -> None:
+        latency = self._admit()
+        self._in_flight += 1
+        try:
+            time.sleep(latency)
+        finally:
+            self._in_flight -= 1
+        self._inject_failure()
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._call_upstream_sync()
+        if self.tokens_per_second:
+            time.sleep(len(self.response.split(" ")) / self.tokens_per_second)
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await self._call_upstream()
+        if self.tokens_per_second:
+            await asyncio.sleep(len(self.response.split(" ")) / self.tokens_per_second)
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await self._call_upstream()
+        for i, word in enumerate(self.response.split(" ")):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=word if i == 0 else f" {word}")
+            )
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,143 @@
+"""
+Gemini response model over the shared client.
+
+`GeminiChatModel` calls the Gemini API through the process-wide client from
+`gemini_client`, so replies are generated and streamed over the same pooled
+keep-alive connections as embeddings. The async methods serve the API; the
+sync ``invoke`` path uses the client's blocking calls. It takes the place of
+``langchain_google_genai.ChatGoogleGenerativeAI``, which opens its own client
+per model and retries internally underneath the governor.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    SystemMessage,
+)
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.services.rag.utils.gemini_client import get_gemini_client
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+
+def _usage(response: types.GenerateContentResponse) -> Optional[UsageMetadata]:
+    usage = response.usage_metadata
+    if usage is None:
+        return None
+    input_tokens = usage.prompt_token_count or 0
+    output_tokens = usage.candidates_token_count or 0
+    return UsageMetadata(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        total_tokens=usage.total_token_count or input_tokens + output_tokens,
+    )
+
+
+class GeminiChatModel(BaseChatModel):
+    """Gemini chat model over the shared client.
+
+    System messages become the system instruction; human and AI messages
+    become ``user`` and ``model`` turns. Thinking is disabled.
+    """
+
+    model: str
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini"
+
+    def _request(
+        self, messages: List[BaseMessage], stop: Optional[List[str]]
+    ) -> Tuple[List[types.Content], types.GenerateContentConfig]:
+        from google.genai import types
+
+        system = [m.text() for m in messages if isinstance(m, SystemMessage)]
+        contents = [
+            types.Content(
+                role="model" if isinstance(m, AIMessage) else "user",
+                parts=[types.Part.from_text(text=m.text())],
+            )
+            for m in messages
+            if not isinstance(m, SystemMessage)
+        ]
+        config = types.GenerateContentConfig(
+            system_instruction="\n\n".join(system) or None,
+            temperature=self.temperature,
+            stop_sequences=stop,
+            thinking_config=types.ThinkingConfig(thinking_budget=0),
+        )
+        return contents, config
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        contents, config = self._request(messages, stop)
+        response = get_gemini_client().models.generate_content(
+            model=self.model, contents=contents, config=config
+        )
+        message = AIMessage(
+            content=response.text or "", usage_metadata=_usage(response)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        contents, config = self._request(messages, stop)
+        response = await get_gemini_client().aio.models.generate_content(
+            model=self.model, contents=contents, config=config
+        )
+        message = AIMessage(
+            content=response.text or "", usage_metadata=_usage(response)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        contents, config = self._request(messages, stop)
+        stream = await get_gemini_client().aio.models.generate_content_stream(
+            model=self.model, contents=contents, config=config
+        )
+        usage = None
+        async for response in stream:
+            # Every chunk carries the running totals, and merged chunks add up
+            # their usage, so it is reported once after the last chunk.
+            usage = _usage(response) or usage
+            text = response.text or ""
+            if not text:
+                continue
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        if usage is not None:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", usage_metadata=usage)
+            )
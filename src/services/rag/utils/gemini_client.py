@@ -0,0 +1,173 @@
+"""
+Process-wide Gemini API client.
+
+One `genai.Client` is created on first use and shared by query and document
+embedding, PDF extraction and the response model. Its async API runs over a
+single pooled httpx client with keep-alive, so concurrent calls reuse warm
+connections instead of each paying for a TCP and TLS handshake. The pool is
+instrumented: `pool_stats` reports requests, new versus reused connections
+and how often a request found every connection busy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from google import genai
+
+logger = get_logger(__name__)
+
+_client: Optional[genai.Client] = None
+_client_lock = threading.Lock()
+
+
+@dataclass
+class PoolStats:
+    """Request and connection counters for the shared HTTP connection pool."""
+
+    max_connections: int = 0
+    requests: int = 0
+    new_connections: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    saturated: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "max_connections": self.max_connections,
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            # Requests that arrived with every pooled connection already busy.
+            "saturated": self.saturated,
+            "errors": self.errors,
+        }
+
+
+_stats = PoolStats()
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """Response body that marks its request finished once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, stats: PoolStats):
+        self._stream = stream
+        self._stats = stats
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._stats.in_flight -= 1
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Pooled keep-alive transport that counts requests and new connections.
+
+    A request holds its connection until the response body is closed, which
+    for a streamed reply is the end of the stream. Connections cannot outlive
+    their event loop, so each loop gets its own pool; the server runs one loop,
+    while scripts that call ``asyncio.run`` repeatedly get a fresh pool each time.
+    """
+
+    def __init__(self, limits: httpx.Limits, stats: PoolStats):
+        self._limits = limits
+        self._transports: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport
+        ] = weakref.WeakKeyDictionary()
+        self._stats = stats
+        stats.max_connections = limits.max_connections or 0
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self._limits)
+            self._transports[loop] = transport
+        return transport
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self._stats.new_connections += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        stats.requests += 1
+        if stats.max_connections and stats.in_flight >= stats.max_connections:
+            stats.saturated += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        request.extensions = {**request.extensions, "trace": self._trace}
+        try:
+            response = await self._transport().handle_async_request(request)
+        except BaseException:
+            stats.in_flight -= 1
+            stats.errors += 1
+            raise
+        response.stream = _CountedStream(response.stream, stats)  # type: ignore[arg-type]
+        return response
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _create_client() -> genai.Client:
+    from google import genai
+    from google.genai import types
+
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.GEMINI_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GEMINI_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GEMINI_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    async_client = httpx.AsyncClient(
+        transport=InstrumentedTransport(limits, _stats), timeout=None
+    )
+    logger.info(
+        f"Creating shared Gemini client "
+        f"(max {settings.GEMINI_CLIENT_MAX_CONNECTIONS} connections)"
+    )
+    return genai.Client(
+        api_key=settings.GEMINI_API_KEY,
+        http_options=types.HttpOptions(httpx_async_client=async_client),
+    )
+
+
+def get_gemini_client() -> genai.Client:
+    """Return the process-wide Gemini client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def pool_stats() -> Optional[Dict[str, Any]]:
+    """Return the connection pool counters, or ``None`` before first use."""
+    return _stats.as_dict() if _client is not None else None
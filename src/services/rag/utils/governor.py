@@ -0,0 +1,422 @@
+"""
+Client-side governor for upstream model calls.
+
+Calls to the response model and the embedding API go through a `Governor`,
+which:
+
+- bounds concurrency with an AIMD limit: the limit grows by about one per
+  limit's worth of successful calls and is multiplied by ``backoff_ratio``
+  on a rate limit, a timeout or a call slower than the latency target;
+- gives every call a deadline covering all of its attempts, capped by the
+  time left for the current request, and sheds the call outright when that
+  is less than the typical latency;
+- retries transient failures with full-jitter exponential backoff;
+- optionally hedges: when an attempt outlasts a percentile of recent
+  latencies, a second attempt is started and the first to succeed wins.
+
+The callable passed to `Governor.call` receives the attempt number, 0 for the
+first attempt, so callers can treat retries and hedges differently. A caller
+whose first attempt has side effects, such as tokens already streamed to a
+client, passes a *committed* check; once it is true the call is neither
+retried nor hedged and the first attempt's outcome is final.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import numpy as np
+
+from src.services.rag.utils import deadline as request_deadline
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.metrics import Counter
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """An upstream failure carrying an HTTP status code, as the provider SDKs do."""
+
+    def __init__(self, message: str, code: int):
+        super().__init__(message)
+        self.code = code
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Return the HTTP status code carried by a provider exception, if any."""
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return int(value)
+    return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return status_code(error) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return status_code(error) in _RETRYABLE_CODES or is_rate_limited(error)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Each acquisition returns the number of decreases so far. A congestion
+    signal from a call admitted before the latest decrease is ignored, so one
+    burst of failures halves the limit once rather than once per failure.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self.decreases = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+
+    async def acquire(self) -> int:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return self.decreases
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller was cancelled.
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return self.decreases
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_congestion(self, admitted_at: int) -> None:
+        if admitted_at != self.decreases:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        self.decreases += 1
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+@dataclass
+class GovernorStats:
+    """Outcome counters for the calls made through a governor."""
+
+    calls: int = 0
+    failures: int = 0
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    rate_limited: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    shed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rate_limited": self.rate_limited,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "shed": self.shed,
+        }
+
+
+class Governor:
+    """Runs upstream calls under an adaptive limit, a deadline, retries and hedging."""
+
+    def __init__(
+        self,
+        name: str,
+        timeout_seconds: float,
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0,
+        latency_target_seconds: float = 0.0,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.latency_target_seconds = latency_target_seconds
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter if limiter is not None else AdaptiveLimiter(8)
+        self.stats = GovernorStats()
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self._random = random.Random()
+
+    async def call(
+        self,
+        fn: Callable[[int], Awaitable[T]],
+        timeout_seconds: Optional[float] = None,
+        committed: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """Return ``await fn(attempt)``, retried and hedged within one deadline.
+
+        The deadline is *timeout_seconds*, or the governor's default, capped by
+        the time left for the current request; running out of the latter raises
+        `DeadlineExceeded` rather than a timeout. Time spent waiting for a
+        limiter slot counts against it. Once *committed* returns true, the
+        first attempt is awaited alone and its failure is not retried.
+        """
+        loop = asyncio.get_running_loop()
+        budget = timeout_seconds or self.timeout_seconds
+        left = request_deadline.remaining()
+        capped = False
+        if left is not None and left < budget:
+            budget, capped = left, True
+        deadline = loop.time() + budget
+        attempts = itertools.count()
+        self.stats.calls += 1
+        if capped and budget < self.typical_latency():
+            self.stats.shed += 1
+            raise request_deadline.DeadlineExceeded(
+                f"Too little time left for a {self.name} call"
+            )
+        retry = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"{self.name} call missed its deadline")
+                return await self._hedged(fn, attempts, remaining, committed)
+            except Exception as e:
+                delay = self._random.uniform(0, self.retry_delay * 2**retry)
+                if (
+                    retry >= self.retry_attempts
+                    or not is_retryable(e)
+                    or (committed is not None and committed())
+                    or loop.time() + delay >= deadline
+                ):
+                    self.stats.failures += 1
+                    if capped and isinstance(e, asyncio.TimeoutError):
+                        raise request_deadline.DeadlineExceeded(
+                            f"Request deadline passed during {self.name} call"
+                        ) from e
+                    raise
+                self.stats.retries += 1
+                logger.warning(
+                    f"{self.name} call failed ({type(e).__name__}: {e}); "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                retry += 1
+
+    def typical_latency(self) -> float:
+        """Return the median latency of recent attempts, or 0 with too few samples."""
+        if len(self._latencies) < self.hedge_min_samples:
+            return 0.0
+        return float(np.median(self._latencies))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or ``None`` to not hedge."""
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(self._latencies, self.hedge_percentile))
+
+    async def _hedged(
+        self,
+        fn: Callable[[int], Awaitable[T]],
+        attempts: Iterator[int],
+        timeout: float,
+        committed: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            return await self._attempt(fn, next(attempts), timeout)
+
+        start = time.perf_counter()
+        first = asyncio.ensure_future(self._attempt(fn, next(attempts), timeout))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or (committed is not None and committed()):
+                return await first
+            self.stats.hedges += 1
+            remaining = timeout - (time.perf_counter() - start)
+            second = asyncio.ensure_future(
+                self._attempt(fn, next(attempts), remaining)
+            )
+            tasks.append(second)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                if committed is not None and committed():
+                    # The first attempt's output is already out; only it counts.
+                    second.cancel()
+                    return await first
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _attempt(
+        self, fn: Callable[[int], Awaitable[T]], attempt: int, timeout: float
+    ) -> T:
+        # Waiting for a slot counts against the same deadline as the call. A
+        # timeout there is counted, but it is not an upstream congestion signal.
+        queued_at = time.perf_counter()
+        try:
+            admitted_at = await asyncio.wait_for(self.limiter.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.attempts += 1
+        start = time.perf_counter()
+        try:
+            remaining = timeout - (start - queued_at)
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"{self.name} call missed its deadline")
+            result = await asyncio.wait_for(fn(attempt), remaining)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            self.limiter.on_congestion(admitted_at)
+            raise
+        except Exception as e:
+            if is_rate_limited(e):
+                self.stats.rate_limited += 1
+                self.limiter.on_congestion(admitted_at)
+            raise
+        finally:
+            self.limiter.release()
+        latency = time.perf_counter() - start
+        self._latencies.append(latency)
+        if self.latency_target_seconds and latency > self.latency_target_seconds:
+            self.limiter.on_congestion(admitted_at)
+        else:
+            self.limiter.on_success()
+        return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            **self.stats.as_dict(),
+            "limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+        }
+
+
+_governors: Dict[str, Governor] = {}
+
+
+def _create_governor(name: str) -> Governor:
+    settings = get_settings()
+    timeout: float
+    if name == "llm":
+        timeout = settings.MODEL_TIMEOUT_SECONDS
+        latency_target = settings.GOVERNOR_LLM_LATENCY_TARGET_SECONDS
+        hedge = settings.GOVERNOR_LLM_HEDGE
+    else:
+        timeout = settings.GOVERNOR_EMBEDDING_TIMEOUT_SECONDS
+        latency_target = settings.GOVERNOR_EMBEDDING_LATENCY_TARGET_SECONDS
+        hedge = settings.GOVERNOR_EMBEDDING_HEDGE
+    return Governor(
+        name,
+        timeout_seconds=timeout,
+        retry_attempts=settings.PROCESSING_RETRY_ATTEMPTS,
+        retry_delay=settings.PROCESSING_RETRY_DELAY,
+        latency_target_seconds=latency_target,
+        hedge=hedge,
+        hedge_percentile=settings.GOVERNOR_HEDGE_PERCENTILE,
+        hedge_min_samples=settings.GOVERNOR_HEDGE_MIN_SAMPLES,
+        limiter=AdaptiveLimiter(
+            settings.GOVERNOR_INITIAL_LIMIT,
+            min_limit=settings.GOVERNOR_MIN_LIMIT,
+            max_limit=settings.GOVERNOR_MAX_LIMIT,
+            backoff_ratio=settings.GOVERNOR_BACKOFF_RATIO,
+        ),
+    )
+
+
+def get_governor(name: str) -> Optional[Governor]:
+    """Return the process-wide governor for ``"llm"`` or ``"embedding"`` calls.
+
+    Returns ``None`` when ``governor.enabled`` is off.
+    """
+    if not get_settings().GOVERNOR_ENABLED:
+        return None
+    if name not in _governors:
+        _governors[name] = _create_governor(name)
+    return _governors[name]
+
+
+def governor_stats() -> Dict[str, Any]:
+    """Return the counters of every governor created so far."""
+    return {name: governor.as_dict() for name, governor in _governors.items()}
+
+
+UPSTREAM_RETRIES = Counter(
+    "rag_upstream_retries_total", "Retried upstream calls.", ("upstream",)
+)
+UPSTREAM_RATE_LIMITED = Counter(
+    "rag_upstream_rate_limited_total",
+    "Upstream attempts rejected with 429 or RESOURCE_EXHAUSTED.",
+    ("upstream",),
+)
+UPSTREAM_RETRIES.add_callback(
+    lambda: {(name,): g.stats.retries for name, g in _governors.items()}
+)
+UPSTREAM_RATE_LIMITED.add_callback(
+    lambda: {(name,): g.stats.rate_limited for name, g in _governors.items()}
+)
@@ -0,0 +1,144 @@
+"""
+Conversation history budgeting.
+
+Keeps the prompt sent to the model bounded however long a session runs: only
+the most recent turns that fit a token budget are sent, older turns are
+removed from the thread state (optionally folded into a rolling summary), and
+sessions that go idle are evicted.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# Gemini does not expose a local tokenizer. Three characters per token is a
+# little pessimistic for English and close for Bengali, so budgets err on the
+# safe side.
+CHARS_PER_TOKEN = 3
+
+# Fixed per-message overhead for role markers.
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Return an approximate token count for *text*."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Return an approximate token count for one chat message."""
+    content = message.content
+    if not isinstance(content, str):
+        content = " ".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in content
+        )
+    return estimate_tokens(content) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def select_history(
+    messages: Sequence[BaseMessage], token_budget: int
+) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+    """Split *messages* into the recent ones that fit *token_budget* and the rest.
+
+    Messages are kept newest first until the budget is spent. The kept
+    history always starts on a human turn so the model never sees a reply
+    without its question, and the newest message is kept even if it alone
+    exceeds the budget.
+    """
+    kept = len(messages)
+    used = 0
+    for i in range(len(messages) - 1, -1, -1):
+        cost = message_tokens(messages[i])
+        if used + cost > token_budget and kept < len(messages):
+            break
+        used += cost
+        kept = i
+    while kept < len(messages) - 1 and not isinstance(messages[kept], HumanMessage):
+        kept += 1
+    return list(messages[kept:]), list(messages[:kept])
+
+
+@dataclass
+class PromptTokenStats:
+    """Prompt tokens sent per turn, over the last ``window`` turns for percentiles."""
+
+    window: int = 1000
+    turns: int = 0
+    total_tokens: int = 0
+    max_tokens: int = 0
+    trimmed_messages: int = 0
+    summaries: int = 0
+    _recent: Deque[int] = field(default_factory=deque, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, tokens: int) -> None:
+        with self._lock:
+            self.turns += 1
+            self.total_tokens += tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+            self._recent.append(tokens)
+            if len(self._recent) > self.window:
+                self._recent.popleft()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+        return {
+            "turns": self.turns,
+            "avg_prompt_tokens": (
+                round(self.total_tokens / self.turns, 1) if self.turns else 0.0
+            ),
+            "p50_prompt_tokens": recent[len(recent) // 2] if recent else 0,
+            "p95_prompt_tokens": (
+                recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0
+            ),
+            "max_prompt_tokens": self.max_tokens,
+            "trimmed_messages": self.trimmed_messages,
+            "summaries": self.summaries,
+        }
+
+
+class SessionTracker:
+    """Tracks session activity and reports sessions to evict by LRU and TTL.
+
+    The tracker only decides which sessions to drop; the caller deletes their
+    state from the checkpointer.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.evicted = 0
+        self._last_seen: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def touch(self, session_id: str) -> List[str]:
+        """Mark *session_id* as active and return the sessions to evict."""
+        now = time.monotonic()
+        evict: List[str] = []
+        with self._lock:
+            self._last_seen[session_id] = now
+            self._last_seen.move_to_end(session_id)
+            if self.ttl_seconds > 0:
+                for sid, last_seen in self._last_seen.items():
+                    if now - last_seen <= self.ttl_seconds:
+                        break
+                    evict.append(sid)
+            overflow = len(self._last_seen) - len(evict) - self.max_sessions
+            if overflow > 0:
+                evict.extend(list(self._last_seen)[len(evict) : len(evict) + overflow])
+            for sid in evict:
+                del self._last_seen[sid]
+            self.evicted += len(evict)
+        return evict
@@ -1,35 +1,38 @@
-from typing import Any, Callable, List, Optional
+from __future__ import annotations
 
-from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
-from google import genai
-from google.genai import types
-from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import TYPE_CHECKING, Optional
 
 from src.utils.config import get_settings
 from src.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    from src.services.rag.utils.gemini_chat import GeminiChatModel
+
 # mypy: disable-error-code="return-value,index"
 settings = get_settings()
 logger = get_logger(__name__)
 
 RESPONSE_MODEL = "gemini-2.5-flash"
 EMBEDDING_MODEL = "gemini-embedding-001"
+DOCUMENT_TASK_TYPE = "retrieval_document"
+QUERY_TASK_TYPE = "retrieval_query"
 
 
 def _create_gemini_model(
     model_name: str,
     temperature: float = 0.0,
     streaming: bool = False,
-) -> ChatGoogleGenerativeAI:
-    """Creates a ChatGoogleGenerativeAI model instance."""
+) -> GeminiChatModel:
+    """Creates a Gemini chat model on the shared Gemini client."""
+    from src.services.rag.utils.gemini_chat import GeminiChatModel
+
     logger.info(f"Creating Gemini model: {model_name}")
-    return ChatGoogleGenerativeAI(
+    return GeminiChatModel(
         model=model_name,
-        google_api_key=settings.GEMINI_API_KEY,
         temperature=temperature,
         disable_streaming=not streaming,
-        thinking_budget=0,
     )
 
 
@@ -39,9 +42,17 @@ def get_response_llm(
     """
     Returns an LLM for generating responses
 
-    Base: Gemini gemini-2.5-flash.
+    Base: Gemini gemini-2.5-flash, or a local fake with ``model.provider: "fake"``.
     """
     temp = temperature if temperature is not None else settings.MODEL_TEMPERATURE
+    if settings.MODEL_PROVIDER == "fake":
+        from src.services.rag.utils.fake_llm import FakeChatModel
+
+        return FakeChatModel(
+            latency_seconds=settings.MODEL_FAKE_LATENCY_SECONDS,
+            error_rate=settings.MODEL_FAKE_ERROR_RATE,
+            tokens_per_second=settings.MODEL_FAKE_TOKENS_PER_SECOND,
+        )
 
     base_llm = _create_gemini_model(
         model_name=RESPONSE_MODEL,
@@ -55,7 +66,7 @@ def get_gemini_model(
     model_name: str = RESPONSE_MODEL,
     temperature: float = 0.0,
     streaming: bool = False,
-) -> ChatGoogleGenerativeAI:
+) -> GeminiChatModel:
     """Convenience wrapper to create a Gemini chat model.
 
     This keeps backward-compatibility with earlier code that imported
@@ -64,18 +75,3 @@ def get_gemini_model(
     return _create_gemini_model(
         model_name, temperature=temperature, streaming=streaming
     )
-
-
-class GeminiEmbeddingFunction(EmbeddingFunction):
-    def __call__(self, input: Documents) -> Embeddings:
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        EMBEDDING_MODEL_ID = EMBEDDING_MODEL
-        title = "Custom query"
-        response = client.models.embed_content(
-            model=EMBEDDING_MODEL_ID,
-            contents=input,
-            config=types.EmbedContentConfig(
-                task_type="retrieval_document", title=title
-            ),
-        )
-        return [embedding.values for embedding in response.embeddings]
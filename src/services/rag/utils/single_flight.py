@@ -0,0 +1,96 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight computation
+instead of each calling upstream. The computation runs in its own task, so a
+cancelled caller stops waiting without cancelling it for the others; it is
+cancelled only once every caller has gone. Exceptions reach every caller.
+The task starts from an empty context, so the first caller's request
+deadline and other context variables do not apply to the shared call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Sequence, TypeVar
+
+from langchain_core.messages import BaseMessage
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """How many calls went upstream and how many joined one already in flight."""
+
+    calls: int = 0
+    shared: int = 0
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.shared / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.calls - self.shared,
+            "upstream_calls_saved": self.shared,
+            "saved_ratio": round(self.saved_ratio, 4),
+        }
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys within one event loop."""
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``fn()``, shared with concurrent calls for *key*."""
+        self.stats.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.get_running_loop().create_task(
+                fn(), context=contextvars.Context()
+            )
+            flight = _Flight(task)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats.shared += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+def messages_fingerprint(messages: Sequence[BaseMessage]) -> str:
+    """Return a digest of the roles and contents of a prompt's messages."""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(f"{message.type}\x1f{message.content}\x1e".encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,52 @@
+"""
+Build the prebuilt index artifact loaded at startup.
+
+Indexes ``data/processed.txt`` into ChromaDB (embedding only chunks not yet
+indexed) and exports the collection, with the source hash and the chunker and
+embedding-model parameters, to a compressed ``.npz`` file. If any chunk could
+not be embedded, no artifact is written and it exits with status 1. Run it
+as a build step before baking the image:
+
+    python -m src.utils.build_index --output data/index_artifact.npz
+"""
+
+import argparse
+import asyncio
+import sys
+
+from src.database.chroma_db import ChromaDBManager
+from src.utils.config import get_settings
+from src.utils.helper import export_index_artifact
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the prebuilt index artifact.")
+    parser.add_argument(
+        "--output",
+        default=settings.INGESTION_ARTIFACT_PATH,
+        help="Where to write the artifact (default: ingestion.artifact_path)",
+    )
+    parser.add_argument(
+        "--chroma-path",
+        default=settings.CHROMA_PATH,
+        help="ChromaDB directory to index into and export from "
+        "(default: chroma.path)",
+    )
+    args = parser.parse_args()
+    try:
+        artifact = asyncio.run(
+            export_index_artifact(args.output, ChromaDBManager(path=args.chroma_path))
+        )
+    except RuntimeError as e:
+        print(f"{args.output}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"{args.output}: {len(artifact.ids)} chunks, "
+        f"{artifact.embeddings.shape[1] if len(artifact.ids) else 0} dimensions, "
+        f"params {artifact.params}"
+    )
+
+
+if __name__ == "__main__":
+    main()
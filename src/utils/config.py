@@ -21,24 +21,126 @@ class Settings(BaseSettings):
     MODEL_NAME: str = Field(default="")
     MODEL_TEMPERATURE: float = Field(default=0.7)
     MODEL_TIMEOUT_SECONDS: int = Field(default=60)
+    MODEL_FAKE_LATENCY_SECONDS: float = Field(default=0.0)
+    MODEL_FAKE_ERROR_RATE: float = Field(default=0.0)
+    MODEL_FAKE_TOKENS_PER_SECOND: float = Field(default=0.0)
 
     PROCESSING_BATCH_SIZE: int = Field(default=1)
     PROCESSING_RETRY_ATTEMPTS: int = Field(default=3)
     PROCESSING_RETRY_DELAY: int = Field(default=1)
+    PROCESSING_PAGES_PER_CHUNK: int = Field(default=4)
+    PROCESSING_MAX_WORKERS: int = Field(default=4)
+    PROCESSING_CACHE_DIR: str = Field(default="data/.extract_cache")
 
     RATE_LIMIT_MAX_REQUESTS: int = Field(default=100)
     RATE_LIMIT_WINDOW_SECONDS: int = Field(default=3600)
+    RATE_LIMIT_BACKEND: str = Field(default="memory")
+    RATE_LIMIT_SQLITE_PATH: str = Field(default="cache/rate_limit.sqlite")
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=100000)
+
+    ADMISSION_ENABLED: bool = Field(default=True)
+    ADMISSION_MAX_IN_FLIGHT: int = Field(default=32)
+    ADMISSION_MAX_QUEUED: int = Field(default=128)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = Field(default=10.0)
+    ADMISSION_REQUEST_TIMEOUT_SECONDS: float = Field(default=90.0)
+    ADMISSION_LANES: Dict[str, int] = Field(
+        default_factory=lambda: {"interactive": 0, "batch": 1}
+    )
 
     EMBEDDING_PROVIDER: str = Field(default="")
     EMBEDDING_MODEL: str = Field(default="")
+    EMBEDDING_FAKE_LATENCY_SECONDS: float = Field(default=0.0)
+    EMBEDDING_FAKE_ERROR_RATE: float = Field(default=0.0)
+
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=10000)
+    EMBEDDING_CACHE_MAX_DISK_ENTRIES: int = Field(default=100000)
+    EMBEDDING_CACHE_TTL_SECONDS: int = Field(default=604800)
+    EMBEDDING_CACHE_PATH: str = Field(default="cache/embeddings.sqlite")
+
+    EMBEDDING_BATCHING_ENABLED: bool = Field(default=True)
+    EMBEDDING_BATCHING_WINDOW_MS: float = Field(default=5.0)
+    EMBEDDING_BATCHING_MAX_BATCH_SIZE: int = Field(default=64)
+
+    INGESTION_CHUNK_SIZE: int = Field(default=1000)
+    INGESTION_CHUNK_OVERLAP: int = Field(default=100)
+    INGESTION_EMBED_BATCH_SIZE: int = Field(default=100)
+    INGESTION_EMBED_CONCURRENCY: int = Field(default=4)
+    INGESTION_ARTIFACT_PATH: str = Field(default="data/index_artifact.npz")
+
+    CHECKPOINTER_BACKEND: str = Field(default="sqlite")
+    CHECKPOINTER_PATH: str = Field(default="cache/checkpoints.sqlite")
+    CHECKPOINTER_FLUSH_INTERVAL_MS: int = Field(default=50)
+    CHECKPOINTER_MAX_CHECKPOINTS_PER_THREAD: int = Field(default=10)
+    CHECKPOINTER_MAX_THREAD_AGE_SECONDS: int = Field(default=604800)
+    CHECKPOINTER_COMPACTION_INTERVAL_SECONDS: int = Field(default=300)
+
+    HISTORY_TOKEN_BUDGET: int = Field(default=2000)
+    HISTORY_STRATEGY: str = Field(default="trim")
+    HISTORY_MAX_SESSIONS: int = Field(default=10000)
+    HISTORY_SESSION_TTL_SECONDS: int = Field(default=3600)
+
+    SINGLE_FLIGHT_ENABLED: bool = Field(default=True)
+
+    GOVERNOR_ENABLED: bool = Field(default=True)
+    GOVERNOR_INITIAL_LIMIT: int = Field(default=8)
+    GOVERNOR_MIN_LIMIT: int = Field(default=1)
+    GOVERNOR_MAX_LIMIT: int = Field(default=64)
+    GOVERNOR_BACKOFF_RATIO: float = Field(default=0.5)
+    GOVERNOR_HEDGE_PERCENTILE: float = Field(default=95.0)
+    GOVERNOR_HEDGE_MIN_SAMPLES: int = Field(default=20)
+    GOVERNOR_LLM_LATENCY_TARGET_SECONDS: float = Field(default=20.0)
+    GOVERNOR_LLM_HEDGE: bool = Field(default=False)
+    GOVERNOR_EMBEDDING_TIMEOUT_SECONDS: float = Field(default=10.0)
+    GOVERNOR_EMBEDDING_LATENCY_TARGET_SECONDS: float = Field(default=2.0)
+    GOVERNOR_EMBEDDING_HEDGE: bool = Field(default=True)
+
+    GEMINI_CLIENT_MAX_CONNECTIONS: int = Field(default=64)
+    GEMINI_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=32)
+    GEMINI_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=60.0)
+
+    METRICS_ENABLED: bool = Field(default=True)
+    METRICS_MULTIPROCESS_DIR: str = Field(default="cache/metrics")
+    METRICS_FLUSH_INTERVAL_SECONDS: float = Field(default=5.0)
+
+    BATCH_MAX_SIZE: int = Field(default=500)
+    BATCH_MAX_CONCURRENCY: int = Field(default=8)
+
+    ANSWER_CACHE_ENABLED: bool = Field(default=True)
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = Field(default=0.95)
+    ANSWER_CACHE_MAX_ENTRIES: int = Field(default=1000)
+    ANSWER_CACHE_TTL_SECONDS: int = Field(default=3600)
+
+    RETRIEVAL_N_RESULTS: int = Field(default=2)
+    RETRIEVAL_ENGINE: str = Field(default="chroma")
+    RETRIEVAL_QUANTIZATION: str = Field(default="none")
+    RETRIEVAL_INDEX_DIR: str = Field(default="cache/vector_index")
+    RETRIEVAL_HYBRID: bool = Field(default=True)
+    RETRIEVAL_CANDIDATES: int = Field(default=10)
+    RETRIEVAL_RRF_K: int = Field(default=60)
+    RETRIEVAL_BM25_K1: float = Field(default=1.5)
+    RETRIEVAL_BM25_B: float = Field(default=0.75)
+    RETRIEVAL_CONTEXT_TOKEN_BUDGET: int = Field(default=800)
+    RETRIEVAL_MAX_CHUNKS: int = Field(default=5)
+    RETRIEVAL_MMR_LAMBDA: float = Field(default=0.7)
+    RETRIEVAL_DUPLICATE_THRESHOLD: float = Field(default=0.95)
+
+    COMPRESSION_ENABLED: bool = Field(default=False)
+    COMPRESSION_TOKEN_CAP: int = Field(default=300)
+    COMPRESSION_NEIGHBOURS: int = Field(default=1)
+    COMPRESSION_LEXICAL_WEIGHT: float = Field(default=0.5)
 
     CHROMA_HOST: str = Field(default="localhost")
+    CHROMA_PATH: str = Field(default="/app/chroma_data")
 
     IO_DATA_DIR: str = Field(default="data")
     IO_ENCODING: str = Field(default="utf-8")
 
     LOG_LEVEL: str = Field(default="INFO")
     LOG_FILE: str = Field(default="logs/log.txt")
+    LOG_FORMAT: str = Field(default="text")
+    LOG_QUEUE_SIZE: int = Field(default=10000)
+    LOG_ACCESS: bool = Field(default=True)
 
     HOST: str = Field(default="0.0.0.0")
     PORT: int = Field(default=8000)
@@ -60,7 +162,8 @@ def load_yaml_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     Load configuration from YAML file.
 
     Args:
-        config_path: Path to the config.yaml file
+        config_path: Path to the config.yaml file; defaults to ``$CONFIG_PATH``,
+            then the first of the usual locations that exists
 
     Returns:
         Configuration dictionary
@@ -68,6 +171,8 @@ def load_yaml_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     Raises:
         FileNotFoundError: If the config file cannot be found
     """
+    config_path = config_path or os.environ.get("CONFIG_PATH")
+    possible_paths = [config_path] if config_path else []
     if not config_path:
         possible_paths = [
             "config.yaml",
@@ -118,6 +223,16 @@ def get_settings() -> Settings:
             _settings_instance.MODEL_TIMEOUT_SECONDS = model_config.get(
                 "timeout_seconds", 60
             )
+            fake_model_config = model_config.get("fake") or {}
+            _settings_instance.MODEL_FAKE_LATENCY_SECONDS = fake_model_config.get(
+                "latency_seconds", 0.0
+            )
+            _settings_instance.MODEL_FAKE_ERROR_RATE = fake_model_config.get(
+                "error_rate", 0.0
+            )
+            _settings_instance.MODEL_FAKE_TOKENS_PER_SECOND = fake_model_config.get(
+                "tokens_per_second", 0.0
+            )
 
         if "processing" in yaml_config:
             proc_config = yaml_config["processing"]
@@ -128,6 +243,15 @@ def get_settings() -> Settings:
             _settings_instance.PROCESSING_RETRY_DELAY = proc_config.get(
                 "retry_delay", 1
             )
+            _settings_instance.PROCESSING_PAGES_PER_CHUNK = proc_config.get(
+                "pages_per_chunk", 4
+            )
+            _settings_instance.PROCESSING_MAX_WORKERS = proc_config.get(
+                "max_workers", 4
+            )
+            _settings_instance.PROCESSING_CACHE_DIR = proc_config.get(
+                "cache_dir", "data/.extract_cache"
+            )
 
         if "rate_limit" in yaml_config:
             rl_config = yaml_config["rate_limit"]
@@ -137,15 +261,256 @@ def get_settings() -> Settings:
             _settings_instance.RATE_LIMIT_WINDOW_SECONDS = rl_config.get(
                 "window_seconds", 3600
             )
+            _settings_instance.RATE_LIMIT_BACKEND = rl_config.get("backend", "memory")
+            _settings_instance.RATE_LIMIT_SQLITE_PATH = rl_config.get(
+                "sqlite_path", "cache/rate_limit.sqlite"
+            )
+            _settings_instance.RATE_LIMIT_MAX_CLIENTS = rl_config.get(
+                "max_clients", 100000
+            )
+
+        if "admission" in yaml_config:
+            admission_config = yaml_config["admission"]
+            _settings_instance.ADMISSION_ENABLED = admission_config.get("enabled", True)
+            _settings_instance.ADMISSION_MAX_IN_FLIGHT = admission_config.get(
+                "max_in_flight", 32
+            )
+            _settings_instance.ADMISSION_MAX_QUEUED = admission_config.get(
+                "max_queued", 128
+            )
+            _settings_instance.ADMISSION_QUEUE_TIMEOUT_SECONDS = admission_config.get(
+                "queue_timeout_seconds", 10.0
+            )
+            _settings_instance.ADMISSION_REQUEST_TIMEOUT_SECONDS = (
+                admission_config.get("request_timeout_seconds", 90.0)
+            )
+            _settings_instance.ADMISSION_LANES = admission_config.get(
+                "lanes", {"interactive": 0, "batch": 1}
+            )
 
         if "chroma" in yaml_config:
             chroma_config = yaml_config["chroma"]
             _settings_instance.CHROMA_HOST = chroma_config.get("host", "localhost")
+            _settings_instance.CHROMA_PATH = chroma_config.get(
+                "path", "/app/chroma_data"
+            )
 
         if "embedding" in yaml_config:
             embed_config = yaml_config["embedding"]
             _settings_instance.EMBEDDING_PROVIDER = embed_config.get("provider", "")
             _settings_instance.EMBEDDING_MODEL = embed_config.get("model", "")
+            fake_embed_config = embed_config.get("fake") or {}
+            _settings_instance.EMBEDDING_FAKE_LATENCY_SECONDS = fake_embed_config.get(
+                "latency_seconds", 0.0
+            )
+            _settings_instance.EMBEDDING_FAKE_ERROR_RATE = fake_embed_config.get(
+                "error_rate", 0.0
+            )
+            cache_config = embed_config.get("cache") or {}
+            _settings_instance.EMBEDDING_CACHE_ENABLED = cache_config.get(
+                "enabled", True
+            )
+            _settings_instance.EMBEDDING_CACHE_MAX_ENTRIES = cache_config.get(
+                "max_entries", 10000
+            )
+            _settings_instance.EMBEDDING_CACHE_MAX_DISK_ENTRIES = cache_config.get(
+                "max_disk_entries", 100000
+            )
+            _settings_instance.EMBEDDING_CACHE_TTL_SECONDS = cache_config.get(
+                "ttl_seconds", 604800
+            )
+            _settings_instance.EMBEDDING_CACHE_PATH = cache_config.get(
+                "path", "cache/embeddings.sqlite"
+            )
+            batching_config = embed_config.get("batching") or {}
+            _settings_instance.EMBEDDING_BATCHING_ENABLED = batching_config.get(
+                "enabled", True
+            )
+            _settings_instance.EMBEDDING_BATCHING_WINDOW_MS = batching_config.get(
+                "window_ms", 5.0
+            )
+            _settings_instance.EMBEDDING_BATCHING_MAX_BATCH_SIZE = batching_config.get(
+                "max_batch_size", 64
+            )
+
+        if "ingestion" in yaml_config:
+            ingestion_config = yaml_config["ingestion"]
+            _settings_instance.INGESTION_CHUNK_SIZE = ingestion_config.get(
+                "chunk_size", 1000
+            )
+            _settings_instance.INGESTION_CHUNK_OVERLAP = ingestion_config.get(
+                "chunk_overlap", 100
+            )
+            _settings_instance.INGESTION_EMBED_BATCH_SIZE = ingestion_config.get(
+                "embed_batch_size", 100
+            )
+            _settings_instance.INGESTION_EMBED_CONCURRENCY = ingestion_config.get(
+                "embed_concurrency", 4
+            )
+            _settings_instance.INGESTION_ARTIFACT_PATH = ingestion_config.get(
+                "artifact_path", "data/index_artifact.npz"
+            )
+
+        if "checkpointer" in yaml_config:
+            cp_config = yaml_config["checkpointer"]
+            _settings_instance.CHECKPOINTER_BACKEND = cp_config.get("backend", "sqlite")
+            _settings_instance.CHECKPOINTER_PATH = cp_config.get(
+                "path", "cache/checkpoints.sqlite"
+            )
+            _settings_instance.CHECKPOINTER_FLUSH_INTERVAL_MS = cp_config.get(
+                "flush_interval_ms", 50
+            )
+            _settings_instance.CHECKPOINTER_MAX_CHECKPOINTS_PER_THREAD = cp_config.get(
+                "max_checkpoints_per_thread", 10
+            )
+            _settings_instance.CHECKPOINTER_MAX_THREAD_AGE_SECONDS = cp_config.get(
+                "max_thread_age_seconds", 604800
+            )
+            _settings_instance.CHECKPOINTER_COMPACTION_INTERVAL_SECONDS = (
+                cp_config.get("compaction_interval_seconds", 300)
+            )
+
+        if "history" in yaml_config:
+            history_config = yaml_config["history"]
+            _settings_instance.HISTORY_TOKEN_BUDGET = history_config.get(
+                "token_budget", 2000
+            )
+            _settings_instance.HISTORY_STRATEGY = history_config.get("strategy", "trim")
+            _settings_instance.HISTORY_MAX_SESSIONS = history_config.get(
+                "max_sessions", 10000
+            )
+            _settings_instance.HISTORY_SESSION_TTL_SECONDS = history_config.get(
+                "session_ttl_seconds", 3600
+            )
+
+        if "single_flight" in yaml_config:
+            _settings_instance.SINGLE_FLIGHT_ENABLED = yaml_config["single_flight"].get(
+                "enabled", True
+            )
+
+        if "governor" in yaml_config:
+            gov_config = yaml_config["governor"]
+            _settings_instance.GOVERNOR_ENABLED = gov_config.get("enabled", True)
+            _settings_instance.GOVERNOR_INITIAL_LIMIT = gov_config.get(
+                "initial_limit", 8
+            )
+            _settings_instance.GOVERNOR_MIN_LIMIT = gov_config.get("min_limit", 1)
+            _settings_instance.GOVERNOR_MAX_LIMIT = gov_config.get("max_limit", 64)
+            _settings_instance.GOVERNOR_BACKOFF_RATIO = gov_config.get(
+                "backoff_ratio", 0.5
+            )
+            _settings_instance.GOVERNOR_HEDGE_PERCENTILE = gov_config.get(
+                "hedge_percentile", 95.0
+            )
+            _settings_instance.GOVERNOR_HEDGE_MIN_SAMPLES = gov_config.get(
+                "hedge_min_samples", 20
+            )
+            llm_config = gov_config.get("llm") or {}
+            _settings_instance.GOVERNOR_LLM_LATENCY_TARGET_SECONDS = llm_config.get(
+                "latency_target_seconds", 20.0
+            )
+            _settings_instance.GOVERNOR_LLM_HEDGE = llm_config.get("hedge", False)
+            gov_embed_config = gov_config.get("embedding") or {}
+            _settings_instance.GOVERNOR_EMBEDDING_TIMEOUT_SECONDS = (
+                gov_embed_config.get("timeout_seconds", 10.0)
+            )
+            _settings_instance.GOVERNOR_EMBEDDING_LATENCY_TARGET_SECONDS = (
+                gov_embed_config.get("latency_target_seconds", 2.0)
+            )
+            _settings_instance.GOVERNOR_EMBEDDING_HEDGE = gov_embed_config.get(
+                "hedge", True
+            )
+
+        if "gemini_client" in yaml_config:
+            client_config = yaml_config["gemini_client"]
+            _settings_instance.GEMINI_CLIENT_MAX_CONNECTIONS = client_config.get(
+                "max_connections", 64
+            )
+            _settings_instance.GEMINI_CLIENT_MAX_KEEPALIVE_CONNECTIONS = (
+                client_config.get("max_keepalive_connections", 32)
+            )
+            _settings_instance.GEMINI_CLIENT_KEEPALIVE_EXPIRY_SECONDS = (
+                client_config.get("keepalive_expiry_seconds", 60.0)
+            )
+
+        if "metrics" in yaml_config:
+            metrics_config = yaml_config["metrics"]
+            _settings_instance.METRICS_ENABLED = metrics_config.get("enabled", True)
+            _settings_instance.METRICS_MULTIPROCESS_DIR = metrics_config.get(
+                "multiprocess_dir", "cache/metrics"
+            )
+            _settings_instance.METRICS_FLUSH_INTERVAL_SECONDS = metrics_config.get(
+                "flush_interval_seconds", 5.0
+            )
+
+        if "batch" in yaml_config:
+            batch_config = yaml_config["batch"]
+            _settings_instance.BATCH_MAX_SIZE = batch_config.get("max_size", 500)
+            _settings_instance.BATCH_MAX_CONCURRENCY = batch_config.get(
+                "max_concurrency", 8
+            )
+
+        if "answer_cache" in yaml_config:
+            answer_config = yaml_config["answer_cache"]
+            _settings_instance.ANSWER_CACHE_ENABLED = answer_config.get("enabled", True)
+            _settings_instance.ANSWER_CACHE_SIMILARITY_THRESHOLD = answer_config.get(
+                "similarity_threshold", 0.95
+            )
+            _settings_instance.ANSWER_CACHE_MAX_ENTRIES = answer_config.get(
+                "max_entries", 1000
+            )
+            _settings_instance.ANSWER_CACHE_TTL_SECONDS = answer_config.get(
+                "ttl_seconds", 3600
+            )
+
+        if "retrieval" in yaml_config:
+            retrieval_config = yaml_config["retrieval"]
+            _settings_instance.RETRIEVAL_N_RESULTS = retrieval_config.get(
+                "n_results", 2
+            )
+            _settings_instance.RETRIEVAL_ENGINE = retrieval_config.get(
+                "engine", "chroma"
+            )
+            _settings_instance.RETRIEVAL_QUANTIZATION = retrieval_config.get(
+                "quantization", "none"
+            )
+            _settings_instance.RETRIEVAL_INDEX_DIR = retrieval_config.get(
+                "index_dir", "cache/vector_index"
+            )
+            _settings_instance.RETRIEVAL_HYBRID = retrieval_config.get("hybrid", True)
+            _settings_instance.RETRIEVAL_CANDIDATES = retrieval_config.get(
+                "candidates", 10
+            )
+            _settings_instance.RETRIEVAL_RRF_K = retrieval_config.get("rrf_k", 60)
+            _settings_instance.RETRIEVAL_BM25_K1 = retrieval_config.get("bm25_k1", 1.5)
+            _settings_instance.RETRIEVAL_BM25_B = retrieval_config.get("bm25_b", 0.75)
+            _settings_instance.RETRIEVAL_CONTEXT_TOKEN_BUDGET = retrieval_config.get(
+                "context_token_budget", 800
+            )
+            _settings_instance.RETRIEVAL_MAX_CHUNKS = retrieval_config.get(
+                "max_chunks", 5
+            )
+            _settings_instance.RETRIEVAL_MMR_LAMBDA = retrieval_config.get(
+                "mmr_lambda", 0.7
+            )
+            _settings_instance.RETRIEVAL_DUPLICATE_THRESHOLD = retrieval_config.get(
+                "duplicate_threshold", 0.95
+            )
+
+        if "compression" in yaml_config:
+            compression_config = yaml_config["compression"]
+            _settings_instance.COMPRESSION_ENABLED = compression_config.get(
+                "enabled", False
+            )
+            _settings_instance.COMPRESSION_TOKEN_CAP = compression_config.get(
+                "token_cap", 300
+            )
+            _settings_instance.COMPRESSION_NEIGHBOURS = compression_config.get(
+                "neighbours", 1
+            )
+            _settings_instance.COMPRESSION_LEXICAL_WEIGHT = compression_config.get(
+                "lexical_weight", 0.5
+            )
 
         if "io" in yaml_config:
             io_config = yaml_config["io"]
@@ -156,6 +521,9 @@ def get_settings() -> Settings:
             log_config = yaml_config["logging"]
             _settings_instance.LOG_LEVEL = log_config.get("level", "INFO")
             _settings_instance.LOG_FILE = log_config.get("file", "logs/log.txt")
+            _settings_instance.LOG_FORMAT = log_config.get("format", "text")
+            _settings_instance.LOG_QUEUE_SIZE = log_config.get("queue_size", 10000)
+            _settings_instance.LOG_ACCESS = log_config.get("access_log", True)
 
         if "server" in yaml_config:
             server_config = yaml_config["server"]
@@ -1,45 +1,252 @@
 import asyncio
+import os
+import time
+from typing import Any, Dict, Optional, Set
 
 import aiofiles
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from src.database.chroma_db import ChromaDBManager
+from src.database.chroma_db import ChromaDBManager, get_chroma_manager
+from src.database.index_artifact import IndexArtifact
+from src.database.manifest import (
+    MANIFEST_FILENAME,
+    IndexManifest,
+    chunk_id,
+    file_sha256,
+)
+from src.services.rag.preprocessing.embedding_pipeline import embed_texts
 from src.services.rag.preprocessing.preprocess import PROCESSED_FILE_PATH
+from src.services.rag.utils.embedding_provider import (
+    EmbeddingProvider,
+    get_embedding_provider,
+)
+from src.services.rag.utils.llm import DOCUMENT_TASK_TYPE, EMBEDDING_MODEL
+from src.utils.config import get_settings
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
 
+COLLECTION_NAME = "assignment"
 
-async def initialize_vector_db():
+
+def _index_params(provider: EmbeddingProvider) -> Dict[str, Any]:
+    """Return the chunker and embedding parameters that determine the index contents."""
+    return {
+        "chunk_size": settings.INGESTION_CHUNK_SIZE,
+        "chunk_overlap": settings.INGESTION_CHUNK_OVERLAP,
+        "separators": ["\n\n"],
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_provider": provider.identity,
+    }
+
+
+async def _load_artifact(
+    chroma_manager: ChromaDBManager,
+    collection: Any,
+    artifact: IndexArtifact,
+    indexed_ids: Set[str],
+) -> None:
+    """Bulk-load the chunks of *artifact* missing from *collection* and drop the rest."""
+    start = time.perf_counter()
+    wanted = set(artifact.ids)
+    removed_ids = sorted(indexed_ids - wanted)
+    if removed_ids:
+        await asyncio.to_thread(
+            chroma_manager.delete_documents, collection, removed_ids
+        )
+    new = [i for i, doc_id in enumerate(artifact.ids) if doc_id not in indexed_ids]
+    if new:
+        await asyncio.to_thread(
+            chroma_manager.add_documents,
+            collection,
+            [artifact.documents[i] for i in new],
+            [artifact.ids[i] for i in new],
+            artifact.embeddings[new].tolist(),
+        )
+    logger.info(
+        f"Loaded {len(new)} chunks from the index artifact "
+        f"({len(removed_ids)} removed) in {time.perf_counter() - start:.2f}s "
+        "without embedding calls."
+    )
+
+
+async def initialize_vector_db(
+    chroma_manager: Optional[ChromaDBManager] = None,
+    provider: Optional[EmbeddingProvider] = None,
+    artifact_path: Optional[str] = None,
+) -> int:
     """
-    Initializes the vector database asynchronously.
+    Brings the vector database in line with the processed file asynchronously.
+
+    Chunks are content-addressed, so only new or changed chunks are embedded
+    and chunks no longer produced are deleted. When the manifest shows the
+    same source file and parameters as the last run, nothing is re-chunked.
+    When a prebuilt index artifact built from the same source and parameters
+    is present, it is bulk-loaded instead, with no embedding calls.
+
+    Returns:
+        The number of chunks that could not be embedded; they are retried on
+        the next run.
     """
-    chroma_manager = ChromaDBManager()
+    chroma_manager = chroma_manager or get_chroma_manager()
+    provider = provider or get_embedding_provider(EMBEDDING_MODEL)
     collection = await asyncio.to_thread(
-        chroma_manager.get_or_create_collection, "assignment"
+        chroma_manager.get_or_create_collection, COLLECTION_NAME
     )
+    manifest_path = os.path.join(chroma_manager.path, MANIFEST_FILENAME)
+    manifest = IndexManifest.load(manifest_path)
+    params = _index_params(provider)
+    source_sha256 = await asyncio.to_thread(file_sha256, PROCESSED_FILE_PATH)
 
-    count = await asyncio.to_thread(collection.count)
-    if count == 0:
-        logger.info("ChromaDB collection is empty. Populating with data...")
-        async with aiofiles.open(PROCESSED_FILE_PATH, "r", encoding="utf-8") as f:
-            data = await f.read()
+    indexed_ids = set(await asyncio.to_thread(chroma_manager.get_ids, collection))
+    if (
+        manifest is not None
+        and manifest.matches(source_sha256, params)
+        and indexed_ids == set(manifest.chunk_ids)
+    ):
+        logger.info(
+            f"ChromaDB collection '{COLLECTION_NAME}' is up to date "
+            f"with {len(indexed_ids)} documents."
+        )
+        return 0
+
+    artifact = await asyncio.to_thread(
+        IndexArtifact.load, artifact_path or settings.INGESTION_ARTIFACT_PATH
+    )
+    if artifact is not None and artifact.matches(source_sha256, params):
+        await _load_artifact(chroma_manager, collection, artifact, indexed_ids)
+        await asyncio.to_thread(
+            IndexManifest(
+                collection=COLLECTION_NAME,
+                source_sha256=source_sha256,
+                params=params,
+                chunk_ids=list(artifact.ids),
+            ).save,
+            manifest_path,
+        )
+        return 0
+    if artifact is not None:
+        logger.info(
+            "Index artifact was built from a different source or parameters; "
+            "embedding changed chunks instead."
+        )
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            separators=["\n\n"],
-            is_separator_regex=False,
+    if manifest is not None and manifest.params != params:
+        logger.info(
+            f"Chunking parameters changed from {manifest.params} to {params}. "
+            "Re-indexing changed chunks..."
         )
-        documents = await asyncio.to_thread(text_splitter.split_text, data)
 
-        documents = [doc for doc in documents if doc.strip()]
+    async with aiofiles.open(PROCESSED_FILE_PATH, "r", encoding="utf-8") as f:
+        data = await f.read()
 
-        await asyncio.to_thread(chroma_manager.add_documents, collection, documents)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=params["chunk_size"],
+        chunk_overlap=params["chunk_overlap"],
+        separators=params["separators"],
+        is_separator_regex=False,
+    )
+    documents = await asyncio.to_thread(text_splitter.split_text, data)
 
-        new_count = await asyncio.to_thread(collection.count)
-        logger.info(f"ChromaDB populated with {new_count} documents.")
-    else:
+    chunks: Dict[str, str] = {}
+    for doc in documents:
+        if doc.strip():
+            chunks.setdefault(chunk_id(doc, provider.identity), doc)
+
+    new_ids = [doc_id for doc_id in chunks if doc_id not in indexed_ids]
+    removed_ids = sorted(indexed_ids - chunks.keys())
+    logger.info(
+        f"Indexing diff: {len(new_ids)} new, {len(removed_ids)} removed, "
+        f"{len(chunks) - len(new_ids)} unchanged."
+    )
+
+    if removed_ids:
+        await asyncio.to_thread(
+            chroma_manager.delete_documents, collection, removed_ids
+        )
+    failed = 0
+    if new_ids:
+        new_documents = [chunks[doc_id] for doc_id in new_ids]
+        result = await embed_texts(
+            new_documents,
+            provider,
+            task_type=DOCUMENT_TASK_TYPE,
+        )
+        embedded = [i for i, vector in enumerate(result.embeddings) if vector is not None]
+        await asyncio.to_thread(
+            chroma_manager.add_documents,
+            collection,
+            [new_documents[i] for i in embedded],
+            [new_ids[i] for i in embedded],
+            [result.embeddings[i] for i in embedded],
+        )
         logger.info(
-            f"ChromaDB collection 'assignment' already populated with {count} documents."
+            f"Embedded {result.progress.done} chunks in "
+            f"{result.progress.elapsed:.2f}s ({result.progress.throughput:.1f}/s)."
+        )
+        failed = result.progress.failed
+
+    if not failed:
+        await asyncio.to_thread(
+            IndexManifest(
+                collection=COLLECTION_NAME,
+                source_sha256=source_sha256,
+                params=params,
+                chunk_ids=list(chunks),
+            ).save,
+            manifest_path,
+        )
+    else:
+        logger.error(
+            f"{failed} chunks could not be embedded; "
+            "they will be retried on the next startup."
+        )
+
+    new_count = await asyncio.to_thread(collection.count)
+    logger.info(f"ChromaDB collection '{COLLECTION_NAME}' holds {new_count} documents.")
+    return failed
+
+
+async def export_index_artifact(
+    path: str, chroma_manager: Optional[ChromaDBManager] = None
+) -> IndexArtifact:
+    """
+    Indexes the processed file if needed and writes the collection to an artifact.
+    Args:
+        path: Where to write the ``.npz`` artifact.
+        chroma_manager: The ChromaDB manager to index into and export from.
+    Returns:
+        The artifact that was written.
+    Raises:
+        RuntimeError: If some chunks could not be embedded. A partial
+            artifact would be loaded as complete on boot, so none is written.
+    """
+    chroma_manager = chroma_manager or get_chroma_manager()
+    provider = get_embedding_provider(EMBEDDING_MODEL)
+    failed = await initialize_vector_db(
+        chroma_manager, provider=provider, artifact_path=path
+    )
+    if failed:
+        raise RuntimeError(
+            f"{failed} chunks could not be embedded; no artifact was written."
         )
+    collection = await asyncio.to_thread(
+        chroma_manager.get_or_create_collection, COLLECTION_NAME
+    )
+    records = await asyncio.to_thread(
+        collection.get, include=["documents", "embeddings"]
+    )
+    order = np.argsort(records["ids"])
+    artifact = IndexArtifact(
+        collection=COLLECTION_NAME,
+        source_sha256=await asyncio.to_thread(file_sha256, PROCESSED_FILE_PATH),
+        params=_index_params(provider),
+        ids=[records["ids"][i] for i in order],
+        documents=[records["documents"][i] for i in order],
+        embeddings=np.asarray(records["embeddings"], dtype=np.float32)[order],
+    )
+    await asyncio.to_thread(artifact.save, path)
+    logger.info(f"Wrote index artifact with {len(artifact.ids)} chunks to {path}.")
+    return artifact
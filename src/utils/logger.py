@@ -1,21 +1,110 @@
 """
 Minimal logger setup for the application.
+
+Loggers do not write to the console or the log file themselves. They put
+records on a bounded queue that a background thread drains, so a log call on
+the event loop never waits for file I/O or rotation. When the queue is full,
+INFO and DEBUG records are dropped and WARNING and above replace the oldest
+queued record; the number dropped is logged once the writer catches up.
+With ``logging.format: "json"`` each record is one compact JSON object
+carrying the id of the request it was logged in.
 """
 
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import queue
+import threading
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional
 
 from src.utils.config import get_settings
 
 settings = get_settings()
 
-log_format = logging.Formatter(
-    "[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+
+@dataclass
+class RequestContext:
+    """The id of the request being served and the time spent in each stage."""
+
+    request_id: str
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+_request: ContextVar[Optional[RequestContext]] = ContextVar(
+    "log_request", default=None
+)
+
+
+def bind_request(request_id: str) -> Token:
+    """Attach *request_id* to records logged in the current context."""
+    return _request.set(RequestContext(request_id))
+
+
+def reset_request(token: Token) -> None:
+    _request.reset(token)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _request.get()
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add *seconds* to *stage* for the current request, if any."""
+    request = _request.get()
+    if request is not None:
+        request.stages[stage] = request.stages.get(stage, 0.0) + seconds
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one compact JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}"
+            f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        stages = getattr(record, "stages", None)
+        if stages:
+            entry["stages_ms"] = {
+                stage: round(seconds * 1000, 3) for stage, seconds in stages.items()
+            }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+log_format: logging.Formatter = (
+    JsonFormatter()
+    if settings.LOG_FORMAT == "json"
+    else logging.Formatter(
+        "[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
 )
 
+
+def _setup_warning(message: str) -> None:
+    _temp_setup_logger = logging.getLogger(f"{__name__}.setup_warning")
+    _temp_console_handler = logging.StreamHandler()
+    _temp_console_handler.setFormatter(log_format)
+    _temp_setup_logger.addHandler(_temp_console_handler)
+    _temp_setup_logger.setLevel(logging.WARNING)
+    _temp_setup_logger.warning(message)
+    _temp_setup_logger.removeHandler(_temp_console_handler)
+
+
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_format)
 
@@ -32,29 +121,110 @@ if log_file_path and log_file_path.strip():
         )
         file_handler.setFormatter(log_format)
     except Exception as e:
-        _temp_setup_logger = logging.getLogger(f"{__name__}.setup_warning")
-        _temp_console_handler = logging.StreamHandler()
-        _temp_console_handler.setFormatter(log_format)
-        _temp_setup_logger.addHandler(_temp_console_handler)
-        _temp_setup_logger.setLevel(logging.WARNING)
-        _temp_setup_logger.warning(
+        _setup_warning(
             f"Failed to initialize file logger for path '{log_file_path}': {e}. "
             f"File logging will be disabled. Check log file path and permissions."
         )
-        _temp_setup_logger.removeHandler(_temp_console_handler)
         file_handler = None
 elif log_file_path is not None:
-    _temp_setup_logger = logging.getLogger(f"{__name__}.setup_warning")
-    _temp_console_handler = logging.StreamHandler()
-    _temp_console_handler.setFormatter(log_format)
-    _temp_setup_logger.addHandler(_temp_console_handler)
-    _temp_setup_logger.setLevel(logging.WARNING)
-    _temp_setup_logger.warning(
+    _setup_warning(
         "Log file path is configured as an empty string. File logging will be disabled."
     )
-    _temp_setup_logger.removeHandler(_temp_console_handler)
     file_handler = None
 
+output_handlers: List[logging.Handler] = [console_handler]
+if file_handler:
+    output_handlers.append(file_handler)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queues records for the background writer without ever blocking.
+
+    The message and traceback are rendered here, while the arguments are
+    still current; formatting the line happens on the writer thread.
+    """
+
+    def __init__(self, record_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(record_queue)
+        self.record_queue = record_queue
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Each call creates its own record, so it is updated in place.
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = log_format.formatException(record.exc_info)
+            record.exc_info = None
+        request = _request.get()
+        if request is not None:
+            record.request_id = request.request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.record_queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.record_queue.get_nowait()
+                self.record_queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        with self._drop_lock:
+            self.dropped += 1
+
+
+# The value that stops QueueListener's thread; not part of its typed interface.
+_SENTINEL: Any = getattr(QueueListener, "_sentinel", None)
+
+
+class _Writer(QueueListener):
+    """Writes queued records and reports how many were dropped since last time."""
+
+    def __init__(self, handler: BoundedQueueHandler, *handlers: logging.Handler):
+        super().__init__(handler.record_queue, *handlers, respect_handler_level=True)
+        self.record_queue = handler.record_queue
+        self._queue_handler = handler
+        self._reported = 0
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when stopping with a full queue.
+        self.record_queue.put(_SENTINEL)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self._queue_handler.dropped
+        if dropped > self._reported:
+            notice = logging.LogRecord(
+                __name__,
+                logging.WARNING,
+                __file__,
+                0,
+                f"Log queue full; dropped {dropped - self._reported} records",
+                None,
+                None,
+            )
+            self._reported = dropped
+            super().handle(notice)
+        super().handle(record)
+
+
+queue_handler: Optional[BoundedQueueHandler] = None
+if settings.LOG_QUEUE_SIZE > 0:
+    queue_handler = BoundedQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    _writer = _Writer(queue_handler, *output_handlers)
+    _writer.start()
+    # Flush what is still queued when the process exits.
+    atexit.register(_writer.stop)
+
+
+def dropped_records() -> int:
+    """Return how many log records were dropped because the queue was full."""
+    return queue_handler.dropped if queue_handler is not None else 0
+
 
 def get_logger(name: str) -> logging.Logger:
     """
@@ -68,21 +238,17 @@ def get_logger(name: str) -> logging.Logger:
     """
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.addHandler(console_handler)
-        if file_handler:
-            logger.addHandler(file_handler)
+        if queue_handler is not None:
+            logger.addHandler(queue_handler)
+        else:
+            for handler in output_handlers:
+                logger.addHandler(handler)
         level_name = settings.LOG_LEVEL.upper()
         level = getattr(logging, level_name, logging.INFO)
         if not isinstance(level, int):
-            _temp_setup_logger = logging.getLogger(f"{__name__}.setup_warning")
-            _temp_console_handler = logging.StreamHandler()
-            _temp_console_handler.setFormatter(log_format)
-            _temp_setup_logger.addHandler(_temp_console_handler)
-            _temp_setup_logger.setLevel(logging.WARNING)
-            _temp_setup_logger.warning(
+            _setup_warning(
                 f"Invalid log level '{level_name}' in settings. Defaulting to INFO."
             )
-            _temp_setup_logger.removeHandler(_temp_console_handler)
             level = logging.INFO
         logger.setLevel(level)
     return logger
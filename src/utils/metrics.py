@@ -0,0 +1,362 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms are recorded without locks: each thread
+updates its own shard, and shards are only summed when ``/metrics`` is
+scraped. Values that other components already count, such as cache hits, can
+be exported through callbacks that are read at scrape time, so they cost
+nothing on the request path.
+
+With several uvicorn workers, each process writes its values to
+``metrics.multiprocess_dir`` every ``flush_interval_seconds``, and the worker
+serving a scrape merges in the files of the other live workers. Counters and
+histograms are summed; gauges are summed or, for values every worker shares
+such as the index size, take the maximum.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import suppress
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.logger import dropped_records, get_logger, record_stage
+
+logger = get_logger(__name__)
+
+Labels = Tuple[str, ...]
+Callback = Callable[[], Dict[Labels, float]]
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class _Metric:
+    """Base for metrics whose values are kept in per-thread shards."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards: List[Dict[Labels, Any]] = []
+        self._local = threading.local()
+        self._callbacks: List[Callback] = []
+        REGISTRY.register(self)
+
+    def _shard(self) -> Dict[Labels, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # list.append is atomic, so threads can add shards concurrently.
+            self._shards.append(shard)
+        return shard
+
+    def add_callback(self, callback: Callback) -> None:
+        """Add *callback*, returning values by label tuple, to read at scrape time."""
+        self._callbacks.append(callback)
+
+    def collect(self) -> Dict[Labels, Any]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Labels, Any]:
+        values: Dict[Labels, float] = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                values[labels] = values.get(labels, 0.0) + value
+        for callback in self._callbacks:
+            for labels, value in callback().items():
+                values[labels] = values.get(labels, 0.0) + value
+        return values
+
+
+class Gauge(Counter):
+    """Value that goes up and down.
+
+    *multiprocess_mode* is ``"sum"`` for per-process values such as requests
+    in flight, or ``"max"`` for values every worker shares.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> _Timer:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        # Per-bucket counts (the last one is +Inf), then sum and count.
+        values = shard.get(labels)
+        if values is None:
+            values = shard[labels] = [0.0] * (len(self.buckets) + 3)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def time(self, *labels: str) -> _Timer:
+        """Return a context manager that observes the time spent inside it."""
+        return _Timer(self, labels)
+
+    def collect(self) -> Dict[Labels, Any]:
+        values: Dict[Labels, List[float]] = {}
+        for shard in list(self._shards):
+            for labels, counts in shard.copy().items():
+                total = values.setdefault(labels, [0.0] * (len(self.buckets) + 3))
+                for i, count in enumerate(list(counts)):
+                    total[i] += count
+        return values
+
+
+class Registry:
+    """The set of metrics exported by this process."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def snapshot(self) -> Dict[str, List[Tuple[Labels, Any]]]:
+        """Return the current values of every metric, by metric name."""
+        return {
+            name: list(metric.collect().items())
+            for name, metric in self.metrics.items()
+        }
+
+
+class _StageHistogram(Histogram):
+    """Stage timings, also added to the current request's access log line."""
+
+    def observe(self, value: float, *labels: str) -> None:
+        super().observe(value, *labels)
+        record_stage(labels[0], value)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = _StageHistogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of serving a request.",
+    ("stage",),
+)
+CACHE_LOOKUPS = Counter(
+    "rag_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+LOG_RECORDS_DROPPED = Counter(
+    "rag_log_records_dropped_total", "Log records dropped because the queue was full."
+)
+LOG_RECORDS_DROPPED.add_callback(lambda: {(): dropped_records()})
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _merge(
+    metric: _Metric, into: Dict[Labels, Any], values: Iterable[Tuple[Labels, Any]]
+) -> None:
+    for labels, value in values:
+        labels = tuple(labels)
+        current = into.get(labels)
+        if current is None:
+            into[labels] = list(value) if isinstance(value, list) else value
+        elif isinstance(current, list):
+            for i, count in enumerate(value):
+                current[i] += count
+        elif isinstance(metric, Gauge) and metric.multiprocess_mode == "max":
+            into[labels] = max(current, value)
+        else:
+            into[labels] = current + value
+
+
+def render(registry: Optional[Registry] = None) -> str:
+    """Return every metric in the Prometheus text exposition format.
+
+    When multiprocess export is running, the latest values written by the
+    other live workers are merged in.
+    """
+    registry = registry or REGISTRY
+    merged: Dict[str, Dict[Labels, Any]] = {}
+    for name, values in registry.snapshot().items():
+        merged[name] = {}
+        _merge(registry.metrics[name], merged[name], values)
+    if _exporter is not None:
+        for snapshot in _exporter.read_others():
+            for name, values in snapshot.items():
+                if name in registry.metrics:
+                    _merge(registry.metrics[name], merged[name], values)
+
+    lines: List[str] = []
+    for name, metric in registry.metrics.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for labels, value in sorted(merged[name].items()):
+            if not isinstance(value, list):
+                plain = _labels(metric.labelnames, labels)
+                lines.append(f"{name}{plain} {_number(value)}")
+                continue
+            assert isinstance(metric, Histogram)
+            buckets = (*metric.buckets, math.inf)
+            cumulative = 0.0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                le = _labels(metric.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{name}_bucket{le} {_number(cumulative)}")
+            plain = _labels(metric.labelnames, labels)
+            lines.append(f"{name}_sum{plain} {_number(value[-2])}")
+            lines.append(f"{name}_count{plain} {_number(value[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessExporter:
+    """Writes this worker's values to *directory* and reads the other workers'."""
+
+    def __init__(self, directory: str, interval_seconds: float = 5.0):
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self.path = os.path.join(directory, f"{os.getpid()}.json")
+
+    def write(self) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(REGISTRY.snapshot(), f)
+        os.replace(temporary, self.path)
+
+    def read_others(self) -> List[Dict[str, List[Tuple[Labels, Any]]]]:
+        snapshots = []
+        for entry in os.listdir(self.directory):
+            pid_text, extension = os.path.splitext(entry)
+            path = os.path.join(self.directory, entry)
+            if extension != ".json" or not pid_text.isdigit() or path == self.path:
+                continue
+            pid = int(pid_text)
+            # A dead worker's counters go with it, as on any process restart.
+            if not _alive(pid):
+                with suppress(OSError):
+                    os.remove(path)
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    async def run(self) -> None:
+        """Write this worker's values every ``interval_seconds`` until cancelled."""
+        try:
+            while True:
+                await asyncio.to_thread(self.write)
+                await asyncio.sleep(self.interval_seconds)
+        finally:
+            with suppress(OSError):
+                os.remove(self.path)
+
+
+_exporter: Optional[MultiprocessExporter] = None
+
+
+def start_multiprocess(directory: str, interval_seconds: float) -> MultiprocessExporter:
+    """Share this worker's metrics through *directory*; run the returned exporter."""
+    global _exporter
+    os.makedirs(directory, exist_ok=True)
+    _exporter = MultiprocessExporter(directory, interval_seconds)
+    logger.info(f"Metrics shared across workers through {directory}")
+    return _exporter
@@ -0,0 +1,56 @@
+"""
+Shared test setup.
+
+The tests run against the local fake providers and never call Gemini, but
+the settings still require an API key to load.
+"""
+
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from typing import List, Sequence  # noqa: E402
+
+import pytest  # noqa: E402
+
+from src.services.memory.memory_manager import RetrievalResult  # noqa: E402
+from src.services.rag.utils.embedding_provider import (  # noqa: E402
+    FakeEmbeddingProvider,
+)
+from src.services.rag.utils.llm import QUERY_TASK_TYPE  # noqa: E402
+
+
+class FakeRetriever:
+    """Embeds with the fake provider and always retrieves the same chunk."""
+
+    def __init__(self, chunk_id: str = "chunk-0"):
+        self.provider = FakeEmbeddingProvider(dimensions=16)
+        self.chunk_id = chunk_id
+        self.searches = 0
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self.embed_queries([text]))[0]
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self.provider.embed(texts, QUERY_TASK_TYPE)
+
+    async def search(
+        self, text: str, embedding: Sequence[float], n_results: int = 2
+    ) -> RetrievalResult:
+        self.searches += 1
+        return RetrievalResult(
+            ids=[self.chunk_id], documents=["অনুপমের বয়স সাতাশ বছর।"], scores=[1.0]
+        )
+
+    async def search_many(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        n_results: int = 2,
+    ) -> List[RetrievalResult]:
+        return [await self.search(t, e, n_results) for t, e in zip(texts, embeddings)]
+
+
+@pytest.fixture
+def retriever() -> FakeRetriever:
+    return FakeRetriever()
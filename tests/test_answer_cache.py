@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.services.rag.rag_chat import RAGChat
+from src.services.rag.utils.answer_cache import SemanticAnswerCache
+from src.services.rag.utils.fake_llm import FakeChatModel
+
+
+def test_lookup_matches_above_the_threshold():
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    cache.store([1.0, 0.0], ["c1"], "answer")
+    hit = cache.lookup([1.0, 0.1])
+    assert hit is not None and hit.answer == "answer" and hit.chunk_ids == ["c1"]
+    assert cache.lookup([0.0, 1.0]) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_invalidate_drops_only_answers_built_from_changed_chunks():
+    cache = SemanticAnswerCache(similarity_threshold=0.99)
+    cache.store([1.0, 0.0, 0.0], ["c1", "c2"], "first")
+    cache.store([0.0, 1.0, 0.0], ["c3"], "second")
+    cache.invalidate(["c2"])
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0, 0.0]).answer == "second"
+    assert cache.stats.invalidations == 1
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_collection_changes_invalidate_the_cache(tmp_path):
+    from src.database import chroma_db
+
+    manager = chroma_db.ChromaDBManager(path=str(tmp_path / "chroma"))
+    collection = manager.get_or_create_collection("answers")
+    cache = SemanticAnswerCache(similarity_threshold=0.99)
+    chroma_db.add_change_listener(cache.invalidate)
+    try:
+        manager.add_documents(collection, ["a"], ids=["c1"], embeddings=[[1.0, 0.0]])
+        cache.store([1.0, 0.0], ["c1"], "first")
+        cache.store([0.0, 1.0], ["c2"], "second")
+        manager.delete_documents(collection, ["c1"])
+        assert len(cache) == 1
+
+        # New chunks may outrank anything cached, so every answer goes.
+        manager.add_documents(collection, ["b"], ids=["c2"], embeddings=[[0.0, 1.0]])
+        assert len(cache) == 0
+    finally:
+        chroma_db._change_listeners.remove(cache.invalidate)
+
+
+def test_entries_expire_and_the_least_recently_used_is_replaced():
+    expired = SemanticAnswerCache(similarity_threshold=0.99, ttl_seconds=0.01)
+    expired.store([1.0, 0.0], ["c1"], "answer")
+    time.sleep(0.05)
+    assert expired.lookup([1.0, 0.0]) is None
+
+    cache = SemanticAnswerCache(similarity_threshold=0.99, max_entries=2)
+    cache.store([1.0, 0.0, 0.0], ["c1"], "first")
+    cache.store([0.0, 1.0, 0.0], ["c2"], "second")
+    assert cache.lookup([1.0, 0.0, 0.0]) is not None
+    cache.store([0.0, 0.0, 1.0], ["c3"], "third")
+    assert len(cache) == 2
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0]).answer == "first"
+
+
+def test_only_first_turns_are_answered_from_the_cache(retriever):
+    llm = FakeChatModel(response="সাতাশ")
+    engine = RAGChat(
+        llm=llm,
+        retriever=retriever,
+        checkpointer=MemorySaver(),
+        answer_cache=SemanticAnswerCache(similarity_threshold=0.99),
+        governor=None,
+    )
+
+    async def ask(thread_id):
+        return await engine.process_user_input("অনুপমের বয়স কত?", thread_id=thread_id)
+
+    assert asyncio.run(ask("a")) == "সাতাশ"
+    assert asyncio.run(ask("b")) == "সাতাশ"
+    assert llm.calls == 1
+
+    # The same words mean something else after earlier turns, so the
+    # follow-up goes through the model.
+    assert asyncio.run(ask("a")) == "সাতাশ"
+    assert llm.calls == 2
@@ -0,0 +1,94 @@
+import asyncio
+import sqlite3
+
+from src.database.checkpointer import SQLiteCheckpointSaver
+from src.services.rag.rag_chat import RAGChat
+from src.services.rag.utils.answer_cache import SemanticAnswerCache
+from src.services.rag.utils.fake_llm import FakeChatModel
+
+
+def _count(path: str, table: str, thread_id: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,)
+        ).fetchone()[0]
+
+
+def _engine(checkpointer, retriever) -> RAGChat:
+    # A threshold above 1 never matches, so every turn reaches the graph.
+    return RAGChat(
+        llm=FakeChatModel(response="সাতাশ"),
+        retriever=retriever,
+        checkpointer=checkpointer,
+        answer_cache=SemanticAnswerCache(similarity_threshold=2.0, max_entries=1),
+        governor=None,
+    )
+
+
+def test_writes_are_deferred_until_flushed(tmp_path, retriever):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=60)
+    engine = _engine(saver, retriever)
+    asyncio.run(engine.process_user_input("অনুপমের বয়স কত?", thread_id="t"))
+    assert _count(path, "checkpoints", "t") == 0
+
+    # Reads flush first, so the worker sees its own writes.
+    state = asyncio.run(engine.graph.aget_state({"configurable": {"thread_id": "t"}}))
+    assert [m.content for m in state.values["messages"]][-1] == "সাতাশ"
+    assert _count(path, "checkpoints", "t") > 0
+    saver.close()
+
+
+def test_history_survives_a_new_saver(tmp_path, retriever):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=0.01)
+    asyncio.run(_engine(saver, retriever).process_user_input("q1", thread_id="t"))
+    saver.close()
+
+    reopened = SQLiteCheckpointSaver(path)
+    engine = _engine(reopened, retriever)
+    asyncio.run(engine.process_user_input("q2", thread_id="t"))
+    state = asyncio.run(engine.graph.aget_state({"configurable": {"thread_id": "t"}}))
+    assert [m.content for m in state.values["messages"]] == [
+        "q1",
+        "সাতাশ",
+        "q2",
+        "সাতাশ",
+    ]
+    reopened.close()
+
+
+def test_compaction_keeps_the_latest_checkpoints(tmp_path, retriever):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=0, max_checkpoints_per_thread=2)
+    engine = _engine(saver, retriever)
+    for turn in range(4):
+        asyncio.run(engine.process_user_input(f"q{turn}", thread_id="t"))
+    before = _count(path, "checkpoints", "t")
+
+    removed = saver.compact()
+    assert removed["checkpoints"] == before - 2
+    assert _count(path, "checkpoints", "t") == 2
+    state = asyncio.run(engine.graph.aget_state({"configurable": {"thread_id": "t"}}))
+    assert len(state.values["messages"]) == 8
+
+
+def test_compaction_drops_stale_threads(tmp_path, retriever):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=0, max_thread_age_seconds=-1)
+    asyncio.run(_engine(saver, retriever).process_user_input("q", thread_id="old"))
+    saver.compact()
+    for table in ("checkpoints", "blobs", "writes"):
+        assert _count(path, table, "old") == 0
+
+
+def test_delete_thread_removes_only_that_thread(tmp_path, retriever):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=60)
+    engine = _engine(saver, retriever)
+    asyncio.run(engine.process_user_input("q", thread_id="a"))
+    asyncio.run(engine.process_user_input("q", thread_id="b"))
+    asyncio.run(saver.adelete_thread("a"))
+    assert _count(path, "checkpoints", "a") == 0
+    assert _count(path, "checkpoints", "b") > 0
+    saver.close()
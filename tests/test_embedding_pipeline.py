@@ -0,0 +1,149 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.services.rag.utils.embedding_batcher import EmbeddingBatcher
+from src.services.rag.utils.embedding_cache import EmbeddingCache, make_key
+from src.services.rag.utils.embedding_provider import FakeEmbeddingProvider
+from src.services.rag.utils.llm import QUERY_TASK_TYPE
+
+
+def test_fake_provider_is_deterministic_and_normalized():
+    provider = FakeEmbeddingProvider(dimensions=16)
+    first, second = asyncio.run(provider.embed(["a", "a"], QUERY_TASK_TYPE))
+    assert first == second
+    assert len(first) == 16
+    assert sum(x * x for x in first) == pytest.approx(1.0, rel=1e-5)
+    assert FakeEmbeddingProvider(dimensions=16).identity != "fake/768"
+
+
+def test_batcher_coalesces_concurrent_callers():
+    provider = FakeEmbeddingProvider(dimensions=8)
+    batches = []
+
+    async def embed(texts):
+        batches.append(list(texts))
+        return await provider.embed(texts, QUERY_TASK_TYPE)
+
+    batcher = EmbeddingBatcher(embed, window_ms=20, max_batch_size=64)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), batcher.embed_many(["a", "c"])
+        )
+
+    a, b, (a_again, c) = asyncio.run(main())
+    assert batches == [["a", "b", "c"]]
+    assert a == a_again == provider.vector("a")
+    assert b == provider.vector("b")
+    assert c == provider.vector("c")
+    assert batcher.stats.texts == 4
+    assert batcher.stats.upstream_texts == 3
+
+
+def test_batcher_splits_at_max_batch_size():
+    sizes = []
+
+    async def embed(texts):
+        sizes.append(len(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(embed, window_ms=1000, max_batch_size=3)
+
+    async def main():
+        return await batcher.embed_many([f"text-{i}" for i in range(7)])
+
+    assert len(asyncio.run(main())) == 7
+    assert sizes == [3, 3, 1]
+
+
+def test_batcher_failure_reaches_every_caller():
+    provider = FakeEmbeddingProvider(error_rate=1.0)
+    batcher = EmbeddingBatcher(
+        lambda texts: provider.embed(texts, QUERY_TASK_TYPE), window_ms=5
+    )
+
+    async def main():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(main()))
+    assert batcher.stats.failures == 1
+
+
+def test_cache_keys_depend_on_provider_and_task():
+    key = make_key("What  is RAG?", "fake/8", QUERY_TASK_TYPE)
+    assert key == make_key("what is rag?", "fake/8", QUERY_TASK_TYPE)
+    assert key != make_key("what is rag?", "fake/16", QUERY_TASK_TYPE)
+    assert key != make_key("what is rag?", "fake/8", "retrieval_document")
+
+
+def test_cache_serves_from_disk_after_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path=path).put("key", [0.5, 0.25])
+    cache = EmbeddingCache(path=path)
+    assert cache.get("key") == [0.5, 0.25]
+    assert cache.get("key") == [0.5, 0.25]
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.memory_hits == 1
+    assert cache.get("other") is None
+
+
+def test_cache_prunes_the_disk_tier_while_running(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(
+        max_entries=5, path=path, max_disk_entries=20, prune_every=10
+    )
+    for i in range(100):
+        cache.put(f"key-{i}", [float(i)])
+    rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM embeddings").fetchone()
+    assert rows[0] <= 30
+    assert cache.get("key-99") == [99.0]
+
+
+class _SecondSpace(FakeEmbeddingProvider):
+    def __init__(self):
+        super().__init__(dimensions=8)
+        self.identity = "other/8"
+
+
+def test_ingestion_embeds_only_new_chunks(tmp_path):
+    from src.database.chroma_db import ChromaDBManager
+    from src.utils.helper import initialize_vector_db
+
+    manager = ChromaDBManager(path=str(tmp_path / "chroma"))
+    artifact_path = str(tmp_path / "missing.npz")
+
+    async def index(provider):
+        failed = await initialize_vector_db(
+            manager, provider=provider, artifact_path=artifact_path
+        )
+        assert failed == 0
+        return provider.calls
+
+    assert asyncio.run(index(FakeEmbeddingProvider(dimensions=8))) > 0
+    assert asyncio.run(index(FakeEmbeddingProvider(dimensions=8))) == 0
+    ids = set(manager.get_ids(manager.get_or_create_collection("assignment")))
+
+    # Another embedding space gets its own chunk ids, so everything is redone.
+    assert asyncio.run(index(_SecondSpace())) > 0
+    new_ids = set(manager.get_ids(manager.get_or_create_collection("assignment")))
+    assert len(new_ids) == len(ids)
+    assert not new_ids & ids
+
+
+def test_ingestion_reports_failed_chunks(tmp_path):
+    from src.database.chroma_db import ChromaDBManager
+    from src.utils.helper import initialize_vector_db
+
+    manager = ChromaDBManager(path=str(tmp_path / "chroma"))
+    failed = asyncio.run(
+        initialize_vector_db(
+            manager,
+            provider=FakeEmbeddingProvider(dimensions=8, error_rate=1.0),
+            artifact_path=str(tmp_path / "missing.npz"),
+        )
+    )
+    assert failed > 0
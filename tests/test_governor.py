@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from src.services.rag.utils import deadline
+from src.services.rag.utils.governor import AdaptiveLimiter, Governor, UpstreamError
+
+
+def _governor(**kwargs) -> Governor:
+    kwargs.setdefault("timeout_seconds", 5.0)
+    kwargs.setdefault("retry_delay", 0.001)
+    return Governor("test", **kwargs)
+
+
+def test_retries_transient_failures_until_success():
+    governor = _governor(retry_attempts=3)
+    attempts = []
+
+    async def call(attempt):
+        attempts.append(attempt)
+        if len(attempts) < 3:
+            raise UpstreamError("unavailable", code=503)
+        return "ok"
+
+    assert asyncio.run(governor.call(call)) == "ok"
+    assert attempts == [0, 1, 2]
+    assert governor.stats.retries == 2
+    assert governor.stats.failures == 0
+
+
+def test_does_not_retry_client_errors():
+    governor = _governor(retry_attempts=3)
+    attempts = []
+
+    async def call(attempt):
+        attempts.append(attempt)
+        raise UpstreamError("bad request", code=400)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(governor.call(call))
+    assert attempts == [0]
+    assert governor.stats.failures == 1
+
+
+def test_committed_call_is_not_retried():
+    governor = _governor(retry_attempts=3)
+    attempts = []
+
+    async def call(attempt):
+        attempts.append(attempt)
+        raise UpstreamError("unavailable", code=503)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(governor.call(call, committed=lambda: True))
+    assert attempts == [0]
+
+
+def test_timeout_is_counted_as_congestion():
+    governor = _governor(retry_attempts=3, limiter=AdaptiveLimiter(8))
+
+    async def call(attempt):
+        await asyncio.sleep(1.0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(governor.call(call, timeout_seconds=0.05))
+    assert governor.stats.timeouts == 1
+    assert governor.limiter.limit == 4
+
+
+def test_limiter_wait_counts_against_the_deadline():
+    governor = _governor(
+        timeout_seconds=0.2, retry_attempts=0, limiter=AdaptiveLimiter(1, max_limit=1)
+    )
+
+    async def slow(attempt):
+        await asyncio.sleep(0.15)
+        return attempt
+
+    async def main():
+        return await asyncio.gather(
+            governor.call(slow), governor.call(slow), return_exceptions=True
+        )
+
+    first, second = asyncio.run(main())
+    assert first == 0
+    assert isinstance(second, asyncio.TimeoutError)
+    assert governor.stats.timeouts == 1
+    assert governor.limiter.in_flight == 0
+    assert governor.limiter.queued == 0
+
+
+def test_request_deadline_caps_the_budget():
+    governor = _governor(retry_attempts=0)
+
+    async def call(attempt):
+        await asyncio.sleep(1.0)
+
+    async def main():
+        deadline.set_deadline(0.05)
+        await governor.call(call)
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        asyncio.run(main())
+
+
+def _hedging_governor() -> Governor:
+    governor = _governor(hedge=True, hedge_percentile=50, hedge_min_samples=5)
+    governor._latencies.extend([0.02] * 5)
+    return governor
+
+
+def test_hedge_wins_over_a_slow_first_attempt():
+    governor = _hedging_governor()
+
+    async def call(attempt):
+        await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+        return attempt
+
+    assert asyncio.run(governor.call(call)) == 1
+    assert governor.stats.hedges == 1
+    assert governor.stats.hedge_wins == 1
+
+
+def test_committed_first_attempt_beats_a_faster_hedge():
+    governor = _hedging_governor()
+    streamed = False
+
+    async def call(attempt):
+        nonlocal streamed
+        if attempt == 0:
+            await asyncio.sleep(0.05)
+            streamed = True
+            await asyncio.sleep(0.1)
+            return "first"
+        await asyncio.sleep(0.06)
+        return "hedge"
+
+    assert asyncio.run(governor.call(call, committed=lambda: streamed)) == "first"
+    assert governor.stats.hedge_wins == 0
+
+
+def test_limiter_backs_off_once_per_burst_and_recovers():
+    limiter = AdaptiveLimiter(8, min_limit=1, max_limit=10, backoff_ratio=0.5)
+
+    async def admit(n):
+        return [await limiter.acquire() for _ in range(n)]
+
+    admitted = asyncio.run(admit(4))
+    for admitted_at in admitted:
+        limiter.on_congestion(admitted_at)
+        limiter.release()
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+    for _ in range(8):
+        limiter.on_success()
+    assert 5 < limiter.limit <= 6
+
+
+def test_rate_limits_shrink_the_limit():
+    governor = _governor(retry_attempts=0, limiter=AdaptiveLimiter(8))
+
+    async def call(attempt):
+        raise UpstreamError("quota", code=429)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(governor.call(call))
+    assert governor.stats.rate_limited == 1
+    assert governor.limiter.limit == 4
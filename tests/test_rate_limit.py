@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from src.api.middleware.rate_limit import (
+    MemoryRateLimitStore,
+    RateLimitMiddleware,
+    SQLiteRateLimitStore,
+)
+
+
+def test_bucket_allows_a_burst_then_refills():
+    store = MemoryRateLimitStore(max_requests=3, window_seconds=3)
+    assert [store.take("client", 0.0)[0] for _ in range(3)] == [True] * 3
+
+    allowed, tokens, retry_after = store.take("client", 0.0)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+    assert store.take("client", 1.0)[0]
+    assert not store.take("client", 1.0)[0]
+
+
+def test_buckets_are_per_client():
+    store = MemoryRateLimitStore(max_requests=1, window_seconds=60)
+    assert store.take("a", 0.0)[0]
+    assert store.take("b", 0.0)[0]
+    assert not store.take("a", 0.0)[0]
+
+
+def test_idle_and_surplus_buckets_are_evicted():
+    store = MemoryRateLimitStore(max_requests=1, window_seconds=10, max_clients=2)
+    for client in ("a", "b", "c"):
+        store.take(client, 0.0)
+    assert len(store) == 2
+    store.take("d", 100.0)
+    assert len(store) == 1
+
+
+def test_sqlite_buckets_are_shared_between_stores(tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite")
+    first = SQLiteRateLimitStore(path, max_requests=2, window_seconds=60)
+    second = SQLiteRateLimitStore(path, max_requests=2, window_seconds=60)
+    assert first.take("client", 100.0)[0]
+    assert second.take("client", 100.0)[0]
+    assert not first.take("client", 100.0)[0]
+    assert second.take("client", 130.0)[0]
+
+
+def test_middleware_answers_429_with_retry_after():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = RateLimitMiddleware(
+        app, max_requests=1, window_seconds=60, exempt_paths=["/health"]
+    )
+    scope = {"type": "http", "path": "/api/chat", "client": ("1.2.3.4", 1)}
+
+    async def request(path="/api/chat"):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware(dict(scope, path=path), None, send)
+        return messages[0]
+
+    async def main():
+        return [await request(), await request(), await request("/health")]
+
+    ok, limited, health = asyncio.run(main())
+    assert ok["status"] == 200
+    assert limited["status"] == 429
+    assert dict(limited["headers"])[b"retry-after"] == b"60"
+    assert health["status"] == 200
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from src.services.memory.context_builder import mmr_select
+from src.services.memory.lexical_index import (
+    BM25Index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from src.services.memory.vector_index import VectorIndex
+
+
+def test_tokenize_unifies_bengali_variants():
+    assert tokenize("অনুপমের বয়স ২৭ বছর।") == tokenize("অনুপম বয়স 27 বছর")
+    assert tokenize("Hello, World") == ["hello", "world"]
+
+
+def test_bm25_ranks_rare_matching_terms_first():
+    index = BM25Index(
+        ["a", "b", "c"],
+        [
+            "the cat sat on the mat",
+            "the dog chased the cat",
+            "kalyani married anupam",
+        ],
+    )
+    results = index.search("anupam cat", n_results=3)
+    assert results[0][0] == "c"
+    assert {doc_id for doc_id, _, _ in results} == {"a", "b", "c"}
+    assert index.search("unknown words", n_results=3) == []
+
+
+def test_bm25_prefers_shorter_documents_for_equal_matches():
+    index = BM25Index(["short", "long"], ["cat", "cat " + "filler " * 50])
+    assert [doc_id for doc_id, _, _ in index.search("cat")] == ["short", "long"]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a", "d"], ["b"]])
+    assert fused[0] == "b"
+    assert fused[1] == "a"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_mmr_skips_near_duplicates():
+    candidates = np.array(
+        [[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.7, 0.7, 0.0]], dtype=np.float32
+    )
+    selected = mmr_select(
+        [1.0, 0.0, 0.0], candidates, costs=[10, 10, 10], token_budget=100
+    )
+    assert selected == [0, 2]
+
+
+def test_mmr_respects_the_token_budget_but_keeps_the_best_chunk():
+    candidates = np.eye(3, dtype=np.float32)
+    query = [1.0, 0.5, 0.2]
+    assert mmr_select(query, candidates, costs=[500, 10, 10], token_budget=100) == [0]
+    assert mmr_select(query, candidates, costs=[50, 40, 40], token_budget=100) == [0, 1]
+
+
+def test_vector_index_int8_matches_float(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((300, 32)).astype(np.float32)
+    ids = [str(i) for i in range(300)]
+    exact = VectorIndex.build(str(tmp_path), ids, ids, embeddings, "none")
+    quantized = VectorIndex.build(str(tmp_path), ids, ids, embeddings, "int8")
+    queries = embeddings[:5] + 0.01 * rng.standard_normal((5, 32)).astype(np.float32)
+    for (rows, scores), (q_rows, q_scores) in zip(
+        exact.search(queries, 5), quantized.search(queries, 5)
+    ):
+        assert rows[0] == q_rows[0]
+        assert np.allclose(scores, q_scores, atol=0.02)
+    assert quantized.nbytes < exact.nbytes / 3
+
+
+def test_vector_index_build_reuses_published_files(tmp_path):
+    embeddings = np.eye(4, dtype=np.float32)
+    ids = ["a", "b", "c", "d"]
+    first = VectorIndex.build(str(tmp_path), ids, ids, embeddings)
+    second = VectorIndex.build(str(tmp_path), ids, ids, embeddings * 2)
+    assert first.base == second.base
+    name = os.path.basename(first.base)
+    assert sorted(os.listdir(tmp_path)) == [f"{name}.json", f"{name}.matrix.npy"]
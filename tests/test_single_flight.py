@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from src.services.rag.utils import deadline
+from src.services.rag.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert calls == 1
+    assert flight.stats.shared == 4
+    assert len(flight) == 0
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+
+    async def main():
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: compute("a")), flight.do("b", lambda: compute("b"))
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_exceptions_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", compute))
+        second = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("done", True)
+
+
+def test_last_caller_leaving_cancels_the_computation():
+    flight = SingleFlight()
+    finished = False
+
+    async def compute():
+        nonlocal finished
+        await asyncio.sleep(0.05)
+        finished = True
+
+    async def main():
+        caller = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.08)
+
+    asyncio.run(main())
+    assert not finished
+
+
+def test_shared_call_ignores_the_first_callers_deadline():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return deadline.remaining()
+
+    async def leader():
+        deadline.set_deadline(0.001)
+        return await flight.do("key", compute)
+
+    async def main():
+        return await asyncio.gather(leader(), flight.do("key", compute))
+
+    assert asyncio.run(main()) == [None, None]